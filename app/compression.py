@@ -0,0 +1,216 @@
+"""Response compression with content negotiation and a compressed body cache.
+
+``CompressionMiddleware`` compresses JSON and text responses with the best
+encoding the client accepts. Only gzip is always available; zstd needs
+Python 3.14+ and brotli the optional ``brotli`` package, which is not a
+dependency. Compressed bodies of successful GET responses are cached by
+encoding and a digest of the uncompressed body, so a payload that does not
+change between requests is compressed once per encoding rather than once
+per request, at the cost of hashing it. Streamed responses, such as
+server-sent events, pass through untouched.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+from app.metrics import REGISTRY
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_CACHE = REGISTRY.counter(
+    "compression_cache", "Compressed body cache lookups by result", ["result"]
+)
+COMPRESSION_INPUT_BYTES = REGISTRY.counter(
+    "compression_input_bytes",
+    "Bytes of compressible response bodies before encoding",
+    ["encoding"],
+)
+COMPRESSION_OUTPUT_BYTES = REGISTRY.counter(
+    "compression_output_bytes",
+    "Bytes of compressible response bodies sent, after encoding",
+    ["encoding"],
+)
+
+# Content-Encoding -> compressor, in order of preference when a client
+# accepts several equally
+ENCODINGS: dict[str, Callable[[bytes], bytes]] = {}
+if zstd is not None:
+    ENCODINGS["zstd"] = lambda body: zstd.compress(body, level=6)
+if brotli is not None:
+    ENCODINGS["br"] = lambda body: brotli.compress(body, quality=5)
+ENCODINGS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Streamed one event at a time; buffering would delay every event
+STREAMED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(
+    accept_encoding: str, encodings: Sequence[str] | None = None
+) -> str | None:
+    """Pick the content coding for an ``Accept-Encoding`` header.
+
+    Codings the client weights higher win; ties go to the earlier of
+    ``encodings``. ``*`` stands for any coding not listed, and ``q=0``
+    refuses a coding.
+
+    Args:
+        accept_encoding: Header value, e.g. ``"gzip;q=0.8, br"``
+        encodings: Codings the server offers; defaults to ``ENCODINGS``
+
+    Returns:
+        The coding, or None to send the body as it is
+    """
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS if encodings is None else encodings:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class CompressedBodyCache:
+    """Compressed bodies by encoding and body digest, least recently used first.
+
+    Bounded by the total size of the compressed bodies it holds.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._bodies: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+            self._size = 0
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        """``body`` compressed with ``encoding``, compressing only on a miss."""
+        if self.max_bytes <= 0:
+            return ENCODINGS[encoding](body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._bodies.get(key)
+            if compressed is not None:
+                self._bodies.move_to_end(key)
+        if compressed is not None:
+            COMPRESSION_CACHE.labels("hit").inc()
+            return compressed
+        COMPRESSION_CACHE.labels("miss").inc()
+        compressed = ENCODINGS[encoding](body)
+        if len(compressed) <= self.max_bytes:
+            with self._lock:
+                if key not in self._bodies:
+                    self._bodies[key] = compressed
+                    self._size += len(compressed)
+                while self._size > self.max_bytes:
+                    _, evicted = self._bodies.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON and text responses.
+
+    Bodies smaller than ``settings.compression_min_bytes``, responses that
+    already have a ``Content-Encoding`` and responses sent in more than one
+    body message are passed through. Successful GET responses go through
+    ``cache`` unless they are marked ``Cache-Control: no-store``.
+    """
+
+    def __init__(self, app, cache: CompressedBodyCache | None = None):
+        self.app = app
+        self.cache = (
+            cache
+            if cache is not None
+            else CompressedBodyCache(settings.compression_cache_bytes)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        cacheable_request = scope["method"] == "GET"
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if not content_type.startswith(
+                    COMPRESSIBLE_TYPES
+                ) or content_type.startswith(STREAMED_TYPES):
+                    await send(message)
+                    return
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                if encoding is None or "content-encoding" in headers:
+                    await send(message)
+                    return
+                # Held until the body shows whether it is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                await send(held)
+                await send(message)
+                return
+            if len(body) >= settings.compression_min_bytes:
+                headers = MutableHeaders(scope=held)
+                if (
+                    cacheable_request
+                    and held["status"] == 200
+                    and "no-store" not in headers.get("cache-control", "")
+                ):
+                    compressed = self.cache.compress(encoding, body)
+                else:
+                    compressed = ENCODINGS[encoding](body)
+                if len(compressed) < len(body):
+                    COMPRESSION_INPUT_BYTES.labels(encoding).inc(len(body))
+                    COMPRESSION_OUTPUT_BYTES.labels(encoding).inc(len(compressed))
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(compressed))
+                    body = compressed
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
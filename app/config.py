@@ -9,10 +9,81 @@ class Settings(BaseSettings):
     postgres_password: Optional[str] = None
     postgres_db: Optional[str] = None
 
+    # Comma-separated read replica URLs; reads use the primary when empty
+    database_replica_urls: str = ""
+    # How reads pick a replica: "round_robin" or "least_busy"
+    database_replica_strategy: str = "round_robin"
+    # Seconds reads stay on the primary after a write, to cover replica lag
+    read_your_writes_seconds: float = 5.0
+    # Executions of a statement on one connection before psycopg prepares it
+    # server-side; 0 prepares immediately, None disables (e.g. for pgbouncer
+    # in transaction mode)
+    database_prepare_threshold: Optional[int] = 5
+    # SQLite only (DATABASE_URL=sqlite:///path/to/file.db): milliseconds a
+    # connection waits for another's write lock, and page cache size in KiB
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+
+    # Directory for league snapshots rewritten after every import; empty
+    # disables snapshots
+    snapshot_dir: str = ""
+    # Directory of prerendered JSON pages, rendered again for every imported
+    # league; empty disables prerendering after imports
+    prerender_dir: str = ""
+
+    # Seconds before the in-process search trie is rebuilt to pick up names
+    # changed by other processes
+    search_index_ttl_seconds: float = 300.0
+    # Seconds before a league's in-process score index is rebuilt to pick up
+    # games imported by other processes
+    score_index_ttl_seconds: float = 300.0
+
+    # Live scores (/leagues/{id}/live): seconds between ESPN polls per league,
+    # seconds between keepalives, events a client may fall behind before it
+    # is sent a snapshot instead, and the season polled (default: the season
+    # in progress)
+    live_poll_seconds: float = 15.0
+    live_keepalive_seconds: float = 15.0
+    live_queue_size: int = 32
+    live_season: Optional[int] = None
+
+    # Responses smaller than this many bytes are sent uncompressed, and the
+    # cache of compressed bodies holds at most this many bytes (0 disables it)
+    compression_min_bytes: int = 1024
+    compression_cache_bytes: int = 32 * 1024 * 1024
+
+    # Secret that admins send in X-Profile-Token (or ?profile=) to get a
+    # request's profile instead of its response; empty disables profiling.
+    # Stacks are sampled every profile_interval_seconds.
+    profile_token: str = ""
+    profile_interval_seconds: float = 0.005
+
+    # Statements taking at least this many seconds are kept, newest
+    # slow_query_log_size of them, for /admin/slow-queries (0 disables). This
+    # fraction of the slow SELECTs is explained again on its own connection,
+    # with EXPLAIN ANALYZE bounded by a statement timeout on PostgreSQL.
+    slow_query_seconds: float = 0.5
+    slow_query_log_size: int = 200
+    slow_query_explain_rate: float = 0.1
+    slow_query_explain_timeout_seconds: float = 30.0
+    # Secret that admin endpoints require in X-Admin-Token; empty disables them
+    admin_token: str = ""
+
+    # Report per-request statement counts in response headers
+    debug_query_count: bool = False
+    # Repeats of one statement that are flagged as a likely N+1
+    query_repeat_threshold: int = 3
+
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=False,
     )
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [
+            url.strip() for url in self.database_replica_urls.split(",") if url.strip()
+        ]
+
 
 settings = Settings()
@@ -1,22 +1,276 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import itertools
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Delete, Insert, Update, create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
 from app.config import settings
+from app.instrumentation import InstrumentedQueuePool, instrument_engine
+from app.trigram import install_on_create
+
+# Threads that keep their own SQLite connection; matches the worker threads
+# FastAPI runs sync endpoints on
+SQLITE_POOL_SIZE = 40
+
+
+class ThreadSQLitePool(SingletonThreadPool):
+    """SingletonThreadPool that first evicts connections of finished threads.
+
+    Once ``pool_size`` threads have connected, SingletonThreadPool closes
+    arbitrary connections, including ones another thread is still using.
+    Every event loop has its own worker threads, so long-lived processes and
+    test runs go through many more threads than are alive at once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._threads: dict = {}
+        self._threads_lock = threading.Lock()
+
+    def _do_get(self):
+        record = super()._do_get()
+        with self._threads_lock:
+            self._threads[record] = threading.current_thread()
+        return record
+
+    def _cleanup(self) -> None:
+        with self._threads_lock:
+            for record, thread in list(self._threads.items()):
+                if record not in self._all_conns:
+                    del self._threads[record]
+                elif not thread.is_alive():
+                    del self._threads[record]
+                    self._all_conns.discard(record)
+                    record.close()
+        if len(self._all_conns) >= self.size:
+            super()._cleanup()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the single writer; NORMAL sync is
+    # durable across application crashes and only fsyncs on checkpoint
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str) -> Engine:
+    """An engine on a SQLite file, with one connection per thread.
+
+    An in-memory database exists only on the connection that created it,
+    so it gets a single connection shared by every thread instead.
+    """
+    if make_url(url).database in (None, "", ":memory:"):
+        pool_args: dict = {"poolclass": StaticPool}
+    else:
+        pool_args = {"poolclass": ThreadSQLitePool, "pool_size": SQLITE_POOL_SIZE}
+    new_engine = create_engine(
+        url,
+        # Sessions may be opened and closed on different worker threads
+        connect_args={"check_same_thread": False},
+        echo=False,
+        **pool_args,
+    )
+    event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+def _create_engine(url: str, name: str) -> Engine:
+    if url.startswith("sqlite"):
+        new_engine = create_sqlite_engine(url)
+    else:
+        # Replace postgresql:// with postgresql+psycopg:// for psycopg3
+        new_engine = create_engine(
+            url.replace("postgresql://", "postgresql+psycopg://"),
+            connect_args={"prepare_threshold": settings.database_prepare_threshold},
+            poolclass=InstrumentedQueuePool,
+            pool_pre_ping=True,
+            echo=False,  # Set to True for SQL query logging
+        )
+    instrument_engine(new_engine, name)
+    return new_engine
+
+
+class ReplicaPool:
+    """Read replicas, handed out round-robin or to the least busy one.
+
+    The pool also remembers when the primary was last written to, so reads
+    can stay on the primary until the replicas have had time to catch up.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        strategy: str = "round_robin",
+        read_your_writes_seconds: float = 0.0,
+    ):
+        if strategy not in ("round_robin", "least_busy"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._cycle = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+        self._primary_until = 0.0
+        # Connections checked out per engine; counted here because only
+        # QueuePool reports it, and SQLite replicas use other pools
+        self._in_use = dict.fromkeys(self.engines, 0)
+        for replica in self.engines:
+            event.listen(replica, "checkout", self._counter(replica, 1))
+            event.listen(replica, "checkin", self._counter(replica, -1))
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Engine:
+        """Pick the replica for the next read."""
+        if self.strategy == "least_busy":
+            return min(self.engines, key=self._in_use.__getitem__)
+        with self._lock:
+            return next(self._cycle)
+
+    def _counter(self, replica: Engine, step: int):
+        def count(*args) -> None:
+            with self._lock:
+                self._in_use[replica] += step
+
+        return count
+
+    def mark_write(self, seconds: float | None = None) -> None:
+        """Send reads to the primary for the next ``seconds``.
+
+        Args:
+            seconds: Length of the read-your-writes window. Defaults to
+                ``read_your_writes_seconds``.
+        """
+        if seconds is None:
+            seconds = self.read_your_writes_seconds
+        until = time.monotonic() + seconds
+        with self._lock:
+            self._primary_until = max(self._primary_until, until)
+
+    @property
+    def recently_written(self) -> bool:
+        return time.monotonic() < self._primary_until
+
+
+# Set by reads_on_primary for the block and the tasks and threads it starts
+_reads_on_primary: ContextVar[bool] = ContextVar("reads_on_primary", default=False)
+
+
+class RoutingSession(Session):
+    """Session that reads from replicas and writes to the primary.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    Other statements go to a replica unless no replicas are configured, the
+    primary was written to within the read-your-writes window, the session
+    has been pinned with ``use_primary``, or the statement runs within
+    ``reads_on_primary``. Once a session has flushed it stays on the
+    primary, so it sees its own writes.
+    """
 
-# Create database engine
-# Replace postgresql:// with postgresql+psycopg:// for psycopg3
-database_url = settings.database_url.replace("postgresql://", "postgresql+psycopg://")
-engine = create_engine(
-    database_url,
-    pool_pre_ping=True,
-    echo=False,  # Set to True for SQL query logging
+    def __init__(self, *, primary: Engine, replicas: ReplicaPool, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if (
+            not self.replicas
+            or self._flushing
+            or self.info.get("use_primary")
+            or _reads_on_primary.get()
+            or self.info.get("flushed")
+            or isinstance(clause, Insert | Update | Delete)
+            or self.replicas.recently_written
+        ):
+            return self.primary
+        return self.replicas.choose()
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session, flush_context):
+    session.info["flushed"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_read_your_writes(session):
+    if session.info.get("flushed"):
+        session.replicas.mark_write()
+
+
+@contextmanager
+def use_primary(session: Session) -> Iterator[Session]:
+    """Send every statement in the block to the primary."""
+    previous = session.info.get("use_primary", False)
+    session.info["use_primary"] = True
+    try:
+        yield session
+    finally:
+        session.info["use_primary"] = previous
+
+
+@contextmanager
+def reads_on_primary() -> Iterator[None]:
+    """Send every routing session's statements in the block to the primary.
+
+    Unlike ``use_primary``, this also covers sessions the block opens, on
+    this thread or on worker threads and tasks that copy its context.
+    """
+    token = _reads_on_primary.set(True)
+    try:
+        yield
+    finally:
+        _reads_on_primary.reset(token)
+
+
+# Create database engines
+engine = _create_engine(settings.database_url, "primary")
+replicas = ReplicaPool(
+    [_create_engine(url, f"replica{i}") for i, url in enumerate(settings.replica_urls)],
+    strategy=settings.database_replica_strategy,
+    read_your_writes_seconds=settings.read_your_writes_seconds,
 )
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    primary=engine,
+    replicas=replicas,
+)
+
+
+# Writes through the primary session (e.g. an import run in this process)
+# also open the read-your-writes window
+@event.listens_for(SessionLocal, "after_flush")
+def _note_primary_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _start_read_your_writes_after_write(session):
+    if session.info.pop("wrote", False):
+        replicas.mark_write()
+
 
 # Base class for models
 Base = declarative_base()
+# Trigram name indexes need pg_trgm, where the server has it
+install_on_create(Base.metadata)
 
 
 def get_db():
@@ -26,3 +280,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency for read-only endpoints, served from replicas when configured"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def in_read_session(function, *args):
+    """Call ``function(db, *args)`` with a read session of its own.
+
+    For work that can outlive the request that started it, such as a
+    coalesced computation: FastAPI closes the request's session when the
+    request ends or is cancelled.
+    """
+    with ReadSessionLocal() as db:
+        return function(db, *args)
@@ -0,0 +1,172 @@
+"""Request, SQL and connection-pool instrumentation reporting to REGISTRY."""
+
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.metrics import REGISTRY
+from app.slow_queries import SKIP_OPTION, SLOW_QUERY_LOG
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    "http_responses",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by operation",
+    ["operation"],
+)
+DB_QUERY_ROWS = REGISTRY.histogram(
+    "db_query_rows",
+    "Rows returned or affected per SQL statement",
+    ["operation"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+DB_SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries",
+    "SQL statements slower than the slow-query threshold, by operation",
+    ["operation"],
+)
+DB_POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+)
+DB_POOL_CONNECTIONS = REGISTRY.gauge(
+    "db_pool_connections",
+    "Pooled connections by state",
+    ["engine", "state"],
+)
+
+_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
+# ASGI scope of the request being served, to attribute statements to routes
+_current_scope: ContextVar[dict | None] = ContextVar("http_scope", default=None)
+
+
+def current_route() -> str | None:
+    """Method and route template of the request being served, if any."""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    return f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    verb = words[0].upper() if words else ""
+    return verb if verb in _OPERATIONS else "OTHER"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits."""
+
+    _instrumentation_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self._instrumentation_name).observe(
+                time.perf_counter() - start
+            )
+
+
+# The start time lives on the statement's execution context rather than the
+# connection, so a statement that raises leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start_time", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    operation = _operation(statement)
+    DB_QUERY_DURATION.labels(operation).observe(elapsed)
+    if cursor.rowcount >= 0:
+        DB_QUERY_ROWS.labels(operation).observe(cursor.rowcount)
+    if 0 < settings.slow_query_seconds <= elapsed:
+        # The slow-query log's own EXPLAINs and internal locks are not logged
+        if getattr(context, "execution_options", {}).get(SKIP_OPTION):
+            return
+        DB_SLOW_QUERIES.labels(operation).inc()
+        SLOW_QUERY_LOG.record(
+            conn.engine, statement, parameters, elapsed, current_route(), executemany
+        )
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """Report query timings and pool usage for ``engine``.
+
+    Args:
+        engine: Engine to instrument
+        name: Label identifying the engine in pool metrics
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool._instrumentation_name = name
+    if isinstance(pool, QueuePool):
+        DB_POOL_CONNECTIONS.set_function(pool.size, name, "size")
+        DB_POOL_CONNECTIONS.set_function(pool.checkedout, name, "checked_out")
+        DB_POOL_CONNECTIONS.set_function(pool.checkedin, name, "checked_in")
+        DB_POOL_CONNECTIONS.set_function(pool.overflow, name, "overflow")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and in-flight requests.
+
+    Routes are labelled by their template (``/leagues/{league_id}/seasons``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        token = _current_scope.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_scope.reset(token)
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_RESPONSES.labels(method, route, status).inc()
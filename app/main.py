@@ -1,15 +1,32 @@
-from fastapi import Depends, FastAPI
+import hmac
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from app.database import Base, engine, get_db
-
-# Import models to ensure they're registered
-from app.models import (
-    Franchise,
-    League,
-    Season,
+from app.compression import CompressionMiddleware
+from app.config import settings
+from app.database import Base, engine, get_read_db, in_read_session
+from app.instrumentation import MetricsMiddleware
+from app.metrics import REGISTRY
+from app.profiling import ProfilingMiddleware
+from app.query_tracking import QueryCountMiddleware
+from app.services.games import load_game, load_season_games
+from app.services.league_overview import load_league_overview
+from app.services.live_scores import LIVE_SCORES
+from app.services.manager_careers import (
+    LEADERBOARD_SORTS,
+    load_manager_career,
+    load_manager_leaderboard,
 )
+from app.services.search import MAX_RESULTS, search
+from app.services.standings import load_standings, load_standings_timeline
+from app.services.streaks import load_streak_records, load_streaks
+from app.single_flight import SINGLE_FLIGHT
+from app.slow_queries import SLOW_QUERY_LOG, summarize
+from app.statements import STATEMENTS  # also registers the models
 
 
 def init_db():
@@ -32,6 +49,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside query counting, compression and metrics, so a profile covers the
+# endpoint rather than them
+app.add_middleware(ProfilingMiddleware)  # type: ignore[arg-type]
+
+app.add_middleware(QueryCountMiddleware)  # type: ignore[arg-type]
+
+app.add_middleware(CompressionMiddleware)  # type: ignore[arg-type]
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)  # type: ignore[arg-type]
+
 
 @app.get("/")
 async def root():
@@ -43,10 +71,40 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """Reject requests without the admin token; every one if none is set."""
+    if not (
+        settings.admin_token
+        and x_admin_token is not None
+        and hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode())
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def get_slow_queries(response: Response, limit: int = Query(50, ge=1, le=1000)):
+    """Recent slow statements, and every logged statement by total time"""
+    records = SLOW_QUERY_LOG.records()
+    response.headers["Cache-Control"] = "no-store"
+    return {
+        "threshold_seconds": settings.slow_query_seconds,
+        "queries": [record.to_dict() for record in records[:limit]],
+        "statements": summarize(records),
+    }
+
+
 @app.get("/leagues")
-async def get_leagues(db: Session = Depends(get_db)):
+async def get_leagues(db: Session = Depends(get_read_db)):
     """Get all leagues"""
-    leagues = db.query(League).all()
+    leagues = STATEMENTS.scalars(db, "leagues")
     return [
         {
             "id": league.id,
@@ -58,9 +116,11 @@ async def get_leagues(db: Session = Depends(get_db)):
 
 
 @app.get("/leagues/{league_id}/franchises")
-async def get_franchises(league_id: int, db: Session = Depends(get_db)):
+async def get_franchises(league_id: int, db: Session = Depends(get_read_db)):
     """Get all franchises for a league"""
-    franchises = db.query(Franchise).filter(Franchise.league_id == league_id).all()
+    franchises = STATEMENTS.scalars(
+        db, "franchises_by_league", {"league_id": league_id}
+    )
     return [
         {
             "id": franchise.id,
@@ -72,9 +132,9 @@ async def get_franchises(league_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/leagues/{league_id}/seasons")
-async def get_seasons(league_id: int, db: Session = Depends(get_db)):
+async def get_seasons(league_id: int, db: Session = Depends(get_read_db)):
     """Get all seasons for a league"""
-    seasons = db.query(Season).filter(Season.league_id == league_id).all()
+    seasons = STATEMENTS.scalars(db, "seasons_by_league", {"league_id": league_id})
     return [
         {
             "id": season.id,
@@ -85,3 +145,190 @@ async def get_seasons(league_id: int, db: Session = Depends(get_db)):
         }
         for season in seasons
     ]
+
+
+@app.get("/leagues/{league_id}/overview")
+async def get_league_overview(league_id: int):
+    """Get a league with its seasons, champions, franchises and managers"""
+    overview = await SINGLE_FLIGHT.run(
+        "league_overview", league_id, in_read_session, load_league_overview, league_id
+    )
+    if overview is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    return overview
+
+
+@app.get("/leagues/{league_id}/live")
+async def get_live_scores(league_id: int):
+    """Stream the live scores of an ESPN league as server-sent events
+
+    The first event is a snapshot of the current matchups; after that, each
+    event holds only the matchups whose scores changed.
+    """
+    subscription = LIVE_SCORES.subscribe(league_id)
+    return StreamingResponse(
+        subscription.events(settings.live_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Unsubscribes even if the client leaves before the stream starts
+        background=BackgroundTask(subscription.close),
+    )
+
+
+@app.get("/seasons/{season_id}/games")
+async def get_season_games(
+    season_id: int,
+    week: int | None = Query(None, ge=1),
+):
+    """Get a season's games, or one week's, with all-time score percentiles"""
+    games = await SINGLE_FLIGHT.run(
+        "season_games",
+        (season_id, week),
+        in_read_session,
+        load_season_games,
+        season_id,
+        week,
+    )
+    if games is None:
+        raise HTTPException(status_code=404, detail="Season not found")
+    return games
+
+
+@app.get("/games/{game_id}")
+async def get_game(game_id: int):
+    """Get a game and its lineups with all-time score percentiles"""
+    game = await SINGLE_FLIGHT.run("game", game_id, in_read_session, load_game, game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game
+
+
+@app.get("/seasons/{season_id}/standings")
+async def get_standings(
+    season_id: int,
+    week: int | None = Query(None, ge=1),
+):
+    """Get a season's standings as of a week, or as of its latest week"""
+    standings = await SINGLE_FLIGHT.run(
+        "standings", (season_id, week), in_read_session, load_standings, season_id, week
+    )
+    if standings is None:
+        raise HTTPException(status_code=404, detail="Season not found")
+    return standings
+
+
+@app.get("/seasons/{season_id}/standings/timeline")
+async def get_standings_timeline(season_id: int):
+    """Get every franchise's rank, record and points after each week of a season"""
+    timeline = await SINGLE_FLIGHT.run(
+        "standings_timeline",
+        season_id,
+        in_read_session,
+        load_standings_timeline,
+        season_id,
+    )
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Season not found")
+    return timeline
+
+
+@app.get("/managers")
+async def get_managers(
+    sort: str = "championships",
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Get the manager career leaderboard"""
+    if sort not in LEADERBOARD_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort must be one of {', '.join(LEADERBOARD_SORTS)}",
+        )
+    return await SINGLE_FLIGHT.run(
+        "manager_leaderboard",
+        (sort, limit),
+        in_read_session,
+        load_manager_leaderboard,
+        sort,
+        limit,
+    )
+
+
+@app.get("/managers/{manager_id}/career")
+async def get_manager_career(manager_id: int):
+    """Get a manager's career record, titles, earnings and head-to-head records"""
+    career = await SINGLE_FLIGHT.run(
+        "manager_career", manager_id, in_read_session, load_manager_career, manager_id
+    )
+    if career is None:
+        raise HTTPException(status_code=404, detail="Manager not found")
+    return career
+
+
+@app.get("/streaks")
+async def get_streak_records(
+    scope: str = "franchise",
+    kind: str = "win",
+    span: str = "career",
+    active: bool = False,
+    limit: int = Query(25, ge=1, le=500),
+):
+    """Get the longest win or loss streaks of franchises or managers"""
+    try:
+        return await SINGLE_FLIGHT.run(
+            "streak_records",
+            (scope, kind, span, active, limit),
+            in_read_session,
+            load_streak_records,
+            scope,
+            kind,
+            span,
+            active,
+            limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@app.get("/franchises/{franchise_id}/streaks")
+async def get_franchise_streaks(franchise_id: int):
+    """Get a franchise's current streak and longest win and loss streaks"""
+    streaks = await SINGLE_FLIGHT.run(
+        "franchise_streaks",
+        franchise_id,
+        in_read_session,
+        load_streaks,
+        "franchise",
+        franchise_id,
+    )
+    if streaks is None:
+        raise HTTPException(status_code=404, detail="Franchise not found")
+    return streaks
+
+
+@app.get("/managers/{manager_id}/streaks")
+async def get_manager_streaks(manager_id: int):
+    """Get a manager's current streak and longest win and loss streaks"""
+    streaks = await SINGLE_FLIGHT.run(
+        "manager_streaks",
+        manager_id,
+        in_read_session,
+        load_streaks,
+        "manager",
+        manager_id,
+    )
+    if streaks is None:
+        raise HTTPException(status_code=404, detail="Manager not found")
+    return streaks
+
+
+@app.get("/search")
+def search_names(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_read_db),
+):
+    """Autocomplete players, managers and franchises by name"""
+    return {
+        "query": q,
+        "results": [result.to_dict() for result in search(db, q, limit)],
+    }
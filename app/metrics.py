@@ -0,0 +1,272 @@
+"""In-process metrics registry rendered in Prometheus text format.
+
+A deliberately small subset of the Prometheus client model: counters, gauges
+and histograms with optional labels, all living in one ``REGISTRY`` that the
+``/metrics`` endpoint renders. Recording a sample is a dict lookup plus a
+locked add, so it is cheap enough for the request and query hot paths.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        """Return the child for one combination of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> Iterator[tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {_format_value(value)}"
+            for suffix, labels, value in self._samples()
+        )
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield "_total", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed when scraped."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        super().__init__(name, documentation, labelnames)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float], *values: object) -> None:
+        """Compute the value for these labels each time metrics are scraped."""
+        self._functions[tuple(str(value) for value in values)] = function
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, key), child.value
+        for key, function in list(self._functions.items()):
+            yield "", _format_labels(self.labelnames, key), function()
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        bucket_names = (*self.labelnames, "le")
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, count, total = list(child.counts), child.count, child.sum
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts, strict=True):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, (*key, _format_value(bound)))
+                yield "_bucket", labels, cumulative
+            yield "_bucket", _format_labels(bucket_names, (*key, "+Inf")), count
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    """Collection of named metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register[MetricT: _Metric](self, metric: MetricT) -> MetricT:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Re-registering (e.g. on module reload) returns the original
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered")
+                return existing  # type: ignore[return-value]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
@@ -1,19 +1,28 @@
 from app.models.franchise import Franchise
 from app.models.franchise_season import FranchiseSeason
 from app.models.game import Game
+from app.models.import_checkpoint import ImportCheckpoint
 from app.models.league import League
 from app.models.lineup import Lineup
 from app.models.manager import Manager
+from app.models.manager_career import ManagerCareer, ManagerOpponentRecord
 from app.models.player import Player
 from app.models.season import Season
+from app.models.streak import Streak
+from app.models.week_standing import WeekStanding
 
 __all__ = [
     "Franchise",
     "FranchiseSeason",
     "Game",
+    "ImportCheckpoint",
     "League",
     "Lineup",
     "Manager",
+    "ManagerCareer",
+    "ManagerOpponentRecord",
     "Player",
     "Season",
+    "Streak",
+    "WeekStanding",
 ]
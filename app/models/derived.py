@@ -0,0 +1,167 @@
+"""Refreshing tables derived from games and franchise seasons on commit.
+
+Career totals, streaks and week-by-week standings are aggregates of
+``game`` and ``franchise_season``. Each derived table registers a refresh
+function with ``refresh_on_commit``. After every flush, the rows touched by
+new, changed or deleted games and franchise seasons are collected, with
+their values both before and after the change, into the session's
+``DerivedChanges``. Just before the session commits, every registered
+refresh recomputes the affected rows in the same transaction, so readers
+never see aggregates that disagree with the underlying rows. Only what
+changed is recomputed. A rollback discards the collected changes.
+
+Managers play in many leagues, so transactions importing different leagues
+can refresh the same manager's rows. On PostgreSQL each transaction first
+takes a transaction-level advisory lock per affected manager, in ID order,
+so those refreshes run one after the other instead of both inserting the
+rows the other is about to insert.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy import and_, event, inspect, or_, select, text, tuple_, union
+from sqlalchemy.orm import Session
+
+from app.models.franchise_season import FranchiseSeason
+from app.models.game import Game
+from app.slow_queries import SKIP_OPTION
+
+_INFO_KEY = "derived_changes"
+# High 32 bits of the advisory lock keys taken while refreshing a manager's
+# rows, so they cannot collide with locks taken for anything else
+MANAGER_LOCK_NAMESPACE = 0x4D47
+
+
+@dataclass
+class DerivedChanges:
+    """What the flushed games and franchise seasons touched."""
+
+    # Seasons of changed games
+    season_ids: set[int] = field(default_factory=set)
+    # (season_id, franchise_id) of changed franchise seasons and game sides
+    franchise_seasons: set[tuple[int, int]] = field(default_factory=set)
+    # Managers a changed franchise season had or now has
+    manager_ids: set[int] = field(default_factory=set)
+
+    @property
+    def franchise_ids(self) -> set[int]:
+        return {franchise_id for _, franchise_id in self.franchise_seasons}
+
+    def managers(self, session: Session, opponents: bool = False) -> set[int]:
+        """Managers of the changed franchise seasons.
+
+        Args:
+            session: Session to look the managers up in
+            opponents: Also include the managers who played those franchise
+                seasons
+        """
+        manager_ids = set(self.manager_ids)
+        if not self.franchise_seasons:
+            return manager_ids
+        pairs = sorted(self.franchise_seasons)
+        fs = FranchiseSeason
+        statement = select(fs.manager_id).where(
+            tuple_(fs.season_id, fs.franchise_id).in_(pairs)
+        )
+        if opponents:
+            played = or_(
+                tuple_(Game.season_id, Game.franchise1_id).in_(pairs),
+                tuple_(Game.season_id, Game.franchise2_id).in_(pairs),
+            )
+            statement = union(
+                statement,
+                select(fs.manager_id)
+                .join(
+                    Game,
+                    and_(
+                        Game.season_id == fs.season_id,
+                        or_(
+                            Game.franchise1_id == fs.franchise_id,
+                            Game.franchise2_id == fs.franchise_id,
+                        ),
+                    ),
+                )
+                .where(played),
+            )
+        manager_ids.update(
+            manager_id
+            for manager_id in session.execute(statement).scalars()
+            if manager_id is not None
+        )
+        return manager_ids
+
+
+_refreshes: list[Callable[[Session, DerivedChanges], None]] = []
+
+
+def refresh_on_commit(
+    refresh: Callable[[Session, DerivedChanges], None],
+) -> Callable[[Session, DerivedChanges], None]:
+    """Run ``refresh`` before each commit that changed games or seasons."""
+    _refreshes.append(refresh)
+    return refresh
+
+
+def _lock_managers(session: Session, changes: DerivedChanges) -> None:
+    """Wait for other transactions refreshing the same managers to finish."""
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+    # In ID order, so two transactions cannot each wait on the other
+    for manager_id in sorted(changes.managers(session, opponents=True)):
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": (MANAGER_LOCK_NAMESPACE << 32) | (manager_id & 0xFFFFFFFF)},
+            execution_options={SKIP_OPTION: True},
+        )
+
+
+def _history_values(obj, attribute: str) -> list:
+    history = inspect(obj).attrs[attribute].history
+    return [
+        value
+        for value in (*history.unchanged, *history.added, *history.deleted)
+        if value is not None
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_derived_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, FranchiseSeason):
+            franchise_attrs = ["franchise_id"]
+        elif isinstance(obj, Game):
+            franchise_attrs = ["franchise1_id", "franchise2_id"]
+        else:
+            continue
+        changes = session.info.setdefault(_INFO_KEY, DerivedChanges())
+        season_ids = _history_values(obj, "season_id")
+        if isinstance(obj, FranchiseSeason):
+            changes.manager_ids.update(_history_values(obj, "manager_id"))
+        else:
+            changes.season_ids.update(season_ids)
+        for franchise_attr in franchise_attrs:
+            for franchise_id in _history_values(obj, franchise_attr):
+                changes.franchise_seasons.update(
+                    (season_id, franchise_id) for season_id in season_ids
+                )
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_derived_tables(session):
+    # Flush first so the listener above collects every pending change
+    session.flush()
+    changes = session.info.pop(_INFO_KEY, None)
+    if changes is None:
+        return
+    _lock_managers(session, changes)
+    for refresh in _refreshes:
+        refresh(session, changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_derived_changes(session):
+    session.info.pop(_INFO_KEY, None)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
+from app.trigram import trigram_index
 
 
 class Franchise(Base):
@@ -10,6 +11,17 @@ class Franchise(Base):
     id = Column(Integer, primary_key=True, index=True)
     league_id = Column(Integer, ForeignKey("league.id"), nullable=False)
     name = Column(String, nullable=False)
+    # ESPN team ID, stable across abbreviation changes but only unique
+    # within a league
+    espn_team_id = Column(Integer, nullable=True)
 
     # Relationships
     league = relationship("League", backref="franchises")
+
+    __table_args__ = (
+        Index(
+            "ix_franchise_league_espn_team", "league_id", "espn_team_id", unique=True
+        ),
+        # Substring and fuzzy search (see app.services.search)
+        trigram_index("ix_franchise_name_trgm", "name"),
+    )
@@ -1,4 +1,12 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -35,6 +43,9 @@ class FranchiseSeason(Base):
     won_draft_lottery = Column(Boolean, default=False, nullable=False)
     lost_beer_mile = Column(Boolean, default=False, nullable=False)
 
+    # Hash of the imported values, so unchanged rows are skipped on re-import
+    source_hash = Column(BigInteger, nullable=True)
+
     # Relationships
     franchise = relationship("Franchise", backref="franchise_seasons")
     season = relationship("Season", backref="franchise_seasons")
@@ -1,14 +1,28 @@
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from typing import Any, ClassVar
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    event,
+)
+from sqlalchemy.orm import backref, relationship
 
 from app.database import Base
+from app.partitioning import default_partition_ddl
 
 
 class Game(Base):
     __tablename__ = "game"
 
-    id = Column(Integer, primary_key=True, index=True)
-    season_id = Column(Integer, ForeignKey("season.id"), nullable=False)
+    # On PostgreSQL the table is LIST-partitioned by season (see
+    # app.partitioning), so season_id is part of the table's primary key
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    season_id = Column(Integer, ForeignKey("season.id"), primary_key=True)
     week = Column(Integer, nullable=False)
     game_type = Column(
         String, nullable=False
@@ -18,12 +32,22 @@ class Game(Base):
     franchise1_score = Column(Float, nullable=True)
     franchise2_score = Column(Float, nullable=True)
     game_date = Column(Date, nullable=True)
+    # Hash of the imported values, so unchanged rows are skipped on re-import
+    source_hash = Column(BigInteger, nullable=True)
 
     # Relationships
-    season = relationship("Season", backref="games")
+    # Games are removed with their season's partitions, not one by one
+    season = relationship("Season", backref=backref("games", passive_deletes=True))
     franchise1 = relationship(
         "Franchise", foreign_keys=[franchise1_id], backref="games_as_franchise1"
     )
     franchise2 = relationship(
         "Franchise", foreign_keys=[franchise2_id], backref="games_as_franchise2"
     )
+
+    __table_args__ = ({"postgresql_partition_by": "LIST (season_id)"},)
+    # id alone still identifies a game, e.g. for session.get(Game, id)
+    __mapper_args__: ClassVar[dict[str, Any]] = {"primary_key": [id]}
+
+
+event.listen(Game.__table__, "after_create", default_partition_ddl("game"))
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, UniqueConstraint
+
+from app.database import Base
+
+
+class ImportCheckpoint(Base):
+    """A season of an ESPN league whose chunked import has been committed."""
+
+    __tablename__ = "import_checkpoint"
+
+    id = Column(Integer, primary_key=True, index=True)
+    espn_league_id = Column(Integer, nullable=False, index=True)
+    season_year = Column(Integer, nullable=False)
+    # Deleting the season (e.g. to re-import it) invalidates the checkpoint
+    season_id = Column(
+        Integer, ForeignKey("season.id", ondelete="CASCADE"), nullable=True
+    )
+    completed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "espn_league_id", "season_year", name="unique_import_checkpoint"
+        ),
+    )
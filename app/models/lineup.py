@@ -1,14 +1,30 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, UniqueConstraint
-from sqlalchemy.orm import relationship
+from typing import Any, ClassVar
+
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Integer,
+    String,
+    UniqueConstraint,
+    event,
+)
+from sqlalchemy.orm import Session, relationship
 
 from app.database import Base
+from app.models.game import Game
+from app.partitioning import default_partition_ddl
 
 
 class Lineup(Base):
     __tablename__ = "lineup"
 
-    id = Column(Integer, primary_key=True, index=True)
-    game_id = Column(Integer, ForeignKey("game.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    # Denormalized from the game so lineup can be partitioned by season; set
+    # automatically on flush when left empty
+    season_id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, nullable=False)
     franchise_id = Column(Integer, ForeignKey("franchise.id"), nullable=False)
     player_id = Column(Integer, ForeignKey("player.id"), nullable=False)
     score = Column(Float, nullable=True)
@@ -21,9 +37,29 @@ class Lineup(Base):
     franchise = relationship("Franchise", backref="lineups")
     player = relationship("Player", backref="lineups")
 
-    # Ensure unique player per game per franchise
     __table_args__ = (
+        ForeignKeyConstraint(["game_id", "season_id"], ["game.id", "game.season_id"]),
+        # Ensure unique player per game per franchise
         UniqueConstraint(
-            "game_id", "franchise_id", "player_id", name="unique_game_franchise_player"
+            "game_id",
+            "franchise_id",
+            "player_id",
+            "season_id",
+            name="unique_game_franchise_player",
         ),
+        {"postgresql_partition_by": "LIST (season_id)"},
     )
+    __mapper_args__: ClassVar[dict[str, Any]] = {"primary_key": [id]}
+
+
+event.listen(Lineup.__table__, "after_create", default_partition_ddl("lineup"))
+
+
+@event.listens_for(Session, "before_flush")
+def _fill_lineup_season(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, Lineup) and obj.season_id is None:
+            with session.no_autoflush:
+                game = obj.game or session.get(Game, obj.game_id)
+            if game is not None:
+                obj.season_id = game.season_id
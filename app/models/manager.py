@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String
 
 from app.database import Base
+from app.trigram import trigram_index
 
 
 class Manager(Base):
@@ -8,3 +9,8 @@ class Manager(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
+    # ESPN member ID ("{GUID}"), stable across display name changes
+    espn_member_id = Column(String, nullable=True, unique=True, index=True)
+
+    # Substring and fuzzy search (see app.services.search)
+    __table_args__ = (trigram_index("ix_manager_name_trgm", "name"),)
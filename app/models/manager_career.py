@@ -0,0 +1,213 @@
+"""Per-manager career totals, kept up to date as seasons and games change.
+
+``manager_career`` holds one row of career totals per manager and
+``manager_opponent_record`` one head-to-head row per manager and opponent.
+Both are derived from ``franchise_season`` and ``game`` and refreshed on
+commit for the managers whose seasons or games changed, and their
+opponents; ``rebuild_manager_careers`` recomputes all.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session, relationship
+
+from app.database import Base
+from app.models.derived import DerivedChanges, refresh_on_commit
+from app.models.franchise_season import FranchiseSeason
+from app.models.game import Game
+from app.models.season import Season
+
+
+class ManagerCareer(Base):
+    __tablename__ = "manager_career"
+
+    manager_id = Column(Integer, ForeignKey("manager.id"), primary_key=True)
+    seasons = Column(Integer, default=0, nullable=False)
+    franchises = Column(Integer, default=0, nullable=False)
+    first_year = Column(Integer, nullable=True)
+    last_year = Column(Integer, nullable=True)
+
+    regular_wins = Column(Integer, default=0, nullable=False)
+    regular_losses = Column(Integer, default=0, nullable=False)
+    # Winners bracket only
+    playoff_wins = Column(Integer, default=0, nullable=False)
+    playoff_losses = Column(Integer, default=0, nullable=False)
+    points_for = Column(Float, default=0.0, nullable=False)
+    points_against = Column(Float, default=0.0, nullable=False)
+
+    championships = Column(Integer, default=0, nullable=False, index=True)
+    best_finish = Column(Integer, nullable=True)
+    earnings = Column(Float, default=0.0, nullable=False)
+
+    # Relationships
+    manager = relationship("Manager", backref="career", uselist=False)
+
+
+class ManagerOpponentRecord(Base):
+    __tablename__ = "manager_opponent_record"
+
+    manager_id = Column(Integer, ForeignKey("manager.id"), primary_key=True)
+    opponent_id = Column(Integer, ForeignKey("manager.id"), primary_key=True)
+    games = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    ties = Column(Integer, default=0, nullable=False)
+    points_for = Column(Float, default=0.0, nullable=False)
+    points_against = Column(Float, default=0.0, nullable=False)
+
+    # Relationships
+    opponent = relationship("Manager", foreign_keys=[opponent_id])
+
+
+def _career_select(manager_ids: Iterable[int] | None):
+    fs = FranchiseSeason
+    statement = (
+        select(
+            fs.manager_id,
+            func.count(fs.id),
+            func.count(fs.franchise_id.distinct()),
+            func.min(Season.year),
+            func.max(Season.year),
+            func.sum(fs.regular_wins),
+            func.sum(fs.regular_losses),
+            func.sum(fs.playoff_winners_wins),
+            func.sum(fs.playoff_winners_losses),
+            func.sum(fs.points_for),
+            func.sum(fs.points_against),
+            func.sum(case((fs.won_championship, 1), else_=0)),
+            func.min(fs.final_standing),
+            func.sum(fs.prize_money),
+        )
+        .join(Season, Season.id == fs.season_id)
+        .group_by(fs.manager_id)
+    )
+    if manager_ids is not None:
+        statement = statement.where(fs.manager_id.in_(manager_ids))
+    return statement
+
+
+def _opponent_select(manager_ids: Iterable[int] | None):
+    # One row per game and side, each scored from that side's perspective
+    side1 = FranchiseSeason.__table__.alias("side1")
+    side2 = FranchiseSeason.__table__.alias("side2")
+    game = Game.__table__
+    joined = game.join(
+        side1,
+        and_(
+            side1.c.season_id == game.c.season_id,
+            side1.c.franchise_id == game.c.franchise1_id,
+        ),
+    ).join(
+        side2,
+        and_(
+            side2.c.season_id == game.c.season_id,
+            side2.c.franchise_id == game.c.franchise2_id,
+        ),
+    )
+    scored = and_(
+        game.c.franchise1_score.is_not(None), game.c.franchise2_score.is_not(None)
+    )
+    sides = union_all(
+        select(
+            side1.c.manager_id.label("manager_id"),
+            side2.c.manager_id.label("opponent_id"),
+            game.c.franchise1_score.label("score_for"),
+            game.c.franchise2_score.label("score_against"),
+        )
+        .select_from(joined)
+        .where(scored),
+        select(
+            side2.c.manager_id,
+            side1.c.manager_id,
+            game.c.franchise2_score,
+            game.c.franchise1_score,
+        )
+        .select_from(joined)
+        .where(scored),
+    ).subquery()
+
+    statement = select(
+        sides.c.manager_id,
+        sides.c.opponent_id,
+        func.count(),
+        func.sum(case((sides.c.score_for > sides.c.score_against, 1), else_=0)),
+        func.sum(case((sides.c.score_for < sides.c.score_against, 1), else_=0)),
+        func.sum(case((sides.c.score_for == sides.c.score_against, 1), else_=0)),
+        func.sum(sides.c.score_for),
+        func.sum(sides.c.score_against),
+    ).group_by(sides.c.manager_id, sides.c.opponent_id)
+    if manager_ids is not None:
+        statement = statement.where(sides.c.manager_id.in_(manager_ids))
+    return statement
+
+
+_CAREER_COLUMNS = [
+    "manager_id",
+    "seasons",
+    "franchises",
+    "first_year",
+    "last_year",
+    "regular_wins",
+    "regular_losses",
+    "playoff_wins",
+    "playoff_losses",
+    "points_for",
+    "points_against",
+    "championships",
+    "best_finish",
+    "earnings",
+]
+_OPPONENT_COLUMNS = [
+    "manager_id",
+    "opponent_id",
+    "games",
+    "wins",
+    "losses",
+    "ties",
+    "points_for",
+    "points_against",
+]
+
+
+def refresh_manager_careers(session: Session, manager_ids: Iterable[int]) -> None:
+    """Recompute the career and head-to-head rows of ``manager_ids``."""
+    manager_ids = sorted(set(manager_ids))
+    if not manager_ids:
+        return
+    for model, columns, source in (
+        (ManagerCareer, _CAREER_COLUMNS, _career_select(manager_ids)),
+        (ManagerOpponentRecord, _OPPONENT_COLUMNS, _opponent_select(manager_ids)),
+    ):
+        session.execute(
+            delete(model).where(model.manager_id.in_(manager_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        session.execute(insert(model).from_select(columns, source))
+
+
+def rebuild_manager_careers(session: Session) -> None:
+    """Recompute every manager's career and head-to-head rows."""
+    for model, columns, source in (
+        (ManagerCareer, _CAREER_COLUMNS, _career_select(None)),
+        (ManagerOpponentRecord, _OPPONENT_COLUMNS, _opponent_select(None)),
+    ):
+        session.execute(delete(model), execution_options={"synchronize_session": False})
+        session.execute(insert(model).from_select(columns, source))
+
+
+@refresh_on_commit
+def _refresh_changed_careers(session: Session, changes: DerivedChanges) -> None:
+    refresh_manager_careers(session, changes.managers(session, opponents=True))
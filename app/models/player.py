@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String
 
 from app.database import Base
+from app.trigram import trigram_index
 
 
 class Player(Base):
@@ -10,3 +11,7 @@ class Player(Base):
     name = Column(String, nullable=False, index=True)
     position = Column(String, nullable=False)
     nfl_team = Column(String, nullable=True)  # NFL team they play for
+    espn_player_id = Column(Integer, nullable=True, unique=True, index=True)
+
+    # Substring and fuzzy search (see app.services.search)
+    __table_args__ = (trigram_index("ix_player_name_trgm", "name"),)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Date, ForeignKey, Integer, UniqueConstraint, event
+from sqlalchemy.orm import object_session, relationship
 
 from app.database import Base
+from app.partitioning import drop_season_partitions, queue_season_partitions
 
 
 class Season(Base):
@@ -18,3 +19,17 @@ class Season(Base):
 
     # Ensure unique year per league
     __table_args__ = (UniqueConstraint("league_id", "year", name="unique_league_year"),)
+
+
+@event.listens_for(Season, "after_insert")
+def _partition_new_season(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        queue_season_partitions(session, target.id)
+
+
+@event.listens_for(Season, "before_delete")
+def _drop_season_partitions(mapper, connection, target):
+    # Dropping the partitions removes the season's games and lineups
+    # without a row-by-row DELETE
+    drop_season_partitions(connection, target.id)
@@ -0,0 +1,232 @@
+"""Win and loss streaks of franchises and managers, kept up to date as games change.
+
+A streak is an island of consecutive wins or losses in a subject's games
+ordered by season year and week. Islands are found with one gaps-and-islands
+window query: the row number of each game among all the subject's games
+minus its row number among the subject's games with the same result is
+constant along a run of equal results. ``career`` streaks run across
+seasons; ``season`` streaks restart every season. Ties and unscored games
+end a streak without starting one.
+
+``streak`` keeps the streaks of at least ``MIN_STREAK_LENGTH`` games and
+every subject's current streak, marked ``active``. It is refreshed on
+commit for the franchises and managers whose games or seasons changed.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.derived import DerivedChanges, refresh_on_commit
+from app.models.franchise_season import FranchiseSeason
+from app.models.game import Game
+from app.models.season import Season
+
+STREAK_SCOPES = ("franchise", "manager")
+STREAK_SPANS = ("career", "season")
+STREAK_KINDS = ("win", "loss")
+# Shorter streaks are only kept while they are a subject's current streak
+MIN_STREAK_LENGTH = 2
+
+
+class Streak(Base):
+    __tablename__ = "streak"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "franchise" or "manager"; subject_id is a franchise or manager ID
+    scope = Column(String, nullable=False)
+    subject_id = Column(Integer, nullable=False)
+    # "career" (across seasons) or "season"
+    span = Column(String, nullable=False)
+    # "win" or "loss"
+    kind = Column(String, nullable=False)
+    length = Column(Integer, nullable=False)
+    start_year = Column(Integer, nullable=False)
+    start_week = Column(Integer, nullable=False)
+    end_year = Column(Integer, nullable=False)
+    end_week = Column(Integer, nullable=False)
+    # Whether the streak includes the subject's latest game
+    active = Column(Boolean, default=False, nullable=False)
+    # Season the streak belongs to, for season streaks
+    season_id = Column(
+        Integer, ForeignKey("season.id", ondelete="CASCADE"), nullable=True
+    )
+
+    __table_args__ = (
+        # Records page: longest streaks of a kind
+        Index("ix_streak_records", "scope", "span", "kind", "length"),
+        Index("ix_streak_subject", "scope", "subject_id"),
+    )
+
+
+# Games are ordered by year * WEEK_KEY + week
+WEEK_KEY = 100
+
+
+def _sides(scope: str, subject_ids: Iterable[int] | None):
+    """One row per scored game and side, with the side's result."""
+    game = Game.__table__
+    season = Season.__table__
+    fs = FranchiseSeason.__table__
+    scored = and_(
+        game.c.franchise1_score.is_not(None), game.c.franchise2_score.is_not(None)
+    )
+    selects = []
+    for franchise, score_for, score_against in (
+        (game.c.franchise1_id, game.c.franchise1_score, game.c.franchise2_score),
+        (game.c.franchise2_id, game.c.franchise2_score, game.c.franchise1_score),
+    ):
+        if scope == "franchise":
+            subject = franchise
+            joined = game.join(season, season.c.id == game.c.season_id)
+        else:
+            subject = fs.c.manager_id
+            joined = game.join(season, season.c.id == game.c.season_id).join(
+                fs,
+                and_(
+                    fs.c.season_id == game.c.season_id, fs.c.franchise_id == franchise
+                ),
+            )
+        statement = (
+            select(
+                subject.label("subject_id"),
+                game.c.season_id.label("season_id"),
+                (season.c.year * WEEK_KEY + game.c.week).label("week_key"),
+                game.c.id.label("game_id"),
+                case(
+                    (score_for > score_against, "win"),
+                    (score_for < score_against, "loss"),
+                    else_="tie",
+                ).label("result"),
+            )
+            .select_from(joined)
+            .where(scored)
+        )
+        if subject_ids is not None:
+            statement = statement.where(subject.in_(subject_ids))
+        selects.append(statement)
+    return union_all(*selects).subquery("sides")
+
+
+def _streaks_select(scope: str, span: str, subject_ids: Iterable[int] | None):
+    sides = _sides(scope, subject_ids)
+    order = (sides.c.week_key, sides.c.game_id)
+    partition = [sides.c.subject_id]
+    if span == "season":
+        partition.append(sides.c.season_id)
+    numbered = select(
+        sides.c.subject_id,
+        sides.c.season_id,
+        sides.c.week_key,
+        sides.c.result,
+        # Constant along each run of equal results: the island
+        (
+            func.row_number().over(partition_by=partition, order_by=order)
+            - func.row_number().over(
+                partition_by=[*partition, sides.c.result], order_by=order
+            )
+        ).label("island"),
+        # Position among all the subject's games, to find the latest one
+        func.row_number()
+        .over(partition_by=sides.c.subject_id, order_by=order)
+        .label("position"),
+        func.count().over(partition_by=sides.c.subject_id).label("games"),
+    ).subquery("numbered")
+
+    start = func.min(numbered.c.week_key)
+    end = func.max(numbered.c.week_key)
+    length = func.count()
+    active = func.max(numbered.c.position) == func.max(numbered.c.games)
+    group_by = [numbered.c.subject_id, numbered.c.result, numbered.c.island]
+    if span == "season":
+        group_by.append(numbered.c.season_id)
+    return (
+        select(
+            literal(scope),
+            numbered.c.subject_id,
+            literal(span),
+            numbered.c.result,
+            length,
+            start // WEEK_KEY,
+            start % WEEK_KEY,
+            end // WEEK_KEY,
+            end % WEEK_KEY,
+            active,
+            numbered.c.season_id if span == "season" else null(),
+        )
+        .where(numbered.c.result != "tie")
+        .group_by(*group_by)
+        .having(or_(length >= MIN_STREAK_LENGTH, active))
+    )
+
+
+_STREAK_COLUMNS = [
+    "scope",
+    "subject_id",
+    "span",
+    "kind",
+    "length",
+    "start_year",
+    "start_week",
+    "end_year",
+    "end_week",
+    "active",
+    "season_id",
+]
+
+
+def _write_streaks(
+    session: Session, scope: str, subject_ids: Iterable[int] | None
+) -> None:
+    deleted = delete(Streak).where(Streak.scope == scope)
+    if subject_ids is not None:
+        deleted = deleted.where(Streak.subject_id.in_(subject_ids))
+    session.execute(deleted, execution_options={"synchronize_session": False})
+    for span in STREAK_SPANS:
+        session.execute(
+            insert(Streak).from_select(
+                _STREAK_COLUMNS, _streaks_select(scope, span, subject_ids)
+            )
+        )
+
+
+def refresh_streaks(
+    session: Session, franchise_ids: Iterable[int], manager_ids: Iterable[int]
+) -> None:
+    """Recompute the streaks of ``franchise_ids`` and ``manager_ids``."""
+    for scope, subject_ids in (
+        ("franchise", sorted(set(franchise_ids))),
+        ("manager", sorted(set(manager_ids))),
+    ):
+        if subject_ids:
+            _write_streaks(session, scope, subject_ids)
+
+
+def rebuild_streaks(session: Session) -> None:
+    """Recompute the streaks of every franchise and manager."""
+    for scope in STREAK_SCOPES:
+        _write_streaks(session, scope, None)
+
+
+@refresh_on_commit
+def _refresh_changed_streaks(session: Session, changes: DerivedChanges) -> None:
+    refresh_streaks(session, changes.franchise_ids, changes.managers(session))
@@ -0,0 +1,206 @@
+"""Regular-season standings as of every week, kept up to date as games change.
+
+``week_standing`` holds one row per season, week and franchise with the
+franchise's cumulative record, points and rank after that week. The rows are
+computed from ``game`` by a single windowed ``INSERT ... SELECT``: running
+sums per franchise over the weeks, then a rank per week. Franchises without
+a game in a week (byes) carry their totals forward. The seasons of changed
+games are refreshed on commit, so an as-of-week lookup is one indexed read.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session, relationship
+
+from app.database import Base
+from app.models.derived import DerivedChanges, refresh_on_commit
+from app.models.game import Game
+
+
+class WeekStanding(Base):
+    __tablename__ = "week_standing"
+
+    season_id = Column(
+        Integer, ForeignKey("season.id", ondelete="CASCADE"), primary_key=True
+    )
+    week = Column(Integer, primary_key=True)
+    franchise_id = Column(Integer, ForeignKey("franchise.id"), primary_key=True)
+    # Cumulative through ``week``
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    ties = Column(Integer, default=0, nullable=False)
+    points_for = Column(Float, default=0.0, nullable=False)
+    points_against = Column(Float, default=0.0, nullable=False)
+    rank = Column(Integer, nullable=False)
+
+    # Relationships
+    franchise = relationship("Franchise")
+
+
+def _standings_select(season_ids: Iterable[int] | None):
+    game = Game.__table__
+    scored = and_(
+        game.c.game_type == "REGULAR",
+        game.c.franchise1_score.is_not(None),
+        game.c.franchise2_score.is_not(None),
+    )
+    if season_ids is not None:
+        scored = and_(scored, game.c.season_id.in_(season_ids))
+    # One row per game and side, each scored from that side's perspective
+    sides = union_all(
+        select(
+            game.c.season_id.label("season_id"),
+            game.c.week.label("week"),
+            game.c.franchise1_id.label("franchise_id"),
+            game.c.franchise1_score.label("score_for"),
+            game.c.franchise2_score.label("score_against"),
+        ).where(scored),
+        select(
+            game.c.season_id,
+            game.c.week,
+            game.c.franchise2_id,
+            game.c.franchise2_score,
+            game.c.franchise1_score,
+        ).where(scored),
+    ).subquery("sides")
+
+    weekly = (
+        select(
+            sides.c.season_id,
+            sides.c.week,
+            sides.c.franchise_id,
+            func.sum(
+                case((sides.c.score_for > sides.c.score_against, 1), else_=0)
+            ).label("wins"),
+            func.sum(
+                case((sides.c.score_for < sides.c.score_against, 1), else_=0)
+            ).label("losses"),
+            func.sum(
+                case((sides.c.score_for == sides.c.score_against, 1), else_=0)
+            ).label("ties"),
+            func.sum(sides.c.score_for).label("points_for"),
+            func.sum(sides.c.score_against).label("points_against"),
+        )
+        .group_by(sides.c.season_id, sides.c.week, sides.c.franchise_id)
+        .subquery("weekly")
+    )
+
+    # Every franchise of the season in every week, so byes carry totals over
+    weeks = select(sides.c.season_id, sides.c.week).distinct().subquery("weeks")
+    franchises = (
+        select(sides.c.season_id, sides.c.franchise_id)
+        .distinct()
+        .subquery("franchises")
+    )
+    running = {
+        "partition_by": (weeks.c.season_id, franchises.c.franchise_id),
+        "order_by": weeks.c.week,
+        "rows": (None, 0),
+    }
+    totals = (
+        select(
+            weeks.c.season_id,
+            weeks.c.week,
+            franchises.c.franchise_id,
+            *(
+                func.sum(func.coalesce(weekly.c[column], 0))
+                .over(**running)
+                .label(column)
+                for column in (
+                    "wins",
+                    "losses",
+                    "ties",
+                    "points_for",
+                    "points_against",
+                )
+            ),
+        )
+        .select_from(
+            weeks.join(franchises, franchises.c.season_id == weeks.c.season_id)
+        )
+        .outerjoin(
+            weekly,
+            and_(
+                weekly.c.season_id == weeks.c.season_id,
+                weekly.c.week == weeks.c.week,
+                weekly.c.franchise_id == franchises.c.franchise_id,
+            ),
+        )
+        .subquery("totals")
+    )
+
+    return select(
+        totals.c.season_id,
+        totals.c.week,
+        totals.c.franchise_id,
+        totals.c.wins,
+        totals.c.losses,
+        totals.c.ties,
+        totals.c.points_for,
+        totals.c.points_against,
+        func.rank().over(
+            partition_by=(totals.c.season_id, totals.c.week),
+            order_by=(
+                totals.c.wins.desc(),
+                totals.c.ties.desc(),
+                totals.c.points_for.desc(),
+            ),
+        ),
+    )
+
+
+_STANDING_COLUMNS = [
+    "season_id",
+    "week",
+    "franchise_id",
+    "wins",
+    "losses",
+    "ties",
+    "points_for",
+    "points_against",
+    "rank",
+]
+
+
+def refresh_week_standings(session: Session, season_ids: Iterable[int]) -> None:
+    """Recompute the week-by-week standings of ``season_ids``."""
+    season_ids = sorted(set(season_ids))
+    if not season_ids:
+        return
+    session.execute(
+        delete(WeekStanding).where(WeekStanding.season_id.in_(season_ids)),
+        execution_options={"synchronize_session": False},
+    )
+    session.execute(
+        insert(WeekStanding).from_select(
+            _STANDING_COLUMNS, _standings_select(season_ids)
+        )
+    )
+
+
+def rebuild_week_standings(session: Session) -> None:
+    """Recompute the week-by-week standings of every season."""
+    session.execute(
+        delete(WeekStanding), execution_options={"synchronize_session": False}
+    )
+    session.execute(
+        insert(WeekStanding).from_select(_STANDING_COLUMNS, _standings_select(None))
+    )
+
+
+@refresh_on_commit
+def _refresh_changed_standings(session: Session, changes: DerivedChanges) -> None:
+    refresh_week_standings(session, changes.season_ids)
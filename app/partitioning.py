@@ -0,0 +1,294 @@
+"""PostgreSQL LIST partitioning of ``game`` and ``lineup`` by season.
+
+Each season gets its own ``game_season_<id>`` and ``lineup_season_<id>``
+partitions, so queries filtered on ``season_id`` only touch that season's
+partitions, and removing or re-importing a season detaches and drops two
+tables instead of deleting rows one by one. Rows for seasons without
+partitions yet land in the ``<table>_default`` partitions and are moved
+out when the season's partitions are created.
+
+Partitions for new seasons are created right after the transaction that
+inserted the season commits. Everything here is a no-op on databases where
+the tables are not partitioned (other dialects, or PostgreSQL databases
+not yet converted with ``migrate_to_partitioned``).
+"""
+
+import logging
+
+from sqlalchemy import DDL, MetaData, PrimaryKeyConstraint, event, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = "season_id"
+# Referenced table first: partitions are attached in this order and
+# detached in reverse
+PARTITIONED_TABLES = ("game", "lineup")
+
+
+def partition_name(table: str, season_id: int) -> str:
+    return f"{table}_season_{int(season_id)}"
+
+
+def default_partition_ddl(table: str) -> DDL:
+    """DDL creating the catch-all partition, for the table's after_create."""
+    return DDL(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT").execute_if(
+        dialect="postgresql"
+    )
+
+
+# SQLite only generates ids for a single INTEGER primary key, so there
+# ``id`` alone is the primary key of the partitioned tables and the
+# ``(id, season_id)`` pair that lineup's foreign key to game references is
+# kept unique instead.
+@compiles(CreateColumn, "sqlite")
+def _sqlite_partitioned_id(create, compiler, **kw):
+    column = create.element
+    if column.table.name in PARTITIONED_TABLES and column.name == "id":
+        return "id INTEGER NOT NULL"
+    return compiler.visit_create_column(create, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_partitioned_primary_key(constraint, compiler, **kw):
+    if constraint.table.name not in PARTITIONED_TABLES:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    return f"PRIMARY KEY (id), UNIQUE (id, {PARTITION_KEY})"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return (
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+            ),
+            {"table": table},
+        ).first()
+        is not None
+    )
+
+
+def _table_exists(conn: Connection, table: str) -> bool:
+    return (
+        conn.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar()
+        is not None
+    )
+
+
+def list_partitions(conn: Connection, table: str) -> dict[str, str]:
+    """Partitions of ``table`` mapped to their bounds, e.g. ``FOR VALUES IN (3)``."""
+    if not is_partitioned(conn, table):
+        return {}
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+        ),
+        {"table": table},
+    )
+    return dict(rows.all())
+
+
+def create_season_partitions(conn: Connection, season_id: int) -> bool:
+    """Create the season's partitions, moving its rows out of the defaults.
+
+    New partitions are built as standalone tables, filled by moving rows out
+    of the default partitions and then attached, so the parents stay
+    readable throughout.
+
+    Returns:
+        True if partitions were created, False if they already existed or
+        the tables are not partitioned
+    """
+    if not all(is_partitioned(conn, table) for table in PARTITIONED_TABLES):
+        return False
+    if _table_exists(conn, partition_name("game", season_id)):
+        return False
+
+    season_id = int(season_id)
+    for table in PARTITIONED_TABLES:
+        partition = partition_name(table, season_id)
+        conn.execute(
+            text(
+                f"CREATE TABLE {partition} "
+                f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # Lets ATTACH skip scanning the new partition
+        conn.execute(
+            text(
+                f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_bound "
+                f"CHECK ({PARTITION_KEY} = {season_id})"
+            )
+        )
+    # Referencing rows go first so the game foreign key holds throughout.
+    # Deleting and inserting in one statement moves exactly the rows it
+    # deleted, even if other transactions write to the default meanwhile
+    for table in reversed(PARTITIONED_TABLES):
+        partition = partition_name(table, season_id)
+        conn.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {table}_default "
+                f"WHERE {PARTITION_KEY} = {season_id} RETURNING *) "
+                f"INSERT INTO {partition} SELECT * FROM moved"
+            )
+        )
+    for table in PARTITIONED_TABLES:
+        partition = partition_name(table, season_id)
+        conn.execute(
+            text(
+                f"ALTER TABLE {table} ATTACH PARTITION {partition} "
+                f"FOR VALUES IN ({season_id})"
+            )
+        )
+        conn.execute(text(f"ALTER TABLE {partition} DROP CONSTRAINT {partition}_bound"))
+    return True
+
+
+def drop_season_partitions(conn: Connection, season_id: int) -> bool:
+    """Remove every game and lineup row of a season.
+
+    The season's partitions are detached and dropped; only rows still in
+    the default partitions are deleted individually.
+
+    Returns:
+        False if the tables are not partitioned, in which case nothing is
+        removed
+    """
+    if not all(is_partitioned(conn, table) for table in PARTITIONED_TABLES):
+        return False
+
+    season_id = int(season_id)
+    for table in reversed(PARTITIONED_TABLES):
+        partition = partition_name(table, season_id)
+        if _table_exists(conn, partition):
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+            conn.execute(text(f"DROP TABLE {partition}"))
+        conn.execute(
+            text(f"DELETE FROM {table}_default WHERE {PARTITION_KEY} = {season_id}")
+        )
+    return True
+
+
+def reset_season_partitions(conn: Connection, season_id: int) -> bool:
+    """Swap the season's partitions for empty ones before a re-import.
+
+    Returns:
+        False if the tables are not partitioned
+    """
+    if not drop_season_partitions(conn, season_id):
+        return False
+    return create_season_partitions(conn, season_id)
+
+
+def migrate_to_partitioned(conn: Connection, metadata: MetaData) -> dict[str, int]:
+    """Convert plain ``game`` and ``lineup`` tables into partitioned ones.
+
+    The existing tables are renamed aside, the partitioned tables and one
+    partition per season are created from ``metadata``, rows are copied
+    with ``lineup.season_id`` filled from each lineup's game, ID sequences
+    are advanced past the copied IDs and the old tables are dropped. Run it
+    in a single transaction.
+
+    Returns:
+        Rows copied per table; empty if the tables were already partitioned
+    """
+    if all(is_partitioned(conn, table) for table in PARTITIONED_TABLES):
+        return {}
+
+    for table in PARTITIONED_TABLES:
+        legacy = f"{table}_legacy"
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+        ).scalar()
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        # Index and sequence names are schema-wide, so move them aside too
+        indexes = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+            {"table": legacy},
+        ).scalars()
+        for index in list(indexes):
+            conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {legacy}_id_seq"))
+
+    for table in PARTITIONED_TABLES:
+        metadata.tables[table].create(conn)
+    season_ids = conn.execute(
+        text(f"SELECT DISTINCT {PARTITION_KEY} FROM game_legacy")
+    ).scalars()
+    for season_id in list(season_ids):
+        create_season_partitions(conn, season_id)
+
+    counts = {}
+    for table in PARTITIONED_TABLES:
+        # Columns added to the model since the legacy table was created keep
+        # their defaults
+        legacy_columns = {
+            column["name"] for column in inspect(conn).get_columns(f"{table}_legacy")
+        }
+        columns = [
+            column.name
+            for column in metadata.tables[table].columns
+            if column.name in legacy_columns
+            and not (table == "lineup" and column.name == PARTITION_KEY)
+        ]
+        column_list = ", ".join(columns)
+        if table == "lineup":
+            source = (
+                f"SELECT {', '.join(f'l.{c}' for c in columns)}, g.{PARTITION_KEY} "
+                "FROM lineup_legacy l JOIN game_legacy g ON g.id = l.game_id"
+            )
+            column_list += f", {PARTITION_KEY}"
+        else:
+            source = f"SELECT {column_list} FROM game_legacy"
+        counts[table] = conn.execute(
+            text(f"INSERT INTO {table} ({column_list}) {source}")
+        ).rowcount
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+        )
+
+    for table in reversed(PARTITIONED_TABLES):
+        conn.execute(text(f"DROP TABLE {table}_legacy"))
+    return counts
+
+
+def queue_season_partitions(session: Session, season_id: int) -> None:
+    """Create the season's partitions once ``session`` commits."""
+    session.info.setdefault("new_partition_seasons", []).append(season_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _create_queued_partitions(session):
+    season_ids = session.info.pop("new_partition_seasons", None)
+    if not season_ids:
+        return
+    # The session's transaction is over; use a short one of our own so the
+    # partition DDL's locks are released straight away
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    for season_id in season_ids:
+        try:
+            with bind.engine.begin() as conn:  # type: ignore[union-attr]
+                create_season_partitions(conn, season_id)
+        except Exception:
+            # The rows stay in the default partition, which is still correct
+            logger.exception("Could not create partitions for season %s", season_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_queued_partitions(session):
+    session.info.pop("new_partition_seasons", None)
@@ -0,0 +1,304 @@
+"""Opt-in profiling of single requests and importer runs.
+
+A ``profile`` block samples the stacks of the threads working for it every
+few milliseconds and times every SQL statement they execute. Threads join a
+profile from its context: the thread that opened it, worker threads running
+a function through ``call_attached``, and any thread that executes SQL. An
+event loop thread is shared by every request, so it is only sampled while
+running the tasks that joined the profile. Samples are also classified by
+the innermost frame that tells where the time went (SQL, ORM hydration or
+serialization), which is usually the first question about a slow endpoint.
+
+Reports render as folded stacks (``module.function;module.function N``
+lines), the input of flamegraph.pl, speedscope and most other flame graph
+tools.
+
+Requests are profiled only when ``settings.profile_token`` is set and the
+request carries it in ``X-Profile-Token`` or ``?profile=``; otherwise the
+middleware passes requests straight through.
+"""
+
+import asyncio
+import hmac
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_QUERY_PARAMETER = "profile"
+
+# Where time goes, by the innermost frame whose module starts with a prefix
+PHASES = (
+    ("sql", ("sqlalchemy.engine", "sqlalchemy.pool", "psycopg", "sqlite3")),
+    ("orm", ("sqlalchemy.orm",)),
+    (
+        "serialization",
+        ("pydantic", "fastapi.encoders", "json", "starlette.responses"),
+    ),
+)
+# A stack waiting in one of these with no application or SQLAlchemy frame
+# below it is an idle worker thread or event loop, not time spent on work
+WAIT_MODULES = ("threading.", "queue.", "selectors.")
+WORK_MODULES = ("app.", "sqlalchemy.", "scripts.", "__main__.")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+def _idle(stack: list[str]) -> bool:
+    return stack[0].startswith(WAIT_MODULES) and not any(
+        name.startswith(WORK_MODULES) for name in stack
+    )
+
+
+def _phase(stack: tuple[str, ...]) -> str:
+    for name in reversed(stack):
+        for phase, prefixes in PHASES:
+            if name.startswith(prefixes):
+                return phase
+    return "other"
+
+
+class Profile:
+    """Stack samples and SQL timings collected by one ``profile`` block."""
+
+    def __init__(self, interval: float, all_threads: bool = False):
+        self.interval = interval
+        self.all_threads = all_threads
+        self.seconds = 0.0
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        # SQL text -> [executions, total seconds]
+        self.statements: dict[str, list[float]] = {}
+        # Thread ID -> None to sample the thread whenever it runs, or the
+        # event loop and tasks to sample it only while running one of them
+        self._threads: dict[int, tuple[Any, frozenset] | None] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def attach_thread(self) -> None:
+        """Sample the calling thread, or its current task, from now on."""
+        ident = threading.get_ident()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._threads[ident] = None
+            return
+        task = asyncio.current_task(loop)
+        with self._lock:
+            if ident in self._threads and self._threads[ident] is None:
+                return
+            _, tasks = self._threads.get(ident) or (loop, frozenset())
+            if task not in tasks:
+                # Replaced rather than changed, so the sampler can read it
+                self._threads[ident] = (loop, tasks | {task})
+
+    def _sampled(self, ident: int) -> bool:
+        if self.all_threads:
+            return True
+        if ident not in self._threads:
+            return False
+        tasks = self._threads.get(ident)
+        return tasks is None or asyncio.current_task(tasks[0]) in tasks[1]
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.statements.setdefault(statement, [0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+
+    def _sample(self) -> None:
+        sampler = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == sampler or not self._sampled(ident):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if not _idle(stack):
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def folded(self) -> str:
+        """The samples as folded stacks, one ``frame;frame count`` line each."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+    def phases(self) -> dict[str, int]:
+        """Samples by where their time went: sql, orm, serialization or other."""
+        phases: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            phases[_phase(stack)] += count
+        return dict(phases.most_common())
+
+    def sql(self) -> list[dict[str, Any]]:
+        """Statements by total time, slowest first."""
+        return [
+            {"statement": statement, "count": int(count), "seconds": seconds}
+            for statement, (count, seconds) in sorted(
+                self.statements.items(), key=lambda item: item[1][1], reverse=True
+            )
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "interval": self.interval,
+            "samples": sum(self.stacks.values()),
+            "phases": self.phases(),
+            "sql": self.sql(),
+            "folded": self.folded(),
+        }
+
+
+_current_profile: ContextVar[Profile | None] = ContextVar("profile", default=None)
+# Profile sampling every thread of the process, e.g. for a CLI run
+_process_profile: Profile | None = None
+
+
+def active_profile() -> Profile | None:
+    """The profile the current context is collecting for, if any."""
+    return _current_profile.get() or _process_profile
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if active_profile() is not None and context is not None:
+        context._profile_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    profile = active_profile()
+    start = getattr(context, "_profile_start_time", None)
+    if profile is not None and start is not None:
+        profile.record_statement(statement, time.perf_counter() - start)
+        profile.attach_thread()
+
+
+def call_attached(function: Callable[..., Any], *args: Any) -> Any:
+    """Call ``function(*args)``, sampling this thread for the active profile.
+
+    For functions sent to a worker thread with the caller's context copied.
+    """
+    profile = active_profile()
+    if profile is not None:
+        profile.attach_thread()
+    return function(*args)
+
+
+@contextmanager
+def profile(
+    interval: float | None = None, all_threads: bool = False
+) -> Iterator[Profile]:
+    """Profile the block.
+
+    Args:
+        interval: Seconds between stack samples. Defaults to
+            ``settings.profile_interval_seconds``.
+        all_threads: Sample every thread of the process instead of those
+            running in this context; for processes doing nothing else
+
+    Yields:
+        The profile, complete once the block exits
+    """
+    global _process_profile
+    if interval is None:
+        interval = settings.profile_interval_seconds
+    result = Profile(interval, all_threads)
+    result.attach_thread()
+    token = _current_profile.set(result)
+    if all_threads:
+        _process_profile = result
+    sampler = threading.Thread(target=result._run, name="profiler", daemon=True)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield result
+    finally:
+        result._stopped.set()
+        sampler.join()
+        result.seconds = time.perf_counter() - started
+        if all_threads:
+            _process_profile = None
+        _current_profile.reset(token)
+
+
+def _requested_token(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_TOKEN_HEADER.lower().encode():
+            return value.decode("latin-1")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    values = query.get(PROFILE_QUERY_PARAMETER)
+    return values[-1] if values else None
+
+
+def profile_requested(scope) -> bool:
+    """Whether the request asks to be profiled with the right token."""
+    if not settings.profile_token:
+        return False
+    token = _requested_token(scope)
+    return token is not None and hmac.compare_digest(
+        token.encode(), settings.profile_token.encode()
+    )
+
+
+class ProfilingMiddleware:
+    """ASGI middleware answering profiled requests with their profile.
+
+    The endpoint runs as usual, but its response is replaced by a JSON
+    report: its status, the time by phase, SQL timings and the folded stacks
+    (``jq -r .folded`` extracts them for a flame graph tool).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        with profile() as result:
+            await self.app(scope, receive, discard)
+        body = json.dumps(
+            {"method": scope["method"], "path": scope["path"], "status": status}
+            | result.to_dict()
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"cache-control", b"no-store"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
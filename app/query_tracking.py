@@ -0,0 +1,141 @@
+"""Per-request SQL statement counting and N+1 query detection.
+
+Statements are attributed to whatever ``track_queries`` block is active in
+the current context, so counts are per request (or per importer run) even
+with many requests in flight. Statements whose SQL text repeats with only
+different parameters are the signature of an N+1 pattern, e.g. a lazy
+relationship loaded inside a loop.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+REPEATED_QUERIES_HEADER = "X-Query-Repeated"
+
+
+class QueryLog:
+    """Statements executed inside one ``track_queries`` block."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """Statements executed at least ``threshold`` times.
+
+        Args:
+            threshold: Minimum repeats. Defaults to
+                ``settings.query_repeat_threshold``.
+
+        Returns:
+            SQL text mapped to how often it ran, most frequent first
+        """
+        if threshold is None:
+            threshold = settings.query_repeat_threshold
+        return {
+            statement: count
+            for statement, count in Counter(self.statements).most_common()
+            if count >= threshold
+        }
+
+
+_current_log: ContextVar[QueryLog | None] = ContextVar("query_log", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = _current_log.get()
+    if log is not None:
+        log.statements.append(statement)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryLog]:
+    """Count the statements executed in the current context.
+
+    Yields:
+        The log, which keeps filling until the block exits
+    """
+    log = QueryLog()
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Iterator[QueryLog]:
+    """Fail if the block executes more than ``budget`` statements.
+
+    Raises:
+        AssertionError: Listing the statements when the budget is exceeded
+    """
+    with track_queries() as log:
+        yield log
+    if log.count > budget:
+        statements = "\n".join(f"  {s}" for s in log.statements)
+        raise AssertionError(
+            f"Expected at most {budget} queries, got {log.count}:\n{statements}"
+        )
+
+
+def warn_repeated(log: QueryLog, label: str) -> dict[str, int]:
+    """Log a warning for each statement repeated often enough to be an N+1.
+
+    Returns:
+        The repeated statements, as returned by ``QueryLog.repeated``
+    """
+    repeated = log.repeated()
+    for statement, count in repeated.items():
+        logger.warning("Possible N+1 in %s: ran %d times: %s", label, count, statement)
+    return repeated
+
+
+class QueryCountMiddleware:
+    """ASGI middleware reporting the statements each request executed.
+
+    When ``settings.debug_query_count`` is on, responses carry the statement
+    count in ``X-Query-Count`` and the number of distinct repeated
+    statements in ``X-Query-Repeated``, and repeats are logged. When it is
+    off the request passes straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.debug_query_count:
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as log:
+
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    repeated = warn_repeated(log, f"{scope['method']} {scope['path']}")
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (QUERY_COUNT_HEADER.lower().encode(), str(log.count).encode()),
+                        (
+                            REPEATED_QUERIES_HEADER.lower().encode(),
+                            str(len(repeated)).encode(),
+                        ),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
@@ -1,23 +1,77 @@
 """ESPN Fantasy API client."""
 
 import os
+import time
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Any
 
 import httpx
 
+from app.services.json_stream import iter_items
+from app.services.rate_limit import (
+    CircuitBreaker,
+    ClientMetrics,
+    TokenBucket,
+    backoff_delay,
+    parse_retry_after,
+)
+
+# Status codes worth retrying: throttling and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Records yielded per season by ESPNClient.iter_league_history. Members,
+# teams and schedule entries are yielded one element at a time.
+LEAGUE_HISTORY_RECORDS = {
+    "seasonId": "seasonId",
+    "settings": "settings",
+    "members.item": "member",
+    "teams.item": "team",
+    "schedule.item": "matchup",
+}
+
 
 class ESPNClient:
     """Client for interacting with ESPN Fantasy API."""
 
     BASE_URL = "https://lm-api-reads.fantasy.espn.com/apis/v3"
+    STREAM_CHUNK_SIZE = 64 * 1024
 
-    def __init__(self, swid: str | None = None, espn_s2: str | None = None):
+    def __init__(
+        self,
+        swid: str | None = None,
+        espn_s2: str | None = None,
+        *,
+        base_url: str | None = None,
+        rate_limiter: TokenBucket | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        max_retries: int = 5,
+        timeout: float = 10.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
         """Initialize ESPN client with authentication cookies.
 
         Args:
             swid: ESPN SWID cookie value
             espn_s2: ESPN espn_s2 cookie value
+            base_url: Override for BASE_URL (e.g. a local stub server)
+            rate_limiter: Token bucket to draw from. Pass the same bucket to
+                every client that should share one upstream budget.
+            circuit_breaker: Circuit breaker guarding the upstream
+            max_retries: Retries for 429, 5xx, timeouts and transport errors
+            timeout: Per-attempt timeout in seconds
+            backoff_base: Backoff ceiling for the first retry, in seconds
+            backoff_max: Maximum backoff ceiling, in seconds
         """
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = ClientMetrics()
+
         self.swid = swid or os.getenv("ESPN_SWID", "")
         self.espn_s2 = espn_s2 or os.getenv("ESPN_S2", "")
 
@@ -32,6 +86,13 @@ class ESPNClient:
             "Accept": "application/json",
             "Referer": "https://www.espn.com/",
         }
+        self._http = httpx.Client(
+            headers=self.headers, cookies=self.cookies, timeout=self.timeout
+        )
+
+    def close(self) -> None:
+        """Close the underlying connection pool."""
+        self._http.close()
 
     def _request(
         self, endpoint: str, params: dict[str, Any] | None = None
@@ -46,38 +107,219 @@ class ESPNClient:
             JSON response data
 
         Raises:
-            httpx.HTTPError: If the request fails
+            httpx.HTTPError: If the request fails after all retries
+            CircuitOpenError: If the circuit breaker is open
         """
-        url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
-        response = httpx.get(
-            url,
-            headers=self.headers,
-            cookies=self.cookies,
-            params=params,
-            timeout=10.0,
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._send(endpoint, params, stream=False).json()
+
+    def _stream(
+        self,
+        endpoint: str,
+        prefixes: Iterable[str],
+        params: dict[str, Any] | None = None,
+    ) -> Iterator[tuple[int | None, str, Any]]:
+        """Make a request and parse the response body incrementally.
+
+        Only the values at ``prefixes`` are materialized, one at a time (see
+        ``iter_items``). Retries cover everything up to the response headers;
+        a failure while the body is streaming is raised to the caller.
+
+        Args:
+            endpoint: API endpoint (relative to BASE_URL)
+            prefixes: ijson-style paths of the records to yield
+            params: Query parameters
+
+        Yields:
+            ``(index, path, value)`` tuples from ``iter_items``
+
+        Raises:
+            httpx.HTTPError: If the request fails after all retries
+            CircuitOpenError: If the circuit breaker is open
+        """
+        response = self._send(endpoint, params, stream=True)
+        try:
+            yield from iter_items(
+                response.iter_bytes(chunk_size=self.STREAM_CHUNK_SIZE), prefixes
+            )
+        finally:
+            response.close()
+
+    def _send(
+        self, endpoint: str, params: dict[str, Any] | None, stream: bool
+    ) -> httpx.Response:
+        """Send a GET request, retrying throttled and transient failures.
+
+        Throttled (429) and transient (5xx, timeout, connection) failures are
+        retried with exponential backoff and jitter, honouring ``Retry-After``
+        when the upstream sends it.
+
+        Args:
+            endpoint: API endpoint (relative to BASE_URL)
+            params: Query parameters
+            stream: If True, return before reading the body. The caller must
+                close the response.
+
+        Returns:
+            Successful response
+
+        Raises:
+            httpx.HTTPError: If the request fails after all retries
+            CircuitOpenError: If the circuit breaker is open
+        """
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            self.metrics.incr("rate_limit_wait_seconds", self.rate_limiter.acquire())
+            self.metrics.incr("requests")
+            retry_after = None
+            try:
+                request = self._http.build_request("GET", url, params=params)
+                response = self._http.send(request, stream=True)
+                if not stream:
+                    response.read()
+            except httpx.TransportError:
+                if not self._record_failure(attempt):
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # Anything else (success or a non-retryable 4xx) means the
+                    # upstream is healthy, even if this request was bad.
+                    self.circuit_breaker.record_success()
+                    self.rate_limiter.reward()
+                    if response.is_error:
+                        response.close()
+                        response.raise_for_status()
+                    return response
+
+                response.close()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    # A bad header must not stall the caller indefinitely
+                    retry_after = min(retry_after, self.backoff_max)
+                if response.status_code == 429:
+                    self.metrics.incr("throttled")
+                    self.rate_limiter.penalize(retry_after)
+                if not self._record_failure(attempt):
+                    response.raise_for_status()
+
+            delay = (
+                retry_after
+                if retry_after is not None
+                else backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            )
+            self.metrics.incr("retries")
+            self.metrics.incr("backoff_seconds", delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _record_failure(self, attempt: int) -> bool:
+        """Record a failed attempt.
+
+        Returns:
+            True if the request should be retried
+        """
+        self.metrics.incr("failures")
+        if self.circuit_breaker.record_failure():
+            self.metrics.incr("circuit_opened")
+            return False
+        return attempt < self.max_retries
+
+    @staticmethod
+    def _league_history_params(
+        scoring_period_id: int | None,
+        views: Sequence[str] | None,
+        season_id: int | None = None,
+    ) -> dict[str, Any] | None:
+        params: dict[str, Any] = {}
+        if season_id:
+            params["seasonId"] = season_id
+        if scoring_period_id:
+            params["scoringPeriodId"] = scoring_period_id
+        if views:
+            params["view"] = list(views)
+        return params or None
 
     def get_league_history(
-        self, league_id: int, scoring_period_id: int | None = None
+        self,
+        league_id: int,
+        scoring_period_id: int | None = None,
+        views: Sequence[str] | None = None,
     ) -> list[dict[str, Any]]:
         """Get league history.
 
         Args:
             league_id: ESPN league ID
             scoring_period_id: Optional scoring period ID
+            views: Optional ESPN views (e.g. "mMatchup", "mTeam")
 
         Returns:
             List of league history entries
         """
         endpoint = f"games/ffl/leagueHistory/{league_id}"
-        params = {}
-        if scoring_period_id:
-            params["scoringPeriodId"] = scoring_period_id
-
-        result = self._request(endpoint, params=params if params else None)
+        result = self._request(
+            endpoint, params=self._league_history_params(scoring_period_id, views)
+        )
         # This endpoint always returns a list
         if isinstance(result, list):
             return result
         return [result] if isinstance(result, dict) else []
+
+    def get_league_seasons(self, league_id: int) -> list[int]:
+        """Get the years of every season of a league, oldest first.
+
+        Only the league settings are requested, so the response stays small
+        however much history the league has.
+        """
+        history = self.get_league_history(league_id, views=("mSettings",))
+        return sorted(entry["seasonId"] for entry in history)
+
+    def get_league_scoreboard(self, league_id: int, season_id: int) -> dict[str, Any]:
+        """Get the live scores of a season's current matchup period.
+
+        Unlike ``leagueHistory``, the season endpoint covers the season in
+        progress; ``totalPointsLive`` holds the running score of each side.
+
+        Args:
+            league_id: ESPN league ID
+            season_id: Season (year) in progress
+
+        Returns:
+            The league, with ``status.currentMatchupPeriod`` and ``schedule``
+        """
+        endpoint = f"games/ffl/seasons/{season_id}/segments/0/leagues/{league_id}"
+        result = self._request(
+            endpoint, params={"view": ["mMatchupScore", "mScoreboard"]}
+        )
+        return result if isinstance(result, dict) else {}
+
+    def iter_league_history(
+        self,
+        league_id: int,
+        scoring_period_id: int | None = None,
+        views: Sequence[str] | None = None,
+        season_id: int | None = None,
+    ) -> Iterator[tuple[int, str, Any]]:
+        """Stream league history one record at a time.
+
+        Unlike ``get_league_history`` the response is never held in memory
+        as a whole; each season's scalar context, members, teams and
+        matchups are yielded as soon as they have been parsed.
+
+        Args:
+            league_id: ESPN league ID
+            scoring_period_id: Optional scoring period ID
+            views: Optional ESPN views (e.g. "mMatchup", "mTeam")
+            season_id: Only stream this season (year)
+
+        Yields:
+            ``(season_index, kind, value)`` tuples in response order, where
+            ``kind`` is one of the values of ``LEAGUE_HISTORY_RECORDS``
+        """
+        endpoint = f"games/ffl/leagueHistory/{league_id}"
+        params = self._league_history_params(scoring_period_id, views, season_id)
+        prefixes = {
+            f"item.{path}": kind for path, kind in LEAGUE_HISTORY_RECORDS.items()
+        }
+        for index, path, value in self._stream(endpoint, prefixes, params=params):
+            yield index or 0, prefixes[path], value
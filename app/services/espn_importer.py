@@ -1,15 +1,71 @@
 """Service for importing ESPN Fantasy data into the database."""
 
+import hashlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from typing import Any
 
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
+from app.metrics import REGISTRY
 from app.models.franchise import Franchise
 from app.models.franchise_season import FranchiseSeason
+from app.models.game import Game
+from app.models.import_checkpoint import ImportCheckpoint
 from app.models.league import League
 from app.models.manager import Manager
 from app.models.season import Season
 from app.services.espn_client import ESPNClient
+from app.services.external_ids import ExternalIdCache, upsert
+from app.services.league_snapshot import refresh_league_snapshot
+from app.services.prerender import refresh_league_pages
+from app.statements import STATEMENTS
+
+IMPORT_STAGE_DURATION = REGISTRY.histogram(
+    "importer_stage_duration_seconds",
+    "Time spent in each ESPN import stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+IMPORTED_RECORDS = REGISTRY.counter(
+    "importer_records", "ESPN records written by the importer", ["kind"]
+)
+
+# ESPN views needed to stream seasons with their teams and matchups
+STREAM_VIEWS = ("mSettings", "mTeam", "mMatchup")
+
+# ESPN playoffTierType -> Game.game_type. Any other tier is a consolation
+# (losers) bracket game.
+GAME_TYPES_BY_PLAYOFF_TIER = {
+    "NONE": "REGULAR",
+    "WINNERS_BRACKET": "PLAYOFF_WINNERS",
+}
+
+# (week, home team id, away team id, home score, away score, game type)
+MatchupSummary = tuple[int, int, int, float | None, float | None, str]
+
+
+@dataclass
+class _StreamedSeason:
+    """State for one season while its records are being streamed."""
+
+    index: int
+    year: int | None = None
+    settings: dict[str, Any] | None = None
+    league: League | None = None
+    season: Season | None = None
+    # ESPN member ID -> manager ID
+    managers_by_espn_id: dict[str, int] = field(default_factory=dict)
+    franchises_by_team_id: dict[int, Franchise] = field(default_factory=dict)
+    # The season's rows already in the database, loaded with the season so
+    # each record is matched and compared by hash in memory
+    franchise_seasons: dict[int, FranchiseSeason] = field(default_factory=dict)
+    games: dict[tuple[int, int, int], Game] = field(default_factory=dict)
+    # Records that arrived before the season context they depend on
+    pending_teams: list[dict[str, Any]] = field(default_factory=list)
+    pending_matchups: list[MatchupSummary] = field(default_factory=list)
 
 
 class ESPNImporter:
@@ -22,6 +78,7 @@ class ESPNImporter:
             client: ESPN client instance. If None, creates a new one.
         """
         self.client = client or ESPNClient()
+        self.external_ids = ExternalIdCache()
 
     def import_league_first_season(
         self, db: Session, league_id: int, scoring_period_id: int | None = None
@@ -43,106 +100,517 @@ class ESPNImporter:
                 "franchise_seasons": list[FranchiseSeason],
             }
         """
+        self.external_ids = ExternalIdCache()
+
         # Fetch league history from ESPN
-        history = self.client.get_league_history(league_id, scoring_period_id)
+        with IMPORT_STAGE_DURATION.labels("fetch").time():
+            history = self.client.get_league_history(league_id, scoring_period_id)
         if not history:
             raise ValueError(f"No league history found for league_id {league_id}")
 
         # Get first season (sorted by seasonId)
         first_season_data = sorted(history, key=lambda x: x["seasonId"])[0]
 
-        # Create or get League
-        league_name = first_season_data["settings"]["name"]
-        league = db.query(League).filter(League.name == league_name).first()
-        if not league:
-            league = League(
-                name=league_name, settings=first_season_data.get("settings")
+        with IMPORT_STAGE_DURATION.labels("write").time():
+            league = self._get_or_create_league(db, first_season_data["settings"])
+            season = self._get_or_create_season(
+                db, league, first_season_data["seasonId"]
             )
-            db.add(league)
-            db.flush()  # Flush to get league.id
 
-        # Create Season
-        season_year = first_season_data["seasonId"]
-        season = (
-            db.query(Season)
-            .filter(Season.league_id == league.id, Season.year == season_year)
-            .first()
-        )
-        if not season:
-            season = Season(league_id=league.id, year=season_year)
-            db.add(season)
-            db.flush()  # Flush to get season.id
+            managers_by_espn_id: dict[str, int] = {}
+            for member in first_season_data.get("members", []):
+                managers_by_espn_id[member["id"]] = self._get_or_create_manager(
+                    db, member
+                )
 
-        # Create or get Managers from members
-        managers_by_espn_id: dict[str, Manager] = {}
-        for member in first_season_data.get("members", []):
-            espn_id = member["id"]
-            display_name = member["displayName"]
-
-            # Check if manager already exists by name
-            manager = db.query(Manager).filter(Manager.name == display_name).first()
-            if not manager:
-                manager = Manager(name=display_name)
-                db.add(manager)
-                db.flush()  # Flush to get manager.id
-
-            managers_by_espn_id[espn_id] = manager
-
-        # Create or get Franchises from teams
-        franchises: list[Franchise] = []
-        franchise_seasons: list[FranchiseSeason] = []
-
-        for team_data in first_season_data.get("teams", []):
-            abbrev = team_data["abbrev"]
-            owner_ids = team_data.get("owners", [])
-
-            # Find or create franchise by abbreviation
-            franchise = (
-                db.query(Franchise)
-                .filter(Franchise.league_id == league.id, Franchise.name == abbrev)
-                .first()
-            )
-            if not franchise:
-                franchise = Franchise(league_id=league.id, name=abbrev)
-                db.add(franchise)
-                db.flush()  # Flush to get franchise.id
-
-            franchises.append(franchise)
-
-            # Get manager for this franchise (first owner)
-            manager = None
-            if owner_ids:
-                owner_espn_id = owner_ids[0]
-                manager = managers_by_espn_id.get(owner_espn_id)
-
-            if manager:
-                # Create FranchiseSeason linking franchise, season, and manager
-                franchise_season = (
-                    db.query(FranchiseSeason)
-                    .filter(
-                        FranchiseSeason.franchise_id == franchise.id,
-                        FranchiseSeason.season_id == season.id,
-                    )
-                    .first()
+            franchises: list[Franchise] = []
+            franchise_seasons: list[FranchiseSeason] = []
+            for team_data in first_season_data.get("teams", []):
+                franchise, franchise_season = self._import_team(
+                    db, league, season, team_data, managers_by_espn_id
                 )
-                if not franchise_season:
-                    franchise_season = FranchiseSeason(
-                        franchise_id=franchise.id,
-                        season_id=season.id,
-                        manager_id=manager.id,
-                    )
-                    db.add(franchise_season)
-                    db.flush()  # Flush to get franchise_season.id
+                franchises.append(franchise)
+                if franchise_season:
+                    franchise_seasons.append(franchise_season)
 
-                franchise_seasons.append(franchise_season)
+        # Read before commit expires it, so the snapshot needs no refresh
+        imported_league_id = league.id
 
         # Commit all changes
-        db.commit()
+        with IMPORT_STAGE_DURATION.labels("commit").time():
+            db.commit()
+        IMPORTED_RECORDS.labels("season").inc()
+        IMPORTED_RECORDS.labels("team").inc(len(franchises))
+        with IMPORT_STAGE_DURATION.labels("snapshot").time():
+            refresh_league_snapshot(db, imported_league_id)
+        with IMPORT_STAGE_DURATION.labels("prerender").time():
+            refresh_league_pages([imported_league_id])
 
         return {
             "league": league,
             "season": season,
             "franchises": franchises,
-            "managers": list(managers_by_espn_id.values()),
+            "managers": [
+                db.get(Manager, manager_id)
+                for manager_id in managers_by_espn_id.values()
+            ],
             "franchise_seasons": franchise_seasons,
         }
+
+    def import_league_history_stream(
+        self,
+        db: Session,
+        league_id: int,
+        scoring_period_id: int | None = None,
+        views: tuple[str, ...] = STREAM_VIEWS,
+    ) -> dict[str, int]:
+        """Import every season of a league, streaming the ESPN response.
+
+        The response is parsed incrementally and each member, team and
+        matchup is written as soon as it arrives, so memory use does not grow
+        with the size of the payload. Matchups that arrive before their
+        season's teams are held as compact summaries until the teams exist.
+
+        Args:
+            db: Database session
+            league_id: ESPN league ID
+            scoring_period_id: Optional scoring period ID
+            views: ESPN views to request
+
+        Returns:
+            Counts of imported seasons, managers, franchises,
+            franchise_seasons and games
+        """
+        self.external_ids = ExternalIdCache()
+        counts = dict.fromkeys(
+            ("seasons", "managers", "franchises", "franchise_seasons", "games"), 0
+        )
+        manager_ids: set[int] = set()
+        # Fetching, parsing and writing are interleaved while streaming
+        with IMPORT_STAGE_DURATION.labels("stream").time():
+            records = self.client.iter_league_history(
+                league_id, scoring_period_id, views
+            )
+            seasons = list(self._write_stream(db, records, counts, manager_ids))
+        if not seasons:
+            raise ValueError(f"No league history found for league_id {league_id}")
+        counts["managers"] = len(manager_ids)
+        league_ids = {season.league_id for season in seasons}
+
+        with IMPORT_STAGE_DURATION.labels("commit").time():
+            db.commit()
+        with IMPORT_STAGE_DURATION.labels("snapshot").time():
+            for imported_league_id in league_ids:
+                refresh_league_snapshot(db, imported_league_id)
+        with IMPORT_STAGE_DURATION.labels("prerender").time():
+            refresh_league_pages(league_ids)
+        return counts
+
+    def import_league_history_chunked(
+        self,
+        db: Session,
+        league_id: int,
+        views: tuple[str, ...] = STREAM_VIEWS,
+        restart: bool = False,
+    ) -> dict[str, int]:
+        """Import every season of a league, committing one season at a time.
+
+        Each season is fetched, written and committed on its own, and an
+        ``ImportCheckpoint`` is recorded in the same transaction. A failed
+        import therefore only loses the season in progress, and running it
+        again resumes after the last checkpoint without refetching or
+        rewriting completed seasons. The latest season is always imported
+        again, since it may still be in progress.
+
+        Args:
+            db: Database session
+            league_id: ESPN league ID
+            views: ESPN views to request
+            restart: Discard the league's checkpoints and import every season
+
+        Returns:
+            Counts of imported seasons, managers, franchises,
+            franchise_seasons and games, and of skipped_seasons
+        """
+        self.external_ids = ExternalIdCache()
+        if restart:
+            db.execute(
+                delete(ImportCheckpoint).where(
+                    ImportCheckpoint.espn_league_id == league_id
+                )
+            )
+            db.commit()
+
+        with IMPORT_STAGE_DURATION.labels("fetch").time():
+            years = self.client.get_league_seasons(league_id)
+        if not years:
+            raise ValueError(f"No league history found for league_id {league_id}")
+        completed = set(
+            db.scalars(
+                select(ImportCheckpoint.season_year).where(
+                    ImportCheckpoint.espn_league_id == league_id
+                )
+            )
+        )
+        pending = [year for year in years if year not in completed or year == years[-1]]
+
+        counts = dict.fromkeys(
+            ("seasons", "managers", "franchises", "franchise_seasons", "games"), 0
+        )
+        counts["skipped_seasons"] = len(years) - len(pending)
+        manager_ids: set[int] = set()
+        league_ids: set[int] = set()
+        for year in pending:
+            try:
+                with IMPORT_STAGE_DURATION.labels("stream").time():
+                    records = self.client.iter_league_history(
+                        league_id, views=views, season_id=year
+                    )
+                    seasons = list(self._write_stream(db, records, counts, manager_ids))
+                if not seasons:
+                    raise ValueError(
+                        f"No season {year} found for league_id {league_id}"
+                    )
+                for season in seasons:
+                    self._record_checkpoint(db, league_id, season)
+                    league_ids.add(season.league_id)
+                with IMPORT_STAGE_DURATION.labels("commit").time():
+                    db.commit()
+            except Exception:
+                db.rollback()
+                # IDs of rows created in the rolled back season are now invalid
+                self.external_ids = ExternalIdCache()
+                raise
+        counts["managers"] = len(manager_ids)
+
+        with IMPORT_STAGE_DURATION.labels("snapshot").time():
+            for imported_league_id in league_ids:
+                refresh_league_snapshot(db, imported_league_id)
+        with IMPORT_STAGE_DURATION.labels("prerender").time():
+            refresh_league_pages(league_ids)
+        return counts
+
+    @staticmethod
+    def _record_checkpoint(db: Session, league_id: int, season: Season) -> None:
+        upsert(
+            db,
+            ImportCheckpoint,
+            {
+                "espn_league_id": league_id,
+                "season_year": season.year,
+                "season_id": season.id,
+                "completed_at": datetime.now(UTC),
+            },
+            key=("espn_league_id", "season_year"),
+            update=("season_id", "completed_at"),
+        )
+
+    def _write_stream(
+        self,
+        db: Session,
+        records: Iterable[tuple[int, str, Any]],
+        counts: dict[str, int],
+        manager_ids: set[int],
+    ) -> Iterator[Season]:
+        """Write streamed league history records, yielding each finished season."""
+        state: _StreamedSeason | None = None
+        for index, kind, value in records:
+            IMPORTED_RECORDS.labels(kind).inc()
+            if state is None or state.index != index:
+                if state is not None:
+                    yield self._finish_streamed_season(db, state, counts)
+                state = _StreamedSeason(index=index)
+
+            if kind == "seasonId":
+                state.year = value
+            elif kind == "settings":
+                state.settings = value
+            elif kind == "member":
+                manager_id = self._get_or_create_manager(db, value)
+                state.managers_by_espn_id[value["id"]] = manager_id
+                manager_ids.add(manager_id)
+            elif kind == "team":
+                state.pending_teams.append(value)
+            elif kind == "matchup":
+                summary = self._summarize_matchup(value)
+                if summary is None:
+                    continue
+                if self._import_game(db, state, summary):
+                    counts["games"] += 1
+                else:
+                    state.pending_matchups.append(summary)
+                continue
+            self._drain_streamed_season(db, state, counts)
+
+        if state is not None:
+            yield self._finish_streamed_season(db, state, counts)
+
+    def _drain_streamed_season(
+        self, db: Session, state: _StreamedSeason, counts: dict[str, int]
+    ) -> None:
+        """Write whatever pending records the season context now allows."""
+        if state.league is None or state.season is None:
+            if state.year is None or state.settings is None:
+                return
+            state.league = self._get_or_create_league(db, state.settings)
+            state.season = self._get_or_create_season(db, state.league, state.year)
+            counts["seasons"] += 1
+            params = {"season_id": state.season.id}
+            state.franchise_seasons = {
+                franchise_season.franchise_id: franchise_season
+                for franchise_season in STATEMENTS.scalars(
+                    db, "franchise_seasons_by_season", params
+                )
+            }
+            state.games = {
+                (game.week, game.franchise1_id, game.franchise2_id): game
+                for game in STATEMENTS.scalars(db, "games_by_season", params)
+            }
+        league, season = state.league, state.season
+
+        for team_data in state.pending_teams:
+            franchise, franchise_season = self._import_team(
+                db,
+                league,
+                season,
+                team_data,
+                state.managers_by_espn_id,
+                state.franchise_seasons,
+            )
+            state.franchises_by_team_id[team_data["id"]] = franchise
+            counts["franchises"] += 1
+            counts["franchise_seasons"] += franchise_season is not None
+        state.pending_teams.clear()
+
+        waiting: list[MatchupSummary] = []
+        for summary in state.pending_matchups:
+            if self._import_game(db, state, summary):
+                counts["games"] += 1
+            else:
+                waiting.append(summary)
+        state.pending_matchups = waiting
+
+    def _finish_streamed_season(
+        self, db: Session, state: _StreamedSeason, counts: dict[str, int]
+    ) -> Season:
+        self._drain_streamed_season(db, state, counts)
+        if state.season is None:
+            raise ValueError(
+                f"League history entry {state.index} has no seasonId or settings"
+            )
+        # Matchups against teams missing from the payload are dropped
+        state.pending_matchups.clear()
+        return state.season
+
+    def _get_or_create_league(self, db: Session, settings: dict[str, Any]) -> League:
+        league_name = settings["name"]
+        league = STATEMENTS.first(db, "league_by_name", {"name": league_name})
+        if not league:
+            league = League(name=league_name, settings=settings)
+            db.add(league)
+            db.flush()  # Flush to get league.id
+        return league
+
+    def _get_or_create_season(self, db: Session, league: League, year: int) -> Season:
+        season = STATEMENTS.first(
+            db, "season_by_year", {"league_id": league.id, "year": year}
+        )
+        if not season:
+            season = Season(league_id=league.id, year=year)
+            db.add(season)
+            db.flush()  # Flush to get season.id
+        return season
+
+    def _get_or_create_manager(self, db: Session, member: dict[str, Any]) -> int:
+        """The ID of a member's manager, created, linked or renamed as needed."""
+        member_id = member["id"]
+        display_name = member["displayName"]
+
+        ids = self.external_ids
+        ids.load(db)
+        manager_id = ids.managers.get(member_id)
+        if manager_id is not None:
+            if ids.manager_names.get(manager_id) == display_name:
+                return manager_id
+            db.get(Manager, manager_id).name = display_name
+        elif (manager_id := ids.unlinked_managers.pop(display_name, None)) is not None:
+            # Claim a manager imported before member IDs were recorded
+            db.get(Manager, manager_id).espn_member_id = member_id
+        else:
+            manager_id = upsert(
+                db,
+                Manager,
+                {"name": display_name, "espn_member_id": member_id},
+                key=["espn_member_id"],
+                update=["name"],
+            ).id
+        ids.managers[member_id] = manager_id
+        ids.manager_names[manager_id] = display_name
+        return manager_id
+
+    def _get_or_create_franchise(
+        self, db: Session, league: League, team_data: dict[str, Any]
+    ) -> Franchise:
+        team_id = team_data["id"]
+        abbrev = team_data["abbrev"]
+
+        ids = self.external_ids
+        ids.load_league(db, league.id)
+        franchise_id = ids.franchises.get((league.id, team_id))
+        if franchise_id is None:
+            # Claim a franchise imported before team IDs were recorded
+            franchise_id = ids.unlinked_franchises.pop((league.id, abbrev), None)
+        if franchise_id is not None:
+            franchise = db.get(Franchise, franchise_id)
+            franchise.espn_team_id = team_id
+            franchise.name = abbrev
+        else:
+            franchise = upsert(
+                db,
+                Franchise,
+                {"league_id": league.id, "name": abbrev, "espn_team_id": team_id},
+                key=["league_id", "espn_team_id"],
+                update=["name"],
+            )
+        ids.franchises[league.id, team_id] = franchise.id
+        return franchise
+
+    def _import_team(
+        self,
+        db: Session,
+        league: League,
+        season: Season,
+        team_data: dict[str, Any],
+        managers_by_espn_id: dict[str, int],
+        existing: dict[int, FranchiseSeason] | None = None,
+    ) -> tuple[Franchise, FranchiseSeason | None]:
+        """Create or update the franchise and franchise-season for a team.
+
+        A franchise-season whose source hash matches the team's values is
+        left untouched.
+
+        Args:
+            existing: The season's franchise-seasons by franchise ID. When
+                given, it replaces the per-team lookup and is kept current.
+
+        Returns:
+            The franchise, and its franchise-season if the team has a known
+            owner
+        """
+        owner_ids = team_data.get("owners", [])
+        franchise = self._get_or_create_franchise(db, league, team_data)
+
+        # Get manager for this franchise (first owner)
+        manager_id = managers_by_espn_id.get(owner_ids[0]) if owner_ids else None
+        if manager_id is None:
+            return franchise, None
+
+        values: dict[str, Any] = {}
+        record = team_data.get("record", {}).get("overall")
+        if record:
+            values["regular_wins"] = record.get("wins", 0)
+            values["regular_losses"] = record.get("losses", 0)
+            values["points_for"] = record.get("pointsFor", 0.0)
+            values["points_against"] = record.get("pointsAgainst", 0.0)
+        final_rank = team_data.get("rankCalculatedFinal")
+        if final_rank:
+            values["final_standing"] = final_rank
+            values["won_championship"] = final_rank == 1
+        source_hash = row_hash(sorted(values.items()))
+
+        if existing is None:
+            franchise_season = STATEMENTS.first(
+                db,
+                "franchise_season",
+                {"franchise_id": franchise.id, "season_id": season.id},
+            )
+        else:
+            franchise_season = existing.get(franchise.id)
+        if franchise_season is not None and franchise_season.source_hash == source_hash:
+            return franchise, franchise_season
+        if not franchise_season:
+            # Create FranchiseSeason linking franchise, season, and manager
+            franchise_season = FranchiseSeason(
+                franchise_id=franchise.id,
+                season_id=season.id,
+                manager_id=manager_id,
+            )
+            db.add(franchise_season)
+            if existing is not None:
+                existing[franchise.id] = franchise_season
+
+        for column, value in values.items():
+            setattr(franchise_season, column, value)
+        franchise_season.source_hash = source_hash
+
+        db.flush()  # Flush to get franchise_season.id
+        return franchise, franchise_season
+
+    @staticmethod
+    def _summarize_matchup(matchup: dict[str, Any]) -> MatchupSummary | None:
+        """Reduce an ESPN schedule entry to what a Game needs.
+
+        Returns:
+            The summary, or None for a bye week
+        """
+        home = matchup.get("home")
+        away = matchup.get("away")
+        if not home or not away:
+            return None
+        game_type = GAME_TYPES_BY_PLAYOFF_TIER.get(
+            matchup.get("playoffTierType", "NONE"), "PLAYOFF_LOSERS"
+        )
+        return (
+            matchup["matchupPeriodId"],
+            home["teamId"],
+            away["teamId"],
+            home.get("totalPoints"),
+            away.get("totalPoints"),
+            game_type,
+        )
+
+    def _import_game(
+        self, db: Session, state: _StreamedSeason, summary: MatchupSummary
+    ) -> Game | None:
+        """Create or update the game for a matchup summary.
+
+        A game whose source hash matches the summary is left untouched.
+
+        Returns:
+            The game, or None if the season or either team has not been
+            imported yet
+        """
+        week, home_id, away_id, home_score, away_score, game_type = summary
+        franchise1 = state.franchises_by_team_id.get(home_id)
+        franchise2 = state.franchises_by_team_id.get(away_id)
+        if state.season is None or franchise1 is None or franchise2 is None:
+            return None
+
+        source_hash = row_hash((game_type, home_score, away_score))
+        key = (week, franchise1.id, franchise2.id)
+        game = state.games.get(key)
+        if game is not None and game.source_hash == source_hash:
+            return game
+        if not game:
+            game = state.games[key] = Game(
+                season_id=state.season.id,
+                week=week,
+                franchise1_id=franchise1.id,
+                franchise2_id=franchise2.id,
+            )
+            db.add(game)
+        game.game_type = game_type
+        game.franchise1_score = home_score
+        game.franchise2_score = away_score
+        game.source_hash = source_hash
+        return game
+
+
+def row_hash(values: Any) -> int:
+    """A 64-bit hash of the values imported into a row, stable across runs.
+
+    Args:
+        values: Tuples, lists, strings, numbers, booleans and None
+    """
+    digest = hashlib.blake2b(repr(values).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, signed=True)
@@ -0,0 +1,99 @@
+"""Resolve ESPN IDs to database rows without a lookup query per record.
+
+``ExternalIdCache`` bulk-loads the ESPN ID -> primary key maps of managers
+and a league's franchises once per import run; after that, resolving a
+record is a dict lookup. Rows created before ESPN IDs were
+recorded are loaded by name as well, so the importer can link them to
+their ESPN ID the first time it sees them instead of creating duplicates.
+
+New rows are written with ``upsert``, which targets the unique ESPN ID
+indexes so that concurrent imports of the same entity converge on one row.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Franchise, Manager
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(
+    db: Session,
+    model: type,
+    values: Mapping[str, Any],
+    key: Sequence[str],
+    update: Sequence[str],
+) -> Any:
+    """Insert a row, or update ``update`` columns of the row matching ``key``.
+
+    Args:
+        db: Database session
+        model: Mapped class
+        values: Column values of the row
+        key: Columns of the unique index to match on
+        update: Columns overwritten when the row already exists
+
+    Returns:
+        The inserted or updated object, loaded into the session
+    """
+    dialect = db.get_bind(model).dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    statement = _INSERTS[dialect](model).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: statement.excluded[column] for column in update},
+    )
+    return db.scalars(
+        statement.returning(model), execution_options={"populate_existing": True}
+    ).one()
+
+
+class ExternalIdCache:
+    """ESPN ID -> primary key maps, loaded once and kept current by the importer."""
+
+    def __init__(self):
+        self.managers: dict[str, int] = {}
+        # Manager ID -> name, so an unchanged manager needs no write
+        self.manager_names: dict[int, str] = {}
+        # (league ID, ESPN team ID) -> franchise ID
+        self.franchises: dict[tuple[int, int], int] = {}
+        # Rows without an ESPN ID yet, by name (franchises by league and name)
+        self.unlinked_managers: dict[str, int] = {}
+        self.unlinked_franchises: dict[tuple[int, str], int] = {}
+        self._loaded = False
+        self._loaded_leagues: set[int] = set()
+
+    def load(self, db: Session) -> None:
+        """Load the manager maps, once."""
+        if self._loaded:
+            return
+        rows = db.execute(select(Manager.id, Manager.espn_member_id, Manager.name))
+        for manager_id, member_id, name in rows:
+            if member_id is not None:
+                self.managers[member_id] = manager_id
+                self.manager_names[manager_id] = name
+            else:
+                self.unlinked_managers.setdefault(name, manager_id)
+        self._loaded = True
+
+    def load_league(self, db: Session, league_id: int) -> None:
+        """Load the franchise maps of a league, once."""
+        if league_id in self._loaded_leagues:
+            return
+        rows = db.execute(
+            select(Franchise.id, Franchise.espn_team_id, Franchise.name).where(
+                Franchise.league_id == league_id
+            )
+        )
+        for franchise_id, team_id, name in rows:
+            if team_id is not None:
+                self.franchises[league_id, team_id] = franchise_id
+            else:
+                self.unlinked_franchises.setdefault((league_id, name), franchise_id)
+        self._loaded_leagues.add(league_id)
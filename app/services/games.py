@@ -0,0 +1,86 @@
+"""Game pages, with each score placed in its league's history."""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import Game, Season
+from app.services.score_index import SCORE_INDEX, LeagueScores
+from app.statements import STATEMENTS
+
+
+def _game(game: Game, scores: LeagueScores) -> dict[str, Any]:
+    margin = (
+        abs(game.franchise1_score - game.franchise2_score)
+        if game.franchise1_score is not None and game.franchise2_score is not None
+        else None
+    )
+    return {
+        "id": game.id,
+        "season": {"id": game.season_id, "year": game.season.year},
+        "week": game.week,
+        "game_type": game.game_type,
+        "game_date": game.game_date.isoformat() if game.game_date else None,
+        "franchises": [
+            {
+                "id": franchise.id,
+                "name": franchise.name,
+                "score": scores.franchise_scores.describe(score),
+            }
+            for franchise, score in (
+                (game.franchise1, game.franchise1_score),
+                (game.franchise2, game.franchise2_score),
+            )
+        ],
+        "margin": scores.margins.describe(margin),
+    }
+
+
+def load_game(db: Session, game_id: int) -> dict[str, Any] | None:
+    """A game and its lineups, each score with its all-time league percentile.
+
+    Returns:
+        The game, or None if it does not exist
+    """
+    game: Game | None = STATEMENTS.first(db, "game", {"game_id": game_id})
+    if game is None:
+        return None
+    scores = SCORE_INDEX.league(db, game.season.league_id)
+    result = _game(game, scores)
+    lineups: dict[int, list[dict[str, Any]]] = {
+        franchise["id"]: [] for franchise in result["franchises"]
+    }
+    for lineup, player_name in STATEMENTS.execute(
+        db, "game_lineups", {"game_id": game.id, "season_id": game.season_id}
+    ):
+        lineups.setdefault(lineup.franchise_id, []).append(
+            {
+                "player": {"id": lineup.player_id, "name": player_name},
+                "position": lineup.position,
+                "score": scores.player_score(lineup.position, lineup.score),
+            }
+        )
+    for franchise in result["franchises"]:
+        franchise["lineup"] = lineups[franchise["id"]]
+    return result
+
+
+def load_season_games(
+    db: Session, season_id: int, week: int | None = None
+) -> list[dict[str, Any]] | None:
+    """A season's games, or one week's, with their scores' league percentiles.
+
+    Returns:
+        The games, or None if the season does not exist
+    """
+    season = db.get(Season, season_id)
+    if season is None:
+        return None
+    if week is None:
+        games = STATEMENTS.scalars(db, "season_games", {"season_id": season_id})
+    else:
+        games = STATEMENTS.scalars(
+            db, "season_week_games", {"season_id": season_id, "week": week}
+        )
+    scores = SCORE_INDEX.league(db, season.league_id)
+    return [_game(game, scores) for game in games]
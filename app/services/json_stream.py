@@ -0,0 +1,176 @@
+"""Incremental JSON parsing for large API payloads.
+
+``iter_items`` walks a JSON document arriving as byte chunks and yields only
+the values at the requested paths, so peak memory tracks the largest single
+record instead of the whole response. Paths use ijson-style prefixes: object
+keys joined with ``.`` and ``item`` for array elements, e.g.
+``item.teams.item`` for every team of every season in a league history list.
+"""
+
+import codecs
+import json
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+_WHITESPACE = frozenset(" \t\n\r")
+# Next character that matters when skipping over a container
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+# Remainder of a string literal after its opening quote
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Compact the buffer once this many characters have been consumed
+_COMPACT_AT = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+class _StreamParser:
+    def __init__(self, chunks: Iterable[bytes], prefixes: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.prefixes = frozenset(prefixes)
+        # Every proper ancestor of a requested path must be descended into
+        self._ancestors = {""}
+        for prefix in self.prefixes:
+            parts = prefix.split(".")
+            for i in range(1, len(parts)):
+                self._ancestors.add(".".join(parts[:i]))
+        self.root_index: int | None = None
+
+    def _fill(self) -> bool:
+        """Read another chunk into the buffer. Returns False at EOF."""
+        if self._eof:
+            return False
+        if self._pos >= _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._text.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        self._buf += self._text.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def _decode_value(self) -> Any:
+        """Decode the complete value at the cursor, reading more as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal running to the end of the buffer may
+            # continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _skip_container(self) -> None:
+        """Skip the object or array at the cursor without building it."""
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON stream")
+                continue
+            char = match.group()
+            self._pos = match.end()
+            if char == '"':
+                tail = _STRING_TAIL.match(self._buf, self._pos)
+                while tail is None:
+                    if not self._fill():
+                        raise ValueError("Unterminated string in JSON stream")
+                    tail = _STRING_TAIL.match(self._buf, self._pos)
+                self._pos = tail.end()
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def walk(self, path: str = "") -> Iterator[tuple[str, Any]]:
+        char = self._peek()
+        if path in self.prefixes:
+            yield path, self._decode_value()
+        elif char not in "[{":
+            self._decode_value()
+        elif path not in self._ancestors:
+            self._skip_container()
+        elif char == "{":
+            self._pos += 1
+            if self._peek() == "}":
+                self._pos += 1
+                return
+            while True:
+                key = self._decode_value()
+                self._expect(":")
+                yield from self.walk(f"{path}.{key}" if path else key)
+                if self._peek() == "}":
+                    self._pos += 1
+                    return
+                self._expect(",")
+        else:
+            self._pos += 1
+            if self._peek() == "]":
+                self._pos += 1
+                return
+            child = f"{path}.item" if path else "item"
+            index = 0
+            while True:
+                if not path:
+                    self.root_index = index
+                yield from self.walk(child)
+                if self._peek() == "]":
+                    self._pos += 1
+                    return
+                self._expect(",")
+                index += 1
+
+
+def iter_items(
+    chunks: Iterable[bytes], prefixes: Iterable[str]
+) -> Iterator[tuple[int | None, str, Any]]:
+    """Yield the values found at ``prefixes`` while streaming a JSON document.
+
+    Args:
+        chunks: UTF-8 encoded JSON, in chunks of any size
+        prefixes: ijson-style paths of the values to yield
+
+    Yields:
+        ``(index, path, value)`` tuples in document order, where ``index`` is
+        the position of the enclosing element of the root array (None when
+        the document root is not an array)
+
+    Raises:
+        ValueError: If the document is malformed or truncated
+    """
+    parser = _StreamParser(chunks, prefixes)
+    for path, value in parser.walk():
+        yield parser.root_index, path, value
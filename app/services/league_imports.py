@@ -0,0 +1,205 @@
+"""Import many ESPN leagues concurrently.
+
+Each league is imported on a worker thread with its own session, and so its
+own transaction(s), and its own ESPN client. The clients share one token
+bucket and circuit breaker, so together they stay within the upstream rate
+limit however many workers run. A PostgreSQL advisory lock per league keeps
+two runs, in this process or any other, from importing the same league at
+the same time; a league that is already being imported is skipped. Other
+dialects lock leagues within the process only.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.services.espn_client import ESPNClient
+from app.services.espn_importer import ESPNImporter
+from app.services.rate_limit import CircuitBreaker, TokenBucket
+from app.slow_queries import SKIP_OPTION
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MODES = ("first_season", "stream", "chunked")
+# High 32 bits of the advisory lock keys taken for league imports, so they
+# cannot collide with locks taken for anything else
+IMPORT_LOCK_NAMESPACE = 0x4553
+
+# Leagues being imported in this process, on dialects without advisory locks
+_local_import_locks: set[int] = set()
+_local_import_locks_guard = threading.Lock()
+
+
+@dataclass
+class LeagueImportResult:
+    league_id: int
+    # "imported", "locked" (another run holds the league) or "failed"
+    status: str
+    seconds: float = 0.0
+    counts: dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def records(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+def read_league_ids(lines: Iterable[str]) -> list[int]:
+    """League IDs, one per line; blank lines and ``#`` comments are skipped."""
+    league_ids = []
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            league_ids.append(int(line))
+    return league_ids
+
+
+@contextmanager
+def league_import_lock(bind: Engine, league_id: int) -> Iterator[bool]:
+    """Try to take the import lock of a league, without waiting.
+
+    The lock is a session-level advisory lock on a connection of its own, so
+    it is held across the import's commits. Other dialects have no
+    cross-process locks, so the lock only excludes runs in this process.
+
+    Yields:
+        True if the lock was taken; False if another run holds it
+    """
+    if bind.dialect.name != "postgresql":
+        with _local_import_locks_guard:
+            acquired = league_id not in _local_import_locks
+            _local_import_locks.add(league_id)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with _local_import_locks_guard:
+                    _local_import_locks.discard(league_id)
+        return
+    key = (IMPORT_LOCK_NAMESPACE << 32) | (league_id & 0xFFFFFFFF)
+    with bind.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"),
+            {"key": key},
+            execution_options={SKIP_OPTION: True},
+        ).scalar()
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": key},
+                    execution_options={SKIP_OPTION: True},
+                )
+                conn.commit()
+
+
+def import_league(
+    db: Session,
+    importer: ESPNImporter,
+    league_id: int,
+    mode: str,
+    restart: bool = False,
+    scoring_period_id: int | None = None,
+) -> dict[str, int]:
+    """Import one league with the importer method selected by ``mode``.
+
+    Returns:
+        Counts of the imported records
+    """
+    if mode == "chunked":
+        return importer.import_league_history_chunked(db, league_id, restart=restart)
+    if mode == "stream":
+        return importer.import_league_history_stream(db, league_id, scoring_period_id)
+    if mode != "first_season":
+        raise ValueError(f"Unknown import mode: {mode}")
+    result = importer.import_league_first_season(db, league_id, scoring_period_id)
+    return {
+        "seasons": 1,
+        "managers": len(result["managers"]),
+        "franchises": len(result["franchises"]),
+        "franchise_seasons": len(result["franchise_seasons"]),
+    }
+
+
+def import_leagues(
+    league_ids: Sequence[int],
+    session_factory: Callable[[], Session],
+    *,
+    mode: str = "stream",
+    workers: int = 4,
+    restart: bool = False,
+    scoring_period_id: int | None = None,
+    client_factory: Callable[..., ESPNClient] = ESPNClient,
+) -> list[LeagueImportResult]:
+    """Import ``league_ids`` with at most ``workers`` imports at a time.
+
+    A failed league is rolled back and reported; it does not stop the others.
+
+    Args:
+        league_ids: ESPN league IDs; duplicates are imported once
+        session_factory: Creates the session each league is imported in
+        mode: "first_season", "stream" or "chunked"
+        workers: Maximum number of leagues imported concurrently
+        restart: In "chunked" mode, ignore the leagues' checkpoints
+        scoring_period_id: In the other modes, the scoring period to fetch
+        client_factory: Creates each league's ESPN client; called with the
+            shared ``rate_limiter`` and ``circuit_breaker`` keyword arguments
+
+    Returns:
+        One result per league, in the order of ``league_ids``
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    rate_limiter = TokenBucket()
+    circuit_breaker = CircuitBreaker()
+
+    def run(league_id: int) -> LeagueImportResult:
+        client = client_factory(
+            rate_limiter=rate_limiter, circuit_breaker=circuit_breaker
+        )
+        db = session_factory()
+        started = time.perf_counter()
+        try:
+            with league_import_lock(db.get_bind(), league_id) as acquired:
+                if not acquired:
+                    return LeagueImportResult(league_id, "locked")
+                counts = import_league(
+                    db,
+                    ESPNImporter(client),
+                    league_id,
+                    mode,
+                    restart,
+                    scoring_period_id,
+                )
+            return LeagueImportResult(
+                league_id, "imported", time.perf_counter() - started, counts
+            )
+        except Exception as e:
+            logger.exception("Import of league %s failed", league_id)
+            db.rollback()
+            return LeagueImportResult(
+                league_id, "failed", time.perf_counter() - started, error=str(e)
+            )
+        finally:
+            db.close()
+            client.close()
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="league-import"
+    ) as executor:
+        return list(executor.map(run, dict.fromkeys(league_ids)))
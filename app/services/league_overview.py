@@ -0,0 +1,108 @@
+"""League home page data assembled from one eager-loaded object graph."""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import FranchiseSeason, League
+from app.statements import STATEMENTS
+
+
+def _iso(value) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _franchise_season(fs: FranchiseSeason) -> dict[str, Any]:
+    return {
+        "season_id": fs.season_id,
+        "year": fs.season.year,
+        "manager": {"id": fs.manager.id, "name": fs.manager.name},
+        "regular_wins": fs.regular_wins,
+        "regular_losses": fs.regular_losses,
+        "points_for": fs.points_for,
+        "points_against": fs.points_against,
+        "final_standing": fs.final_standing,
+        "won_championship": fs.won_championship,
+    }
+
+
+def load_league_overview(db: Session, league_id: int) -> dict[str, Any] | None:
+    """Load a league with its seasons, champions, franchises and managers.
+
+    The league, seasons, franchises and franchise-seasons (joined with
+    their managers) are loaded in four statements however many seasons the
+    league has; everything else is derived in Python from that graph.
+
+    Returns:
+        The overview, or None if the league does not exist
+    """
+    league: League | None = STATEMENTS.first(
+        db, "league_overview", {"league_id": league_id}
+    )
+    if league is None:
+        return None
+
+    # Seasons are already in the identity map, so fs.season needs no query
+    franchise_seasons = [
+        fs
+        for franchise in league.franchises  # type: ignore[attr-defined]
+        for fs in franchise.franchise_seasons
+    ]
+    champions = {fs.season_id: fs for fs in franchise_seasons if fs.won_championship}
+    managers = {fs.manager.id: fs.manager for fs in franchise_seasons}
+
+    seasons = []
+    for season in sorted(league.seasons, key=lambda s: s.year):  # type: ignore[attr-defined]
+        champion = champions.get(season.id)
+        seasons.append(
+            {
+                "id": season.id,
+                "year": season.year,
+                "start_date": _iso(season.start_date),
+                "end_date": _iso(season.end_date),
+                "champion": {
+                    "franchise_id": champion.franchise_id,
+                    "franchise_name": champion.franchise.name,
+                    "manager_id": champion.manager.id,
+                    "manager_name": champion.manager.name,
+                }
+                if champion
+                else None,
+            }
+        )
+
+    franchises = [
+        {
+            "id": franchise.id,
+            "name": franchise.name,
+            "seasons": [
+                _franchise_season(fs)
+                for fs in sorted(
+                    franchise.franchise_seasons, key=lambda fs: fs.season.year
+                )
+            ],
+        }
+        for franchise in league.franchises  # type: ignore[attr-defined]
+    ]
+
+    championships: dict[int, int] = {}
+    for fs in champions.values():
+        championships[fs.manager_id] = championships.get(fs.manager_id, 0) + 1
+
+    return {
+        "league": {"id": league.id, "name": league.name, "settings": league.settings},
+        "seasons": seasons,
+        "franchises": franchises,
+        "summary": {
+            "season_count": len(seasons),
+            "franchise_count": len(franchises),
+            "manager_count": len(managers),
+            "total_points": sum(fs.points_for for fs in franchise_seasons),
+            "championships_by_manager": {
+                managers[manager_id].name: count
+                for manager_id, count in sorted(
+                    championships.items(), key=lambda item: -item[1]
+                )
+            },
+        },
+    }
@@ -0,0 +1,516 @@
+"""Compact, memory-mappable snapshots of a league's games and lineups.
+
+A snapshot file holds each table as typed column arrays (``int32`` IDs,
+``float64`` scores) plus one interned string table for names and labels.
+Readers ``mmap`` the file and expose the columns as ``memoryview`` arrays
+over the mapping, so every process that opens the same snapshot shares one
+page-cached copy and loading a whole league costs no per-row Python objects.
+
+Layout::
+
+    MAGIC | uint32 header length | JSON header | padding | column data ...
+
+The JSON header records each table's row count and each column's type code
+and byte offset. Missing integers are stored as ``-1`` and missing floats
+as NaN; string columns store indexes into the string table (``-1`` for
+None). Snapshots are replaced atomically, so open readers keep a
+consistent view of the previous file until they reopen.
+"""
+
+import json
+import math
+import mmap
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    League,
+    Lineup,
+    Manager,
+    Player,
+    Season,
+)
+
+MAGIC = b"FLSNAP\x00\x01"
+VERSION = 1
+_ALIGNMENT = 8
+_HEADER_LENGTH = array("I", [0]).itemsize
+
+INT = "i"
+FLOAT = "d"
+BOOL = "B"
+STRING = "s"  # int32 index into the string table
+
+# Table name -> ordered (column, type) pairs
+SCHEMA: dict[str, tuple[tuple[str, str], ...]] = {
+    "seasons": (("id", INT), ("year", INT)),
+    "franchises": (("id", INT), ("name", STRING)),
+    "managers": (("id", INT), ("name", STRING)),
+    "players": (("id", INT), ("name", STRING), ("position", STRING)),
+    "franchise_seasons": (
+        ("id", INT),
+        ("franchise_id", INT),
+        ("season_id", INT),
+        ("manager_id", INT),
+        ("regular_wins", INT),
+        ("regular_losses", INT),
+        ("points_for", FLOAT),
+        ("points_against", FLOAT),
+        ("final_standing", INT),
+        ("won_championship", BOOL),
+    ),
+    "games": (
+        ("id", INT),
+        ("season_id", INT),
+        ("week", INT),
+        ("game_type", STRING),
+        ("franchise1_id", INT),
+        ("franchise2_id", INT),
+        ("franchise1_score", FLOAT),
+        ("franchise2_score", FLOAT),
+    ),
+    "lineups": (
+        ("id", INT),
+        ("season_id", INT),
+        ("game_id", INT),
+        ("franchise_id", INT),
+        ("player_id", INT),
+        ("score", FLOAT),
+        ("position", STRING),
+    ),
+}
+
+# Rows fetched per round trip while writing large tables
+_FETCH_SIZE = 10_000
+
+
+def snapshot_path(league_id: int, directory: str | None = None) -> Path:
+    """Path of a league's snapshot in ``directory`` or ``settings.snapshot_dir``."""
+    return Path(directory or settings.snapshot_dir) / f"league_{league_id}.snap"
+
+
+class _StringInterner:
+    def __init__(self):
+        self.indexes: dict[str, int] = {}
+
+    def __call__(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.indexes)
+        return index
+
+    def encode(self) -> tuple[array, bytes]:
+        offsets = array(INT, [0])
+        blob = bytearray()
+        for value in self.indexes:
+            blob += value.encode()
+            offsets.append(len(blob))
+        return offsets, bytes(blob)
+
+
+def _league_queries(league_id: int) -> dict[str, Any]:
+    in_league = Season.league_id == league_id
+    return {
+        "seasons": select(Season.id, Season.year).where(in_league),
+        "franchises": select(Franchise.id, Franchise.name).where(
+            Franchise.league_id == league_id
+        ),
+        "managers": select(Manager.id, Manager.name)
+        .where(
+            Manager.id.in_(
+                select(FranchiseSeason.manager_id)
+                .join(Season, Season.id == FranchiseSeason.season_id)
+                .where(in_league)
+            )
+        )
+        .order_by(Manager.id),
+        "players": select(Player.id, Player.name, Player.position)
+        .where(
+            Player.id.in_(
+                select(Lineup.player_id)
+                .join(Season, Season.id == Lineup.season_id)
+                .where(in_league)
+            )
+        )
+        .order_by(Player.id),
+        "franchise_seasons": select(
+            FranchiseSeason.id,
+            FranchiseSeason.franchise_id,
+            FranchiseSeason.season_id,
+            FranchiseSeason.manager_id,
+            FranchiseSeason.regular_wins,
+            FranchiseSeason.regular_losses,
+            FranchiseSeason.points_for,
+            FranchiseSeason.points_against,
+            FranchiseSeason.final_standing,
+            FranchiseSeason.won_championship,
+        )
+        .join(Season, Season.id == FranchiseSeason.season_id)
+        .where(in_league)
+        .order_by(FranchiseSeason.id),
+        "games": select(
+            Game.id,
+            Game.season_id,
+            Game.week,
+            Game.game_type,
+            Game.franchise1_id,
+            Game.franchise2_id,
+            Game.franchise1_score,
+            Game.franchise2_score,
+        )
+        .join(Season, Season.id == Game.season_id)
+        .where(in_league)
+        .order_by(Game.season_id, Game.week, Game.id),
+        "lineups": select(
+            Lineup.id,
+            Lineup.season_id,
+            Lineup.game_id,
+            Lineup.franchise_id,
+            Lineup.player_id,
+            Lineup.score,
+            Lineup.position,
+        )
+        .join(Season, Season.id == Lineup.season_id)
+        .where(in_league)
+        .order_by(Lineup.game_id, Lineup.id),
+    }
+
+
+def write_league_snapshot(
+    db: Session, league_id: int, path: str | os.PathLike | None = None
+) -> Path:
+    """Write a snapshot of ``league_id`` and atomically replace ``path``.
+
+    Args:
+        db: Database session
+        league_id: Database ID of the league
+        path: Destination; defaults to ``snapshot_path(league_id)``
+
+    Returns:
+        The path written
+
+    Raises:
+        ValueError: If the league does not exist
+    """
+    league = db.get(League, league_id)
+    if league is None:
+        raise ValueError(f"League {league_id} not found")
+    path = Path(path) if path is not None else snapshot_path(league_id)
+
+    intern = _StringInterner()
+    columns: dict[str, list[array]] = {}
+    for table, statement in _league_queries(league_id).items():
+        schema = SCHEMA[table]
+        arrays = [array(INT if kind == STRING else kind) for _, kind in schema]
+        result = db.execute(statement.execution_options(yield_per=_FETCH_SIZE))
+        for row in result:
+            for values, (_, kind), value in zip(arrays, schema, row, strict=True):
+                if kind == STRING:
+                    values.append(intern(value))
+                elif kind == FLOAT:
+                    values.append(math.nan if value is None else value)
+                elif value is None:
+                    values.append(-1)
+                else:
+                    values.append(int(value))
+        columns[table] = arrays
+    string_offsets, string_data = intern.encode()
+
+    # Lay out every array at an aligned offset; offsets in the header are
+    # relative to the start of the data section
+    blocks = [string_offsets.tobytes(), string_data]
+    for arrays in columns.values():
+        blocks.extend(values.tobytes() for values in arrays)
+    block_offsets = []
+    offset = 0
+    for data in blocks:
+        block_offsets.append(offset)
+        offset = _align(offset + len(data))
+    offsets = iter(block_offsets[2:])
+
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "league_id": league.id,
+        "league_name": league.name,
+        "created_at": datetime.now(UTC).isoformat(),
+        "strings": {
+            "count": len(intern.indexes),
+            "offsets": block_offsets[0],
+            "data": block_offsets[1],
+            "size": len(string_data),
+        },
+        "tables": {
+            table: {
+                "rows": len(arrays[0]),
+                "columns": {
+                    column: {"type": kind, "offset": next(offsets)}
+                    for column, kind in SCHEMA[table]
+                },
+            }
+            for table, arrays in columns.items()
+        },
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    data_start = _align(len(MAGIC) + _HEADER_LENGTH + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(MAGIC)
+            file.write(array("I", [len(header_bytes)]).tobytes())
+            file.write(header_bytes)
+            for data, offset in zip(blocks, block_offsets, strict=True):
+                file.write(b"\0" * (data_start + offset - file.tell()))
+                file.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+    return path
+
+
+def refresh_league_snapshot(db: Session, league_id: int) -> Path | None:
+    """Rewrite a league's snapshot if ``settings.snapshot_dir`` is set.
+
+    Returns:
+        The path written, or None when snapshots are disabled
+    """
+    if not settings.snapshot_dir:
+        return None
+    return write_league_snapshot(db, league_id)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class StringTable:
+    """Interned strings, decoded on access."""
+
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str | None:
+        if index < 0:
+            return None
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode()
+
+
+class SnapshotTable:
+    """Typed column arrays of one table, backed by the snapshot mapping."""
+
+    __slots__ = ("_columns", "_types", "name", "rows")
+
+    def __init__(
+        self,
+        name: str,
+        rows: int,
+        columns: dict[str, memoryview],
+        types: dict[str, str],
+    ):
+        self.name = name
+        self.rows = rows
+        self._columns = columns
+        self._types = types
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, column: str) -> memoryview:
+        """Column values as a read-only array view."""
+        return self._columns[column]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def type_of(self, column: str) -> str:
+        return self._types[column]
+
+
+class LeagueSnapshot:
+    """Read-only view of a snapshot file, mapped into memory.
+
+    Columns are ``memoryview`` arrays over the mapping, e.g.
+    ``snapshot.lineups["score"]``; string columns hold indexes that
+    ``snapshot.strings`` resolves. Close the snapshot (or use it as a
+    context manager) once no views are in use.
+    """
+
+    __slots__ = (
+        "_file",
+        "_mmap",
+        "_tables",
+        "_views",
+        "created_at",
+        "league_id",
+        "league_name",
+        "path",
+        "strings",
+    )
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._views: list[memoryview] = []
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, path: str | os.PathLike) -> "LeagueSnapshot":
+        return cls(path)
+
+    def _view(self, offset: int, size: int, type_code: str = "B") -> memoryview:
+        raw = memoryview(self._mmap)[offset : offset + size]
+        self._views.append(raw)
+        if type_code == "B":
+            return raw
+        view = raw.cast(type_code)
+        self._views.append(view)
+        return view
+
+    def _load(self) -> None:
+        start = len(MAGIC) + _HEADER_LENGTH
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a league snapshot")
+        (header_length,) = memoryview(self._mmap[len(MAGIC) : start]).cast("I")
+        header = json.loads(self._mmap[start : start + header_length])
+        data_start = _align(start + header_length)
+        if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{self.path} has an unsupported snapshot format")
+
+        self.league_id: int = header["league_id"]
+        self.league_name: str = header["league_name"]
+        self.created_at = datetime.fromisoformat(header["created_at"])
+
+        strings = header["strings"]
+        offsets_size = (strings["count"] + 1) * array(INT).itemsize
+        self.strings = StringTable(
+            self._view(data_start + strings["offsets"], offsets_size, INT),
+            self._view(data_start + strings["data"], strings["size"]),
+        )
+        self._tables: dict[str, SnapshotTable] = {}
+        for name, table in header["tables"].items():
+            rows = table["rows"]
+            columns, types = {}, {}
+            for column, spec in table["columns"].items():
+                kind = spec["type"]
+                type_code = INT if kind == STRING else kind
+                size = rows * array(type_code).itemsize
+                columns[column] = self._view(
+                    data_start + spec["offset"], size, type_code
+                )
+                types[column] = kind
+            self._tables[name] = SnapshotTable(name, rows, columns, types)
+
+    def table(self, name: str) -> SnapshotTable:
+        return self._tables[name]
+
+    @property
+    def seasons(self) -> SnapshotTable:
+        return self._tables["seasons"]
+
+    @property
+    def franchises(self) -> SnapshotTable:
+        return self._tables["franchises"]
+
+    @property
+    def managers(self) -> SnapshotTable:
+        return self._tables["managers"]
+
+    @property
+    def players(self) -> SnapshotTable:
+        return self._tables["players"]
+
+    @property
+    def franchise_seasons(self) -> SnapshotTable:
+        return self._tables["franchise_seasons"]
+
+    @property
+    def games(self) -> SnapshotTable:
+        return self._tables["games"]
+
+    @property
+    def lineups(self) -> SnapshotTable:
+        return self._tables["lineups"]
+
+    def close(self) -> None:
+        # Views must be released before the mapping can be closed
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        if getattr(self, "_mmap", None) is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A caller still holds a slice of a column; the mapping is
+                # unmapped once that slice is garbage collected
+                pass
+        self._file.close()
+
+    def __enter__(self) -> "LeagueSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_open_snapshots: dict[Path, tuple[tuple[int, int], LeagueSnapshot]] = {}
+_open_lock = threading.Lock()
+
+
+def open_league_snapshot(league_id: int) -> LeagueSnapshot | None:
+    """The current snapshot of a league, shared within this process.
+
+    The mapping is reused until the file is replaced by a newer snapshot.
+    The superseded snapshot is only dropped from the cache, not closed,
+    since other threads may still be reading it; it is unmapped once the
+    last of them lets go of it.
+
+    Returns:
+        The snapshot, or None if snapshots are disabled or the league has
+        none yet
+    """
+    if not settings.snapshot_dir:
+        return None
+    path = snapshot_path(league_id)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns)
+    with _open_lock:
+        cached = _open_snapshots.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        snapshot = LeagueSnapshot(path)
+        _open_snapshots[path] = (identity, snapshot)
+        return snapshot
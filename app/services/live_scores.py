@@ -0,0 +1,338 @@
+"""Live scores of a league's current matchups, pushed to subscribers.
+
+One poller thread per league fetches the current matchup period from ESPN
+every ``settings.live_poll_seconds`` while the league has subscribers, diffs
+it against the previous poll and fans out only the matchups whose scores
+changed. Each change is encoded as a server-sent event once and the same
+bytes are queued for every subscriber, so upstream calls and encoding do not
+grow with the number of viewers. A subscriber that falls
+``settings.live_queue_size`` events behind has its backlog replaced by a
+snapshot of the current scores.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections.abc import AsyncIterator, Callable
+from datetime import date
+from functools import cached_property
+from typing import Any
+
+from app.config import settings
+from app.metrics import REGISTRY
+from app.services.espn_client import ESPNClient
+from app.services.rate_limit import CircuitBreaker, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+LIVE_SUBSCRIBERS = REGISTRY.gauge(
+    "live_score_subscribers", "Clients subscribed to live scores"
+)
+LIVE_POLLS = REGISTRY.counter(
+    "live_score_polls", "ESPN live score polls by outcome", ["outcome"]
+)
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def current_season_year(today: date | None = None) -> int:
+    """The year of the season in progress; its playoffs run into January."""
+    today = today or date.today()
+    return today.year if today.month >= 3 else today.year - 1
+
+
+def _side(team: dict[str, Any]) -> dict[str, Any]:
+    points = team.get("totalPointsLive", team.get("totalPoints"))
+    return {"team_id": team["teamId"], "points": points}
+
+
+def summarize_scoreboard(league: dict[str, Any]) -> dict[int, dict[str, Any]]:
+    """Reduce an ESPN scoreboard to its current matchups, by matchup ID.
+
+    Byes are left out. Without ``status.currentMatchupPeriod`` every
+    matchup in the schedule is kept.
+    """
+    period = league.get("status", {}).get("currentMatchupPeriod")
+    matchups = {}
+    for matchup in league.get("schedule", ()):
+        home = matchup.get("home")
+        away = matchup.get("away")
+        if not home or not away:
+            continue
+        if period is not None and matchup.get("matchupPeriodId") != period:
+            continue
+        matchups[matchup["id"]] = {
+            "id": matchup["id"],
+            "week": matchup.get("matchupPeriodId"),
+            "home": _side(home),
+            "away": _side(away),
+            "winner": matchup.get("winner"),
+        }
+    return matchups
+
+
+def changed_matchups(
+    old: dict[int, dict[str, Any]], new: dict[int, dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """The matchups of ``new`` that differ from ``old``."""
+    return [
+        matchup for matchup_id, matchup in new.items() if old.get(matchup_id) != matchup
+    ]
+
+
+def sse_frame(event: str, data: Any, event_id: int | None = None) -> bytes:
+    """Encode one server-sent event."""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class _Scoreboard:
+    """One poll's matchups; its snapshot frame is encoded at most once."""
+
+    def __init__(self, version: int, matchups: dict[int, dict[str, Any]]):
+        self.version = version
+        self.matchups = matchups
+
+    @cached_property
+    def snapshot_frame(self) -> bytes:
+        return sse_frame(
+            "snapshot", {"matchups": list(self.matchups.values())}, self.version
+        )
+
+
+class LiveSubscription:
+    """One client's queue of encoded events."""
+
+    def __init__(
+        self,
+        hub: "LiveScores",
+        poller: "LivePoller",
+        loop: asyncio.AbstractEventLoop,
+        queue_size: int,
+    ):
+        self._hub = hub
+        self.poller = poller
+        self.loop = loop
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(max(1, queue_size))
+        self.closed = False
+
+    def deliver(self, frame: bytes, scoreboard: _Scoreboard) -> None:
+        """Queue ``frame``; call on the subscriber's event loop."""
+        if self.queue.full():
+            # Too far behind to catch up event by event; skip to the scores
+            # as of this frame
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            frame = scoreboard.snapshot_frame
+        self.queue.put_nowait(frame)
+
+    async def events(self, keepalive_seconds: float) -> AsyncIterator[bytes]:
+        """Yield encoded events, or a keepalive comment when there are none.
+
+        Unsubscribes when the iteration ends or is cancelled.
+        """
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(self.queue.get(), keepalive_seconds)
+                except TimeoutError:
+                    yield KEEPALIVE_FRAME
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._hub.unsubscribe(self)
+
+
+class LivePoller:
+    """Polls one league's scoreboard and fans changes out to its subscribers."""
+
+    def __init__(
+        self,
+        league_id: int,
+        client: ESPNClient,
+        season_id: int,
+        poll_seconds: float,
+    ):
+        self.league_id = league_id
+        self.season_id = season_id
+        self.poll_seconds = poll_seconds
+        self._client = client
+        self._subscribers: set[LiveSubscription] = set()
+        self._scoreboard: _Scoreboard | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"live-scores-{league_id}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling; the current request, if any, is allowed to finish."""
+        self._stopped.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def add(self, subscription: LiveSubscription) -> None:
+        """Subscribe, starting with a snapshot if a poll has completed."""
+        with self._lock:
+            self._subscribers.add(subscription)
+            scoreboard = self._scoreboard
+            if scoreboard is not None:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, scoreboard.snapshot_frame, scoreboard
+                )
+
+    def remove(self, subscription: LiveSubscription) -> int:
+        """Unsubscribe.
+
+        Returns:
+            The number of subscribers left
+        """
+        with self._lock:
+            self._subscribers.discard(subscription)
+            return len(self._subscribers)
+
+    def poll(self) -> None:
+        """Fetch the scoreboard once and publish what changed."""
+        league = self._client.get_league_scoreboard(self.league_id, self.season_id)
+        matchups = summarize_scoreboard(league)
+        with self._lock:
+            previous = self._scoreboard
+            if previous is None or previous.matchups.keys() != matchups.keys():
+                # First poll or a new matchup period: send everything
+                scoreboard = _Scoreboard(
+                    (previous.version + 1) if previous else 1, matchups
+                )
+                frame = scoreboard.snapshot_frame
+            else:
+                changed = changed_matchups(previous.matchups, matchups)
+                if not changed:
+                    return
+                scoreboard = _Scoreboard(previous.version + 1, matchups)
+                frame = sse_frame("scores", {"matchups": changed}, scoreboard.version)
+            self._scoreboard = scoreboard
+            # Scheduled under the lock, so every subscriber's events stay in
+            # version order
+            for subscription in self._subscribers:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, frame, scoreboard
+                )
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self.poll()
+                except Exception:
+                    LIVE_POLLS.labels("failed").inc()
+                    logger.warning(
+                        "Live score poll of league %s failed",
+                        self.league_id,
+                        exc_info=True,
+                    )
+                else:
+                    LIVE_POLLS.labels("ok").inc()
+                self._stopped.wait(self.poll_seconds)
+        finally:
+            self._client.close()
+
+
+class LiveScores:
+    """The league pollers, started by a league's first subscriber.
+
+    A league's poller stops when its last subscriber leaves. All pollers'
+    clients share one token bucket and circuit breaker.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[..., ESPNClient] = ESPNClient,
+        *,
+        poll_seconds: float | None = None,
+        season_id: int | None = None,
+        queue_size: int | None = None,
+    ):
+        """Create the hub; nothing is polled until a league's first subscriber.
+
+        Args:
+            client_factory: Creates each poller's ESPN client; called with the
+                shared ``rate_limiter`` and ``circuit_breaker`` keyword arguments
+            poll_seconds: Seconds between polls; defaults to
+                ``settings.live_poll_seconds``
+            season_id: Season (year) to poll; defaults to ``settings.live_season``
+                or else the season in progress
+            queue_size: Events a subscriber may fall behind; defaults to
+                ``settings.live_queue_size``
+        """
+        self.client_factory = client_factory
+        self.poll_seconds = poll_seconds
+        self.season_id = season_id
+        self.queue_size = queue_size
+        self._rate_limiter = TokenBucket()
+        self._circuit_breaker = CircuitBreaker()
+        self._pollers: dict[int, LivePoller] = {}
+        self._lock = threading.Lock()
+
+    def poller(self, league_id: int) -> LivePoller | None:
+        with self._lock:
+            return self._pollers.get(league_id)
+
+    def subscribe(self, league_id: int) -> LiveSubscription:
+        """Subscribe to a league's live scores; call from the event loop."""
+        loop = asyncio.get_running_loop()
+        queue_size = (
+            self.queue_size if self.queue_size is not None else settings.live_queue_size
+        )
+        with self._lock:
+            poller = self._pollers.get(league_id)
+            if poller is None:
+                poller = self._pollers[league_id] = LivePoller(
+                    league_id,
+                    self.client_factory(
+                        rate_limiter=self._rate_limiter,
+                        circuit_breaker=self._circuit_breaker,
+                    ),
+                    self.season_id or settings.live_season or current_season_year(),
+                    self.poll_seconds
+                    if self.poll_seconds is not None
+                    else settings.live_poll_seconds,
+                )
+                poller.start()
+            subscription = LiveSubscription(self, poller, loop, queue_size)
+            poller.add(subscription)
+        LIVE_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: LiveSubscription) -> None:
+        poller = subscription.poller
+        with self._lock:
+            if poller.remove(subscription) == 0 and (
+                self._pollers.get(poller.league_id) is poller
+            ):
+                del self._pollers[poller.league_id]
+                poller.stop()
+        LIVE_SUBSCRIBERS.dec()
+
+    def close(self) -> None:
+        """Stop every poller."""
+        with self._lock:
+            pollers = list(self._pollers.values())
+            self._pollers.clear()
+        for poller in pollers:
+            poller.stop()
+
+
+LIVE_SCORES = LiveScores()
@@ -0,0 +1,100 @@
+"""Manager career pages and leaderboards, read from the career aggregates."""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import Manager, ManagerCareer, ManagerOpponentRecord
+from app.statements import LEADERBOARD_ORDER, STATEMENTS
+
+LEADERBOARD_SORTS = tuple(LEADERBOARD_ORDER)
+
+
+def _win_pct(wins: int, losses: int, ties: int = 0) -> float:
+    games = wins + losses + ties
+    return round((wins + ties / 2) / games, 4) if games else 0.0
+
+
+def _career(career: ManagerCareer | None) -> dict[str, Any]:
+    if career is None:
+        career = ManagerCareer(
+            seasons=0,
+            franchises=0,
+            regular_wins=0,
+            regular_losses=0,
+            playoff_wins=0,
+            playoff_losses=0,
+            points_for=0.0,
+            points_against=0.0,
+            championships=0,
+            earnings=0.0,
+        )
+    wins = career.regular_wins + career.playoff_wins
+    losses = career.regular_losses + career.playoff_losses
+    return {
+        "seasons": career.seasons,
+        "franchises": career.franchises,
+        "first_year": career.first_year,
+        "last_year": career.last_year,
+        "regular_wins": career.regular_wins,
+        "regular_losses": career.regular_losses,
+        "playoff_wins": career.playoff_wins,
+        "playoff_losses": career.playoff_losses,
+        "wins": wins,
+        "losses": losses,
+        "win_pct": _win_pct(wins, losses),
+        "points_for": career.points_for,
+        "points_against": career.points_against,
+        "championships": career.championships,
+        "best_finish": career.best_finish,
+        "earnings": career.earnings,
+    }
+
+
+def _opponent(record: ManagerOpponentRecord, name: str) -> dict[str, Any]:
+    return {
+        "manager_id": record.opponent_id,
+        "manager_name": name,
+        "games": record.games,
+        "wins": record.wins,
+        "losses": record.losses,
+        "ties": record.ties,
+        "win_pct": _win_pct(record.wins, record.losses, record.ties),
+        "points_for": record.points_for,
+        "points_against": record.points_against,
+    }
+
+
+def load_manager_career(db: Session, manager_id: int) -> dict[str, Any] | None:
+    """A manager's career totals and record against every opponent.
+
+    Returns:
+        The career, or None if the manager does not exist
+    """
+    manager = db.get(Manager, manager_id)
+    if manager is None:
+        return None
+    row = STATEMENTS.execute(db, "manager_career", {"manager_id": manager_id}).first()
+    opponents = STATEMENTS.execute(db, "manager_opponents", {"manager_id": manager_id})
+    return {
+        "manager": {"id": manager.id, "name": manager.name},
+        "career": _career(row[0] if row else None),
+        "opponents": [_opponent(record, name) for record, name in opponents],
+    }
+
+
+def load_manager_leaderboard(
+    db: Session, sort: str = "championships", limit: int = 50
+) -> list[dict[str, Any]]:
+    """Managers ranked by ``sort``, one of ``LEADERBOARD_SORTS``."""
+    if sort not in LEADERBOARD_ORDER:
+        raise ValueError(f"Unknown leaderboard sort {sort}")
+    rows = STATEMENTS.execute(db, f"manager_leaderboard_{sort}", {"limit": limit})
+    return [
+        {
+            "rank": rank,
+            "manager": {"id": career.manager_id, "name": name},
+            **_career(career),
+        }
+        for rank, (career, name) in enumerate(rows, start=1)
+    ]
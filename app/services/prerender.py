@@ -0,0 +1,232 @@
+"""Prerender league history as static, gzipped JSON files.
+
+``prerender`` requests every league, season, game, franchise and manager
+page from the API in-process and writes each response to
+``<directory>/<route>/index.json.gz``, so ``/leagues/1/overview`` becomes
+``leagues/1/overview/index.json.gz``. A static file server that serves
+precompressed files (e.g. nginx with ``gzip_static``) can then answer those
+routes without the API or the database. Leagues are rendered in parallel on
+a process pool. After an import, only the imported leagues' pages and the
+pages that list every league or manager are rendered again. Pages are read
+from the primary, since the replicas may not have caught up with the
+import yet.
+
+``/managers`` and ``/streaks`` are rendered with their default query
+parameters only: the championship leaderboard, and the longest franchise
+career win streaks. The static server should pass requests for those routes
+with a query string to the API. Players have no pages in the API, so none
+are rendered.
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import tempfile
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from app.config import settings
+from app.database import SessionLocal, engine, reads_on_primary, replicas
+from app.statements import STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+LEAGUE_PAGES = (
+    "/leagues/{league_id}/overview",
+    "/leagues/{league_id}/franchises",
+    "/leagues/{league_id}/seasons",
+)
+SEASON_PAGES = (
+    "/seasons/{season_id}/games",
+    "/seasons/{season_id}/standings",
+    "/seasons/{season_id}/standings/timeline",
+)
+GAME_PAGES = ("/games/{game_id}",)
+FRANCHISE_PAGES = ("/franchises/{franchise_id}/streaks",)
+MANAGER_PAGES = ("/managers/{manager_id}/career", "/managers/{manager_id}/streaks")
+# Pages spanning every league, rendered again whenever any league is
+# rendered; with their default query parameters only
+GLOBAL_PAGES = ("/leagues", "/managers", "/streaks")
+
+
+def page_path(directory: str | Path, route: str) -> Path:
+    """Where the page of ``route`` is written under ``directory``."""
+    return Path(directory) / route.strip("/") / "index.json.gz"
+
+
+def league_routes(league_id: int) -> list[str]:
+    """Routes of every page of a league, its seasons, games, franchises and managers."""
+    params = {"league_id": league_id}
+    with SessionLocal() as db:
+        ids = {
+            "season_id": STATEMENTS.scalars(db, "league_season_ids", params),
+            "game_id": STATEMENTS.scalars(db, "league_game_ids", params),
+            "franchise_id": STATEMENTS.scalars(db, "league_franchise_ids", params),
+            "manager_id": STATEMENTS.scalars(db, "league_manager_ids", params),
+        }
+    routes = [route.format(league_id=league_id) for route in LEAGUE_PAGES]
+    for name, pages in (
+        ("season_id", SEASON_PAGES),
+        ("game_id", GAME_PAGES),
+        ("franchise_id", FRANCHISE_PAGES),
+        ("manager_id", MANAGER_PAGES),
+    ):
+        routes += [route.format(**{name: id_}) for id_ in ids[name] for route in pages]
+    return routes
+
+
+async def _get(app, route: str) -> tuple[int, bytes]:
+    """Send a GET for ``route`` straight to the ASGI ``app``."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("prerender", 80),
+        "client": None,
+        "root_path": "",
+        "path": route,
+        "raw_path": route.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"prerender")],
+    }
+    status = 500
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, bytes(body)
+
+
+def write_page(path: Path, body: bytes) -> bool:
+    """Write a page atomically, unless it already has this content.
+
+    Returns:
+        True if the file was written
+    """
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    try:
+        if path.read_bytes() == compressed:
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def render_routes(directory: str | Path, routes: Sequence[str]) -> Counter[str]:
+    """Render ``routes`` through the API and write their pages.
+
+    A route that now returns 404 has its page removed. The API reads from
+    the primary meanwhile.
+
+    Returns:
+        Counts of the pages rendered, written (new or changed) and removed
+    """
+    from app.main import app  # the API imports the services, not vice versa
+
+    async def run() -> Counter[str]:
+        counts: Counter[str] = Counter()
+        for route in routes:
+            status, body = await _get(app, route)
+            path = page_path(directory, route)
+            counts["pages"] += 1
+            if status == 200:
+                counts["written"] += write_page(path, body)
+            elif status == 404:
+                if path.exists():
+                    path.unlink()
+                    counts["removed"] += 1
+            else:
+                logger.warning("Prerendering %s returned %s", route, status)
+                counts["failed"] += 1
+        return counts
+
+    with reads_on_primary():
+        return asyncio.run(run())
+
+
+def render_league(directory: str | Path, league_id: int) -> Counter[str]:
+    """Render every page of one league."""
+    return render_routes(directory, league_routes(league_id))
+
+
+def _init_worker() -> None:
+    # Connections inherited from the parent process must not be reused
+    engine.dispose(close=False)
+    for replica in replicas.engines:
+        replica.dispose(close=False)
+
+
+def prerender(
+    directory: str | Path | None = None,
+    league_ids: Iterable[int] | None = None,
+    workers: int = 1,
+) -> Counter[str]:
+    """Render the pages of ``league_ids`` (default: every league).
+
+    Args:
+        directory: Root of the page tree; defaults to ``settings.prerender_dir``
+        league_ids: Database IDs of the leagues to render
+        workers: Processes rendering leagues in parallel; 1 renders in this
+            process
+
+    Returns:
+        Counts of the pages rendered, written, removed and failed
+    """
+    directory = directory or settings.prerender_dir
+    if not directory:
+        raise ValueError("No prerender directory given and PRERENDER_DIR is not set")
+    if league_ids is None:
+        with SessionLocal() as db:
+            league_ids = STATEMENTS.scalars(db, "league_ids")
+    league_ids = list(dict.fromkeys(league_ids))
+
+    counts: Counter[str] = Counter()
+    if workers > 1 and len(league_ids) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(league_ids)), initializer=_init_worker
+        ) as executor:
+            for league_counts in executor.map(
+                partial(render_league, directory), league_ids
+            ):
+                counts.update(league_counts)
+    else:
+        for league_id in league_ids:
+            counts.update(render_league(directory, league_id))
+    counts.update(render_routes(directory, GLOBAL_PAGES))
+    return counts
+
+
+def refresh_league_pages(league_ids: Iterable[int]) -> Counter[str] | None:
+    """Render the pages of imported leagues if ``settings.prerender_dir`` is set.
+
+    Returns:
+        The counts, or None when prerendering is disabled or no league was
+        imported
+    """
+    league_ids = list(league_ids)
+    if not settings.prerender_dir or not league_ids:
+        return None
+    return prerender(settings.prerender_dir, league_ids)
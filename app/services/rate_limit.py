@@ -0,0 +1,244 @@
+"""Rate limiting, backoff and circuit breaking for outbound HTTP calls."""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+from app.metrics import REGISTRY
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase/multiplicative-decrease.
+
+    One bucket can be shared by any number of clients or threads so that all
+    of them together stay under the upstream rate limit. When the upstream
+    answers 429, ``penalize`` halves the refill rate; every success nudges it
+    back up towards ``max_rate``, so the bucket settles on the fastest rate
+    the upstream will sustain.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        capacity: float | None = None,
+        min_rate: float = 0.2,
+        max_rate: float | None = None,
+        increase: float = 0.1,
+    ):
+        """Initialize the bucket.
+
+        Args:
+            rate: Initial refill rate in tokens per second
+            capacity: Maximum burst size. Defaults to ``rate``.
+            min_rate: Lower bound for the refill rate after penalties
+            max_rate: Upper bound for the refill rate. Defaults to ``rate``.
+            increase: Tokens per second added back after each success
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting for the token
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, retry_after: float | None = None) -> None:
+        """Slow down after the upstream throttled us.
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait, if any
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + retry_after
+                )
+
+    def reward(self) -> None:
+        """Speed back up after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. After that a single
+    trial call is let through (half-open); its outcome closes or re-opens the
+    circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open"."""
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Reject the call if the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a trial call is running
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                raise CircuitOpenError("ESPN circuit breaker is open")
+            if state == "half_open":
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Record a failed call.
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                return True
+            return False
+
+
+# Process-wide totals across every ClientMetrics instance
+_CLIENT_COUNTERS = {
+    name: REGISTRY.counter(f"espn_client_{name}", documentation)
+    for name, documentation in (
+        ("requests", "ESPN API attempts, including retries"),
+        ("retries", "ESPN API attempts that were retried"),
+        ("throttled", "ESPN API responses with status 429"),
+        ("failures", "ESPN API attempts that failed"),
+        ("circuit_opened", "Times the ESPN circuit breaker opened"),
+        ("rate_limit_wait_seconds", "Seconds spent waiting on the rate limiter"),
+        ("backoff_seconds", "Seconds spent backing off between retries"),
+    )
+}
+
+
+@dataclass
+class ClientMetrics:
+    """Counters describing how a client has been treated by the upstream.
+
+    Every increment is also added to the process-wide ``espn_client_*``
+    counters in the metrics registry.
+    """
+
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    circuit_opened: int = 0
+    rate_limit_wait_seconds: float = 0.0
+    backoff_seconds: float = 0.0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+        _CLIENT_COUNTERS[name].inc(amount)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "failures": self.failures,
+                "circuit_opened": self.circuit_opened,
+                "rate_limit_wait_seconds": self.rate_limit_wait_seconds,
+                "backoff_seconds": self.backoff_seconds,
+            }
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay ceiling for the first retry, in seconds
+        cap: Maximum delay ceiling, in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except ValueError:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
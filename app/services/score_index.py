@@ -0,0 +1,208 @@
+"""All-time percentiles and ranks of weekly scores, from an in-process index.
+
+Each league's franchise scores, winning margins and per-position player
+scores are kept as sorted arrays, so where a score stands in league history
+is two binary searches instead of a window query over every game. A
+league's index is built on first use and dropped after a commit that writes
+games or lineups; after ``settings.score_index_ttl_seconds`` it is rebuilt
+so writes made by other processes show up too.
+
+Leagues with a snapshot in ``settings.snapshot_dir`` are built from its
+column arrays instead of the database, and rebuilt as soon as an import
+replaces the snapshot.
+"""
+
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Game, Lineup
+from app.services.league_snapshot import LeagueSnapshot, open_league_snapshot
+from app.statements import STATEMENTS
+
+
+class SortedScores:
+    """Scores in ascending order, with O(log n) percentile and rank lookups."""
+
+    __slots__ = ("_scores",)
+
+    def __init__(self, scores: Iterable[float] = ()):
+        self._scores = array("d", sorted(scores))
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def percentile(self, score: float) -> float | None:
+        """Percentage of the scores that ``score`` beats, counting ties as half.
+
+        Returns:
+            The percentile from 0 to 100, or None if there are no scores
+        """
+        if not self._scores:
+            return None
+        below = bisect_left(self._scores, score)
+        tied = bisect_right(self._scores, score) - below
+        return round(100 * (below + tied / 2) / len(self._scores), 1)
+
+    def rank(self, score: float) -> int:
+        """1 for the highest score; tied scores share the better rank."""
+        return len(self._scores) - bisect_right(self._scores, score) + 1
+
+    def describe(self, score: float | None) -> dict[str, Any]:
+        """``score`` with its percentile, rank and the number of scores."""
+        if score is None:
+            return {"value": None, "percentile": None, "rank": None, "of": len(self)}
+        return {
+            "value": score,
+            "percentile": self.percentile(score),
+            "rank": self.rank(score),
+            "of": len(self),
+        }
+
+
+@dataclass
+class LeagueScores:
+    """The sorted scores of every scored game and lineup slot in a league."""
+
+    franchise_scores: SortedScores = field(default_factory=SortedScores)
+    # Winner's score minus loser's, one per game
+    margins: SortedScores = field(default_factory=SortedScores)
+    player_scores: dict[str, SortedScores] = field(default_factory=dict)
+
+    def player_score(self, position: str | None, score: float | None) -> dict[str, Any]:
+        """``score`` among all scores at ``position``."""
+        return self.player_scores.get(position or "", SortedScores()).describe(score)
+
+
+class ScoreIndex:
+    """Every league's sorted scores, built on first use and rebuilt when stale."""
+
+    def __init__(self, ttl_seconds: float | None = None):
+        self.ttl_seconds = ttl_seconds
+        # League ID -> (scores, build time, snapshot they were built from)
+        self._leagues: dict[int, tuple[LeagueScores, float, LeagueSnapshot | None]] = {}
+        self._lock = threading.Lock()
+        # One build per league at a time; concurrent misses wait for it
+        self._build_locks: dict[int, threading.Lock] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._leagues.clear()
+
+    def _cached(
+        self, league_id: int, snapshot: LeagueSnapshot | None, ttl: float
+    ) -> LeagueScores | None:
+        with self._lock:
+            cached = self._leagues.get(league_id)
+        if (
+            cached is not None
+            and cached[2] is snapshot
+            and time.monotonic() - cached[1] <= ttl
+        ):
+            return cached[0]
+        return None
+
+    def league(self, db: Session, league_id: int) -> LeagueScores:
+        ttl = (
+            self.ttl_seconds
+            if self.ttl_seconds is not None
+            else settings.score_index_ttl_seconds
+        )
+        snapshot = open_league_snapshot(league_id)
+        scores = self._cached(league_id, snapshot, ttl)
+        if scores is not None:
+            return scores
+        with self._lock:
+            build_lock = self._build_locks.setdefault(league_id, threading.Lock())
+        with build_lock:
+            # Another caller may have built it while this one waited
+            snapshot = open_league_snapshot(league_id)
+            scores = self._cached(league_id, snapshot, ttl)
+            if scores is not None:
+                return scores
+            if snapshot is not None:
+                scores = self._build_from_snapshot(snapshot)
+            else:
+                scores = self._build(db, league_id)
+            with self._lock:
+                self._leagues[league_id] = (scores, time.monotonic(), snapshot)
+        return scores
+
+    @staticmethod
+    def _build(db: Session, league_id: int) -> LeagueScores:
+        params = {"league_id": league_id}
+        franchise_scores: list[float] = []
+        margins: list[float] = []
+        for score1, score2 in STATEMENTS.execute(db, "league_game_scores", params):
+            franchise_scores += (score1, score2)
+            margins.append(abs(score1 - score2))
+        by_position: dict[str, list[float]] = {}
+        for position, score in STATEMENTS.execute(db, "league_lineup_scores", params):
+            by_position.setdefault(position or "", []).append(score)
+        return LeagueScores(
+            SortedScores(franchise_scores),
+            SortedScores(margins),
+            {
+                position: SortedScores(scores)
+                for position, scores in by_position.items()
+            },
+        )
+
+    @staticmethod
+    def _build_from_snapshot(snapshot: LeagueSnapshot) -> LeagueScores:
+        franchise_scores: list[float] = []
+        margins: list[float] = []
+        games = snapshot.games
+        for score1, score2 in zip(
+            games["franchise1_score"], games["franchise2_score"], strict=True
+        ):
+            # Missing scores are stored as NaN
+            if not (math.isnan(score1) or math.isnan(score2)):
+                franchise_scores += (score1, score2)
+                margins.append(abs(score1 - score2))
+        by_index: dict[int, list[float]] = {}
+        lineups = snapshot.lineups
+        for position, score in zip(lineups["position"], lineups["score"], strict=True):
+            if not math.isnan(score):
+                by_index.setdefault(position, []).append(score)
+        return LeagueScores(
+            SortedScores(franchise_scores),
+            SortedScores(margins),
+            {
+                snapshot.strings[index] or "": SortedScores(scores)
+                for index, scores in by_index.items()
+            },
+        )
+
+
+SCORE_INDEX = ScoreIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_changed_scores(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Game, Lineup)) and (
+            obj not in session.dirty or session.is_modified(obj)
+        ):
+            session.info["scores_stale"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_score_index(session):
+    if session.info.pop("scores_stale", False):
+        SCORE_INDEX.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_scores(session):
+    session.info.pop("scores_stale", None)
@@ -0,0 +1,326 @@
+"""Autocomplete search over players, managers and franchises.
+
+Short single-word queries, the hottest and least selective ones, are
+answered from an in-process prefix trie over every word of every name,
+whose nodes keep their best matches precomputed, so a lookup is a walk of
+at most ``TRIE_DEPTH`` nodes. Longer queries go to the database: with
+``pg_trgm`` installed they match substrings and near-misses through the
+GIN trigram indexes, ranked by similarity; otherwise they match name and
+word prefixes.
+
+The trie is rebuilt in the background after a commit that changes a
+searchable name, and after ``settings.search_index_ttl_seconds`` so changes
+made by other processes show up too; lookups keep using the previous trie
+until its replacement is ready.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any
+
+from sqlalchemy import (
+    Integer,
+    String,
+    case,
+    event,
+    func,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Franchise, Manager, Player
+from app.trigram import trigram_installed
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("player", "manager", "franchise")
+# Queries up to this many characters are answered from the trie
+TRIE_DEPTH = 4
+# Matches kept per trie node, and so the largest limit the trie can serve
+TRIE_RESULTS = 10
+MAX_RESULTS = 50
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    kind: str
+    id: int
+    name: str
+    position: str | None = None
+    league_id: int | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"type": self.kind, "id": self.id, "name": self.name}
+        if self.kind == "player":
+            result["position"] = self.position
+        elif self.kind == "franchise":
+            result["league_id"] = self.league_id
+        return result
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class _TrieNode:
+    __slots__ = ("children", "results")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.results: list = []
+
+
+class PrefixTrie:
+    """Prefixes of words, up to ``depth`` characters, mapped to ranked matches."""
+
+    __slots__ = ("depth", "limit", "root")
+
+    def __init__(self, depth: int = TRIE_DEPTH, limit: int = TRIE_RESULTS):
+        self.depth = depth
+        self.limit = limit
+        self.root = _TrieNode()
+
+    def add(self, result: SearchResult) -> None:
+        """Index every word of ``result.name``; call ``finish`` once all are added."""
+        name = normalize(result.name)
+        kind = KINDS.index(result.kind)
+        # Each node lists a name once, under the first of its words to reach it
+        reached = set()
+        for position, word in enumerate(name.split()):
+            # Names starting with the prefix rank before names with a later
+            # word starting with it, then shorter names first
+            rank = (position > 0, len(name), name, kind, result.id)
+            node = self.root
+            for char in word[: self.depth]:
+                node = node.children.setdefault(char, _TrieNode())
+                if id(node) not in reached:
+                    reached.add(id(node))
+                    node.results.append((rank, result))
+
+    def finish(self) -> None:
+        """Keep only each node's best ``limit`` matches."""
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            node.results = [
+                result
+                for _, result in heapq.nsmallest(
+                    self.limit, node.results, key=itemgetter(0)
+                )
+            ]
+            nodes.extend(node.children.values())
+
+    def search(self, prefix: str) -> list[SearchResult]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.results
+
+
+class SearchIndex:
+    """The prefix trie of all searchable names, rebuilt when stale.
+
+    The first lookup builds the trie. Once it is invalidated or older than
+    the TTL, lookups keep using it while a background thread builds its
+    replacement.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None):
+        self.ttl_seconds = ttl_seconds
+        self._trie: PrefixTrie | None = None
+        self._built_at = 0.0
+        self._stale = False
+        self._refreshing = False
+        # Bumped by invalidate, so a trie built from older data stays stale
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Held while the first trie is built; later builds run in the background
+        self._first_build_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stale = True
+            self._generation += 1
+
+    def serves(self, query: str, limit: int) -> bool:
+        """Whether ``lookup`` can answer ``query`` (already normalized)."""
+        return len(query) <= TRIE_DEPTH and " " not in query and limit <= TRIE_RESULTS
+
+    def lookup(self, db: Session, query: str, limit: int) -> list[SearchResult]:
+        return self._current(db).search(query)[:limit]
+
+    def _current(self, db: Session) -> PrefixTrie:
+        ttl = (
+            self.ttl_seconds
+            if self.ttl_seconds is not None
+            else settings.search_index_ttl_seconds
+        )
+        with self._lock:
+            trie = self._trie
+            generation = self._generation
+            refresh = (
+                trie is not None
+                and not self._refreshing
+                and (self._stale or time.monotonic() - self._built_at > ttl)
+            )
+            if refresh:
+                self._refreshing = True
+        if trie is None:
+            return self._build_first(db)
+        if refresh:
+            threading.Thread(
+                target=self._refresh,
+                args=(db.get_bind(Player), generation),
+                name="search-index-refresh",
+                daemon=True,
+            ).start()
+        return trie
+
+    def _build_first(self, db: Session) -> PrefixTrie:
+        with self._first_build_lock:
+            with self._lock:
+                trie = self._trie
+                generation = self._generation
+            if trie is None:
+                trie = self._build(db)
+                self._install(trie, generation)
+            return trie
+
+    def _install(self, trie: PrefixTrie, generation: int) -> None:
+        with self._lock:
+            self._trie = trie
+            self._built_at = time.monotonic()
+            # Names changed while it was built need another refresh
+            self._stale = generation != self._generation
+
+    def _refresh(self, bind, generation: int) -> None:
+        try:
+            with Session(bind) as db:
+                self._install(self._build(db), generation)
+        except Exception:
+            logger.exception("Could not rebuild the search index")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _build(self, db: Session) -> PrefixTrie:
+        trie = PrefixTrie()
+        for player_id, name, position in db.execute(
+            select(Player.id, Player.name, Player.position)
+        ):
+            trie.add(SearchResult("player", player_id, name, position=position))
+        for manager_id, name in db.execute(select(Manager.id, Manager.name)):
+            trie.add(SearchResult("manager", manager_id, name))
+        for franchise_id, name, league_id in db.execute(
+            select(Franchise.id, Franchise.name, Franchise.league_id)
+        ):
+            trie.add(SearchResult("franchise", franchise_id, name, league_id=league_id))
+        trie.finish()
+        return trie
+
+
+SEARCH_INDEX = SearchIndex()
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_statement(query: str, limit: int, trigram: bool):
+    escaped = _escape_like(query)
+    branches = []
+    for kind, model, position, league_id in (
+        ("player", Player, Player.position, literal(None, Integer)),
+        ("manager", Manager, literal(None, String), literal(None, Integer)),
+        ("franchise", Franchise, literal(None, String), Franchise.league_id),
+    ):
+        name = model.name
+        if trigram:
+            score = func.similarity(name, query)
+            matches = or_(name.op("%")(query), name.ilike(f"%{escaped}%", escape="\\"))
+        else:
+            lowered = func.lower(name)
+            starts = lowered.like(f"{escaped}%", escape="\\")
+            score = case((starts, 1.0), else_=0.5)
+            matches = or_(starts, lowered.like(f"% {escaped}%", escape="\\"))
+        branch = (
+            select(
+                literal(kind).label("kind"),
+                model.id.label("id"),
+                name.label("name"),
+                position.label("position"),
+                league_id.label("league_id"),
+                score.label("score"),
+            )
+            .where(matches)
+            .order_by(score.desc(), func.length(name), name)
+            .limit(limit)
+            .subquery()
+        )
+        branches.append(select(branch))
+    combined = union_all(*branches).subquery()
+    return (
+        select(combined)
+        .order_by(
+            combined.c.score.desc(), func.length(combined.c.name), combined.c.name
+        )
+        .limit(limit)
+    )
+
+
+def search(db: Session, query: str, limit: int = TRIE_RESULTS) -> list[SearchResult]:
+    """Players, managers and franchises whose names match ``query``, best first."""
+    query = normalize(query)
+    limit = min(limit, MAX_RESULTS)
+    if not query:
+        return []
+    if SEARCH_INDEX.serves(query, limit):
+        return SEARCH_INDEX.lookup(db, query, limit)
+
+    trigram = trigram_installed(db.connection())
+    rows = db.execute(_search_statement(query, limit, trigram))
+    return [
+        SearchResult(row.kind, row.id, row.name, row.position, row.league_id)
+        for row in rows
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _note_renamed_entities(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Player, Manager, Franchise)) and (
+            obj not in session.dirty or session.is_modified(obj)
+        ):
+            session.info["search_stale"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_upserted_entities(orm_execute_state):
+    # Bulk INSERT/UPDATE statements bypass the flush
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_insert or orm_execute_state.is_update) and (
+        mapper is not None and mapper.class_ in (Player, Manager, Franchise)
+    ):
+        orm_execute_state.session.info["search_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_search_index(session):
+    if session.info.pop("search_stale", False):
+        SEARCH_INDEX.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_renamed_entities(session):
+    session.info.pop("search_stale", None)
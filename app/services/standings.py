@@ -0,0 +1,95 @@
+"""Season standings as of any week and over time, read from ``week_standing``."""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import Season, WeekStanding
+from app.statements import STATEMENTS
+
+
+def _season(season: Season) -> dict[str, Any]:
+    return {"id": season.id, "year": season.year, "league_id": season.league_id}
+
+
+def _standing(standing: WeekStanding, name: str) -> dict[str, Any]:
+    return {
+        "rank": standing.rank,
+        "franchise": {"id": standing.franchise_id, "name": name},
+        "wins": standing.wins,
+        "losses": standing.losses,
+        "ties": standing.ties,
+        "points_for": standing.points_for,
+        "points_against": standing.points_against,
+    }
+
+
+def load_standings(
+    db: Session, season_id: int, week: int | None = None
+) -> dict[str, Any] | None:
+    """A season's standings after ``week``, or after its latest week.
+
+    A week without games, e.g. past the end of the regular season, gets the
+    standings of the last week before it that had games.
+
+    Returns:
+        The standings, or None if the season does not exist
+    """
+    season = db.get(Season, season_id)
+    if season is None:
+        return None
+    if week is None:
+        rows = STATEMENTS.execute(db, "week_standings_latest", {"season_id": season_id})
+    else:
+        rows = STATEMENTS.execute(
+            db, "week_standings_as_of", {"season_id": season_id, "week": week}
+        )
+    rows = rows.all()
+    return {
+        "season": _season(season),
+        "week": rows[0][0].week if rows else None,
+        "standings": [_standing(standing, name) for standing, name in rows],
+    }
+
+
+def load_standings_timeline(db: Session, season_id: int) -> dict[str, Any] | None:
+    """Every franchise's rank, record and points after each week of a season.
+
+    Franchises are ordered by their rank after the latest week, and each
+    series has one entry per week in ``weeks``.
+
+    Returns:
+        The timeline, or None if the season does not exist
+    """
+    season = db.get(Season, season_id)
+    if season is None:
+        return None
+    weeks: list[int] = []
+    series: dict[int, dict[str, Any]] = {}
+    for standing, name in STATEMENTS.execute(
+        db, "week_standings_timeline", {"season_id": season_id}
+    ):
+        if not weeks or weeks[-1] != standing.week:
+            weeks.append(standing.week)
+        entry = series.setdefault(
+            standing.franchise_id,
+            {
+                "franchise": {"id": standing.franchise_id, "name": name},
+                "ranks": [],
+                "wins": [],
+                "losses": [],
+                "points_for": [],
+            },
+        )
+        entry["ranks"].append(standing.rank)
+        entry["wins"].append(standing.wins)
+        entry["losses"].append(standing.losses)
+        entry["points_for"].append(standing.points_for)
+    return {
+        "season": _season(season),
+        "weeks": weeks,
+        "franchises": sorted(
+            series.values(),
+            key=lambda entry: (entry["ranks"][-1], entry["franchise"]["name"]),
+        ),
+    }
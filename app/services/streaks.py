@@ -0,0 +1,76 @@
+"""Streak records and per-franchise and per-manager streaks, read from ``streak``."""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models import Franchise, Manager, Streak
+from app.models.streak import STREAK_KINDS, STREAK_SCOPES, STREAK_SPANS
+from app.statements import STATEMENTS
+
+_SUBJECTS = {"franchise": Franchise, "manager": Manager}
+
+
+def _streak(streak: Streak) -> dict[str, Any]:
+    return {
+        "kind": streak.kind,
+        "length": streak.length,
+        "start": {"year": streak.start_year, "week": streak.start_week},
+        "end": {"year": streak.end_year, "week": streak.end_week},
+        "active": streak.active,
+    }
+
+
+def load_streak_records(
+    db: Session,
+    scope: str = "franchise",
+    kind: str = "win",
+    span: str = "career",
+    active: bool = False,
+    limit: int = 25,
+) -> list[dict[str, Any]]:
+    """The longest streaks of ``kind``, optionally only those still going."""
+    if scope not in STREAK_SCOPES:
+        raise ValueError(f"Unknown streak scope {scope}")
+    if kind not in STREAK_KINDS:
+        raise ValueError(f"Unknown streak kind {kind}")
+    if span not in STREAK_SPANS:
+        raise ValueError(f"Unknown streak span {span}")
+    name = f"{scope}_active_streak_records" if active else f"{scope}_streak_records"
+    rows = STATEMENTS.execute(db, name, {"span": span, "kind": kind, "limit": limit})
+    return [
+        {
+            "rank": rank,
+            scope: {"id": streak.subject_id, "name": subject_name},
+            **_streak(streak),
+        }
+        for rank, (streak, subject_name) in enumerate(rows, start=1)
+    ]
+
+
+def load_streaks(db: Session, scope: str, subject_id: int) -> dict[str, Any] | None:
+    """A franchise's or manager's current streak and longest streaks.
+
+    Returns:
+        The streaks, or None if the franchise or manager does not exist
+    """
+    subject = db.get(_SUBJECTS[scope], subject_id)
+    if subject is None:
+        return None
+    longest: dict[str, dict[str, Any]] = {
+        span: dict.fromkeys(STREAK_KINDS) for span in STREAK_SPANS
+    }
+    current = None
+    # Longest first, so the first streak of each span and kind is its longest
+    for streak in STATEMENTS.scalars(
+        db, "subject_streaks", {"scope": scope, "subject_id": subject_id}
+    ):
+        if longest[streak.span][streak.kind] is None:
+            longest[streak.span][streak.kind] = _streak(streak)
+        if streak.active and streak.span == "career":
+            current = _streak(streak)
+    return {
+        scope: {"id": subject.id, "name": subject.name},
+        "current": current,
+        "longest": longest,
+    }
@@ -0,0 +1,105 @@
+"""Request coalescing: concurrent identical requests share one computation.
+
+When many requests for the same page arrive together (say, a popular league
+page right after an import), the first starts the computation on a worker
+thread and the rest wait for its result instead of running the same queries
+again. Keys include the data version, which moves on after every commit that
+wrote something in this process, so a request never receives a result
+computed from data older than what it could already have seen.
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import REGISTRY
+from app.profiling import active_profile, call_attached
+
+SINGLE_FLIGHT_REQUESTS = REGISTRY.counter(
+    "single_flight_requests",
+    "Coalescable requests by whether they ran the computation or shared one",
+    ["name", "outcome"],
+)
+
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+
+def data_version() -> int:
+    """A number that changes after every commit that wrote something."""
+    return _data_version
+
+
+@event.listens_for(Session, "after_flush")
+def _note_write(session, flush_context):
+    session.info["single_flight_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_data_version(session):
+    global _data_version
+    if session.info.pop("single_flight_stale", False):
+        with _data_version_lock:
+            _data_version += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("single_flight_stale", None)
+
+
+class SingleFlight:
+    """In-flight computations by key, shared by every caller of that key."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def run(
+        self, name: str, key: Hashable, function: Callable[..., Any], *args: Any
+    ) -> Any:
+        """Run ``function(*args)`` on a worker thread, or join the run in flight.
+
+        The computation belongs to no single caller: if the caller that
+        started it is cancelled, the others still get its result. Its
+        exception, if any, is raised to every caller. A profiled request
+        neither joins nor shares a computation, so its profile covers one.
+
+        Args:
+            name: Label for metrics, e.g. the endpoint
+            key: Identifies equal computations, together with ``name``, the
+                data version and the event loop
+            function: Blocking function to run
+            args: Arguments of ``function``; when coalesced, only the first
+                caller's are used. The computation can outlive that caller,
+                so they must not include its request's database session;
+                see ``in_read_session``.
+
+        Returns:
+            The result of ``function``
+        """
+        if active_profile() is not None:
+            SINGLE_FLIGHT_REQUESTS.labels(name, "profiled").inc()
+            return await run_in_threadpool(call_attached, function, *args)
+        loop = asyncio.get_running_loop()
+        full_key = (loop, name, key, data_version())
+        call = self._calls.get(full_key)
+        if call is None:
+            SINGLE_FLIGHT_REQUESTS.labels(name, "computed").inc()
+            call = self._calls[full_key] = loop.create_task(
+                run_in_threadpool(function, *args)
+            )
+            call.add_done_callback(lambda _: self._calls.pop(full_key, None))
+        else:
+            SINGLE_FLIGHT_REQUESTS.labels(name, "coalesced").inc()
+        return await asyncio.shield(call)
+
+
+SINGLE_FLIGHT = SingleFlight()
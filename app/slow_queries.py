@@ -0,0 +1,237 @@
+"""Slow-query log: recent statements over a time threshold, with their plans.
+
+Statements on the instrumented engines (the primary and the replicas) that
+take at least ``settings.slow_query_seconds`` are kept in a bounded ring
+buffer with their parameters, duration and the route that ran them. A
+sample of the slow SELECTs is explained again on a separate connection by a
+background thread, so the request that ran the statement does not wait:
+``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL, ``EXPLAIN QUERY PLAN`` (which
+does not run the statement) on SQLite. Only SELECTs without side effects
+are explained because EXPLAIN ANALYZE executes the statement, and running
+a write, a lock or a sequence increment twice would apply it twice.
+"""
+
+import logging
+import queue
+import random
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_EXPLAINS = REGISTRY.counter(
+    "slow_query_explains",
+    "Plans captured for slow statements, by outcome",
+    ["outcome"],
+)
+
+# Execution option marking statements the log neither records nor explains:
+# its own EXPLAINs, and internal bookkeeping such as advisory locks
+SKIP_OPTION = "skip_slow_query_log"
+# Characters of a statement's parameters kept in its record
+MAX_PARAMETERS_LENGTH = 1000
+# Slow statements waiting to be explained; more are not explained
+EXPLAIN_QUEUE_SIZE = 16
+# Writes (including data-modifying CTEs) and row locks, which EXPLAIN
+# ANALYZE would repeat
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE)\b", re.IGNORECASE)
+# Calls to functions with side effects: advisory locks and sequences
+_VOLATILE_CALLS = re.compile(r"\b(pg_\w*lock\w*|nextval|setval)\s*\(", re.IGNORECASE)
+
+
+def explainable(statement: str) -> bool:
+    """Whether running ``statement`` again to explain it is harmless."""
+    return (
+        statement.lstrip().upper().startswith(("SELECT", "WITH"))
+        and not _WRITES.search(statement)
+        and not _VOLATILE_CALLS.search(statement)
+    )
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: str
+    seconds: float
+    # "GET /leagues/{league_id}/overview", or None outside a request
+    route: str | None
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    # Filled in by the explain thread for sampled statements
+    plan: str | None = None
+    # True when the plan has actual timings (EXPLAIN ANALYZE)
+    analyzed: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "parameters": self.parameters,
+            "seconds": self.seconds,
+            "route": self.route,
+            "recorded_at": self.recorded_at.isoformat(),
+            "plan": self.plan,
+            "analyzed": self.analyzed,
+        }
+
+
+class SlowQueryLog:
+    """Ring buffer of the most recent slow statements."""
+
+    def __init__(self, size: int, explain_rate: float):
+        """Initialize the log.
+
+        Args:
+            size: Slow statements kept; older ones are dropped
+            explain_rate: Fraction of slow SELECTs that are explained
+        """
+        self.explain_rate = explain_rate
+        self._records: deque[SlowQuery] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._explains: queue.Queue[tuple[Engine, SlowQuery, Any]] = queue.Queue(
+            EXPLAIN_QUEUE_SIZE
+        )
+        self._explainer: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(
+        self,
+        engine: Engine,
+        statement: str,
+        parameters: Any,
+        seconds: float,
+        route: str | None,
+        executemany: bool = False,
+    ) -> SlowQuery:
+        """Keep a slow statement, and queue it for EXPLAIN if sampled.
+
+        Args:
+            engine: Engine that ran the statement, used again to explain it
+            statement: SQL text as sent to the driver
+            parameters: Driver parameters of the statement
+            seconds: Execution time
+            route: Route that ran the statement
+            executemany: Whether the statement ran once per parameter set;
+                such batches are not explained
+        """
+        record = SlowQuery(
+            statement, repr(parameters)[:MAX_PARAMETERS_LENGTH], seconds, route
+        )
+        with self._lock:
+            self._records.append(record)
+        if (
+            not executemany
+            and explainable(statement)
+            and random.random() < self.explain_rate
+        ):
+            try:
+                self._explains.put_nowait((engine, record, parameters))
+            except queue.Full:
+                SLOW_QUERY_EXPLAINS.labels("dropped").inc()
+            else:
+                self._start_explainer()
+        return record
+
+    def records(self, limit: int | None = None) -> list[SlowQuery]:
+        """The slow statements, newest first."""
+        with self._lock:
+            records = list(reversed(self._records))
+        return records[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def join(self) -> None:
+        """Wait until every queued statement has been explained."""
+        self._explains.join()
+
+    def _start_explainer(self) -> None:
+        with self._lock:
+            if self._explainer is None or not self._explainer.is_alive():
+                self._explainer = threading.Thread(
+                    target=self._explain_queued, name="slow-query-explain", daemon=True
+                )
+                self._explainer.start()
+
+    def _explain_queued(self) -> None:
+        while True:
+            engine, record, parameters = self._explains.get()
+            try:
+                record.plan, record.analyzed = explain(
+                    engine, record.statement, parameters
+                )
+                SLOW_QUERY_EXPLAINS.labels("explained").inc()
+            except Exception:
+                logger.warning("Could not explain %s", record.statement, exc_info=True)
+                SLOW_QUERY_EXPLAINS.labels("failed").inc()
+            finally:
+                self._explains.task_done()
+
+
+def summarize(records: list[SlowQuery]) -> list[dict[str, Any]]:
+    """Slow statements grouped by SQL text, by total time, slowest first.
+
+    Each group has the routes that ran it and its most recent plan.
+    """
+    groups: dict[str, dict[str, Any]] = {}
+    for record in records:
+        group = groups.setdefault(
+            record.statement,
+            {
+                "statement": record.statement,
+                "count": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "routes": set(),
+                "plan": None,
+            },
+        )
+        group["count"] += 1
+        group["total_seconds"] += record.seconds
+        group["max_seconds"] = max(group["max_seconds"], record.seconds)
+        if record.route is not None:
+            group["routes"].add(record.route)
+        # Records are newest first, so the first plan seen is the latest
+        if group["plan"] is None:
+            group["plan"] = record.plan
+    return [
+        group | {"routes": sorted(group["routes"])}
+        for group in sorted(
+            groups.values(), key=lambda group: group["total_seconds"], reverse=True
+        )
+    ]
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> tuple[str, bool]:
+    """Plan of ``statement``, on a connection of its own.
+
+    Returns:
+        The plan text, and whether it was analyzed (has actual timings)
+    """
+    analyze = engine.dialect.name == "postgresql"
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN QUERY PLAN "
+    with engine.connect() as conn:
+        conn = conn.execution_options(**{SKIP_OPTION: True})
+        if analyze:
+            timeout_ms = int(settings.slow_query_explain_timeout_seconds * 1000)
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+        rows = conn.exec_driver_sql(prefix + statement, parameters or ()).all()
+        # Whatever EXPLAIN ANALYZE ran is not kept
+        conn.rollback()
+    # PostgreSQL returns one line per row; SQLite's detail is the last column
+    return "\n".join(str(row[-1]) for row in rows), analyze
+
+
+SLOW_QUERY_LOG = SlowQueryLog(
+    settings.slow_query_log_size, settings.slow_query_explain_rate
+)
@@ -0,0 +1,352 @@
+"""Named, prebuilt SQL statements for the hot query paths.
+
+Building a ``db.query(...).filter(...)`` chain costs Python time on every
+call even when SQLAlchemy's compiled cache then hits. The statements here
+are built once at import with ``bindparam`` placeholders, so a call only
+binds values. A query with an optional filter is registered once per
+variant.
+
+On PostgreSQL, psycopg additionally prepares a statement on the server
+once it has run ``settings.database_prepare_threshold`` times on a
+connection, skipping the server-side parse and plan as well.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+from sqlalchemy import (
+    Executable,
+    Float,
+    Result,
+    bindparam,
+    case,
+    cast,
+    func,
+    select,
+)
+from sqlalchemy.orm import Session, configure_mappers, joinedload, selectinload
+
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    League,
+    Lineup,
+    Manager,
+    ManagerCareer,
+    ManagerOpponentRecord,
+    Player,
+    Season,
+    Streak,
+    WeekStanding,
+)
+
+# Relationships declared with ``backref`` only exist once mappers configure
+configure_mappers()
+
+
+class StatementRegistry:
+    """Statements registered by name and executed with bound values."""
+
+    def __init__(self):
+        self._statements: dict[str, Executable] = {}
+
+    def register(self, name: str, statement: Executable) -> Executable:
+        if name in self._statements:
+            raise ValueError(f"Statement {name} already registered")
+        self._statements[name] = statement
+        return statement
+
+    def __getitem__(self, name: str) -> Executable:
+        return self._statements[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    def names(self) -> list[str]:
+        return sorted(self._statements)
+
+    def execute(
+        self, db: Session, name: str, params: Mapping[str, Any] | None = None
+    ) -> Result:
+        """Execute the statement registered as ``name``."""
+        return db.execute(self._statements[name], params)
+
+    def scalars(
+        self, db: Session, name: str, params: Mapping[str, Any] | None = None
+    ) -> list:
+        """Execute ``name`` and return the first column of every row."""
+        return list(db.scalars(self._statements[name], params))
+
+    def first(
+        self, db: Session, name: str, params: Mapping[str, Any] | None = None
+    ) -> Any:
+        """Execute ``name`` and return the first column of the first row."""
+        return db.scalars(self._statements[name], params).first()
+
+
+STATEMENTS = StatementRegistry()
+
+# API reads
+STATEMENTS.register("leagues", select(League))
+STATEMENTS.register(
+    "franchises_by_league",
+    select(Franchise).where(Franchise.league_id == bindparam("league_id")),
+)
+STATEMENTS.register(
+    "seasons_by_league",
+    select(Season).where(Season.league_id == bindparam("league_id")),
+)
+STATEMENTS.register(
+    "league_overview",
+    select(League)
+    .where(League.id == bindparam("league_id"))
+    .options(
+        selectinload(League.seasons),  # type: ignore[attr-defined]
+        selectinload(League.franchises)  # type: ignore[attr-defined]
+        .selectinload(Franchise.franchise_seasons)  # type: ignore[attr-defined]
+        .joinedload(FranchiseSeason.manager),
+    ),
+)
+
+# Manager careers
+_career_games = (
+    ManagerCareer.regular_wins
+    + ManagerCareer.regular_losses
+    + ManagerCareer.playoff_wins
+    + ManagerCareer.playoff_losses
+)
+_career_win_pct = case(
+    (
+        _career_games > 0,
+        (ManagerCareer.regular_wins + ManagerCareer.playoff_wins)
+        / cast(_career_games, Float),
+    ),
+    else_=0.0,
+)
+LEADERBOARD_ORDER = {
+    "championships": (ManagerCareer.championships.desc(), _career_win_pct.desc()),
+    "wins": (
+        (ManagerCareer.regular_wins + ManagerCareer.playoff_wins).desc(),
+        _career_win_pct.desc(),
+    ),
+    "win_pct": (_career_win_pct.desc(), ManagerCareer.seasons.desc()),
+    "points_for": (ManagerCareer.points_for.desc(),),
+    "earnings": (ManagerCareer.earnings.desc(), ManagerCareer.championships.desc()),
+}
+for _sort, _order in LEADERBOARD_ORDER.items():
+    STATEMENTS.register(
+        f"manager_leaderboard_{_sort}",
+        select(ManagerCareer, Manager.name)
+        .join(Manager, Manager.id == ManagerCareer.manager_id)
+        .order_by(*_order, Manager.id)
+        .limit(bindparam("limit")),
+    )
+STATEMENTS.register(
+    "manager_career",
+    select(ManagerCareer, Manager.name)
+    .join(Manager, Manager.id == ManagerCareer.manager_id)
+    .where(ManagerCareer.manager_id == bindparam("manager_id")),
+)
+STATEMENTS.register(
+    "manager_opponents",
+    select(ManagerOpponentRecord, Manager.name)
+    .join(Manager, Manager.id == ManagerOpponentRecord.opponent_id)
+    .where(ManagerOpponentRecord.manager_id == bindparam("manager_id"))
+    .order_by(ManagerOpponentRecord.games.desc(), Manager.name),
+)
+
+# Week-by-week standings
+_standings = (
+    select(WeekStanding, Franchise.name)
+    .join(Franchise, Franchise.id == WeekStanding.franchise_id)
+    .where(WeekStanding.season_id == bindparam("season_id"))
+)
+STATEMENTS.register(
+    "week_standings_as_of",
+    _standings.where(
+        WeekStanding.week
+        == select(func.max(WeekStanding.week))
+        .where(
+            WeekStanding.season_id == bindparam("season_id"),
+            WeekStanding.week <= bindparam("week"),
+        )
+        .scalar_subquery()
+    ).order_by(WeekStanding.rank, Franchise.name),
+)
+STATEMENTS.register(
+    "week_standings_latest",
+    _standings.where(
+        WeekStanding.week
+        == select(func.max(WeekStanding.week))
+        .where(WeekStanding.season_id == bindparam("season_id"))
+        .scalar_subquery()
+    ).order_by(WeekStanding.rank, Franchise.name),
+)
+STATEMENTS.register(
+    "week_standings_timeline",
+    _standings.order_by(WeekStanding.week, WeekStanding.rank, Franchise.name),
+)
+
+# Streak records
+_streak_order = (Streak.length.desc(), Streak.end_year.desc(), Streak.end_week.desc())
+for _scope, _subject in (("franchise", Franchise), ("manager", Manager)):
+    _records = (
+        select(Streak, _subject.name)
+        .join(_subject, _subject.id == Streak.subject_id)
+        .where(
+            Streak.scope == _scope,
+            Streak.span == bindparam("span"),
+            Streak.kind == bindparam("kind"),
+        )
+        .order_by(*_streak_order)
+        .limit(bindparam("limit"))
+    )
+    STATEMENTS.register(f"{_scope}_streak_records", _records)
+    STATEMENTS.register(
+        f"{_scope}_active_streak_records", _records.where(Streak.active.is_(True))
+    )
+STATEMENTS.register(
+    "subject_streaks",
+    select(Streak)
+    .where(
+        Streak.scope == bindparam("scope"), Streak.subject_id == bindparam("subject_id")
+    )
+    .order_by(*_streak_order),
+)
+
+# Games and the score index
+_games = select(Game).options(
+    joinedload(Game.season), joinedload(Game.franchise1), joinedload(Game.franchise2)
+)
+STATEMENTS.register("game", _games.where(Game.id == bindparam("game_id")))
+STATEMENTS.register(
+    "season_week_games",
+    _games.where(
+        Game.season_id == bindparam("season_id"), Game.week == bindparam("week")
+    ).order_by(Game.id),
+)
+STATEMENTS.register(
+    "season_games",
+    _games.where(Game.season_id == bindparam("season_id")).order_by(Game.week, Game.id),
+)
+STATEMENTS.register(
+    "game_lineups",
+    select(Lineup, Player.name)
+    .join(Player, Player.id == Lineup.player_id)
+    .where(
+        Lineup.game_id == bindparam("game_id"),
+        Lineup.season_id == bindparam("season_id"),
+    )
+    .order_by(Lineup.franchise_id, Lineup.score.desc(), Player.name),
+)
+STATEMENTS.register(
+    "league_game_scores",
+    select(Game.franchise1_score, Game.franchise2_score)
+    .join(Season, Season.id == Game.season_id)
+    .where(
+        Season.league_id == bindparam("league_id"),
+        Game.franchise1_score.is_not(None),
+        Game.franchise2_score.is_not(None),
+    ),
+)
+STATEMENTS.register(
+    "league_lineup_scores",
+    select(Lineup.position, Lineup.score)
+    .join(Season, Season.id == Lineup.season_id)
+    .where(Season.league_id == bindparam("league_id"), Lineup.score.is_not(None)),
+)
+
+# Prerendered pages
+STATEMENTS.register("league_ids", select(League.id).order_by(League.id))
+STATEMENTS.register(
+    "league_season_ids",
+    select(Season.id)
+    .where(Season.league_id == bindparam("league_id"))
+    .order_by(Season.id),
+)
+STATEMENTS.register(
+    "league_game_ids",
+    select(Game.id)
+    .join(Season, Season.id == Game.season_id)
+    .where(Season.league_id == bindparam("league_id"))
+    .order_by(Game.id),
+)
+STATEMENTS.register(
+    "league_franchise_ids",
+    select(Franchise.id)
+    .where(Franchise.league_id == bindparam("league_id"))
+    .order_by(Franchise.id),
+)
+STATEMENTS.register(
+    "league_manager_ids",
+    select(FranchiseSeason.manager_id)
+    .distinct()
+    .join(Season, Season.id == FranchiseSeason.season_id)
+    .where(
+        Season.league_id == bindparam("league_id"),
+        FranchiseSeason.manager_id.is_not(None),
+    )
+    .order_by(FranchiseSeason.manager_id),
+)
+
+# Importer lookups
+STATEMENTS.register(
+    "league_by_name",
+    select(League).where(League.name == bindparam("name")).limit(1),
+)
+STATEMENTS.register(
+    "season_by_year",
+    select(Season)
+    .where(Season.league_id == bindparam("league_id"), Season.year == bindparam("year"))
+    .limit(1),
+)
+STATEMENTS.register(
+    "franchise_season",
+    select(FranchiseSeason)
+    .where(
+        FranchiseSeason.franchise_id == bindparam("franchise_id"),
+        FranchiseSeason.season_id == bindparam("season_id"),
+    )
+    .limit(1),
+)
+STATEMENTS.register(
+    "franchise_seasons_by_season",
+    select(FranchiseSeason).where(FranchiseSeason.season_id == bindparam("season_id")),
+)
+STATEMENTS.register(
+    "games_by_season",
+    select(Game).where(Game.season_id == bindparam("season_id")),
+)
+
+
+_player_history = (
+    select(
+        Franchise.id,
+        Franchise.name,
+        func.sum(Lineup.score).label("total_points"),
+        func.count(Lineup.id).label("games_played"),
+    )
+    .join(Lineup, Franchise.id == Lineup.franchise_id)
+    .where(Lineup.player_id == bindparam("player_id"))
+    .group_by(Franchise.id, Franchise.name)
+)
+STATEMENTS.register("player_history", _player_history)
+STATEMENTS.register(
+    "player_season_history",
+    _player_history.where(Lineup.season_id == bindparam("season_id")),
+)
+
+
+def player_history(db: Session, player_id: int, season_id: int | None = None) -> list:
+    """Points and games per franchise for a player, optionally in one season.
+
+    Returns:
+        Rows with ``id``, ``name``, ``total_points`` and ``games_played`` per
+        franchise
+    """
+    if season_id is None:
+        return STATEMENTS.execute(db, "player_history", {"player_id": player_id}).all()
+    return STATEMENTS.execute(
+        db, "player_season_history", {"player_id": player_id, "season_id": season_id}
+    ).all()
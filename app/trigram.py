@@ -0,0 +1,105 @@
+"""``pg_trgm`` trigram indexes for substring and typo-tolerant name search.
+
+GIN trigram indexes serve ``ILIKE '%...%'`` and the ``%`` similarity
+operator, which plain b-tree indexes on ``name`` cannot. The extension is
+created along with the schema when the server offers it; where it is not
+available (other dialects, or PostgreSQL builds without contrib) the
+indexes are skipped and search falls back to prefix matching.
+"""
+
+from sqlalchemy import Index, MetaData, event, text
+from sqlalchemy.engine import Connection, Engine
+
+EXTENSION = "pg_trgm"
+
+_installed: dict[Engine, bool] = {}
+
+
+def trigram_available(conn: Connection) -> bool:
+    """Whether ``pg_trgm`` is installed in the connected database."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return (
+        conn.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = :name"),
+            {"name": EXTENSION},
+        ).first()
+        is not None
+    )
+
+
+def trigram_installed(conn: Connection) -> bool:
+    """``trigram_available``, remembered per engine."""
+    engine = conn.engine
+    if engine not in _installed:
+        _installed[engine] = trigram_available(conn)
+    return _installed[engine]
+
+
+def create_extension(conn: Connection) -> bool:
+    """Install ``pg_trgm`` if the server offers it.
+
+    Returns:
+        True if the extension is installed afterwards
+    """
+    if conn.dialect.name != "postgresql":
+        return False
+    offered = conn.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = :name"),
+        {"name": EXTENSION},
+    ).first()
+    if offered is not None:
+        try:
+            # A savepoint, so lacking the privilege does not abort the
+            # surrounding schema creation
+            with conn.begin_nested():
+                conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {EXTENSION}"))
+        except Exception:
+            pass
+    _installed.pop(conn.engine, None)
+    return trigram_available(conn)
+
+
+def _should_create(ddl, target, bind, **kw) -> bool:
+    return bind is not None and trigram_available(bind)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """A GIN trigram index on ``column``, created only where pg_trgm exists."""
+    index = Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+    return index.ddl_if(dialect="postgresql", callable_=_should_create)
+
+
+def install_on_create(metadata: MetaData) -> None:
+    """Create the extension whenever ``metadata`` creates its tables."""
+
+    @event.listens_for(metadata, "before_create")
+    def _create_extension(target, connection, **kw):
+        create_extension(connection)
+
+
+def create_trigram_indexes(conn: Connection, metadata: MetaData) -> list[str]:
+    """Add missing trigram indexes to existing tables.
+
+    Returns:
+        Names of the indexes created
+    """
+    if not create_extension(conn):
+        return []
+    created = []
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            if index.dialect_options["postgresql"]["using"] != "gin":
+                continue
+            exists = conn.execute(
+                text("SELECT to_regclass(:name)"), {"name": index.name}
+            ).scalar()
+            if exists is None:
+                index.create(conn)
+                created.append(index.name)
+    return created
@@ -0,0 +1,34 @@
+"""Script to add the ESPN ID columns and indexes to an existing database."""
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+from app.models import Franchise, Manager, Player
+
+# Table -> (ESPN ID column, its DDL type)
+EXTERNAL_ID_COLUMNS = {
+    Manager.__table__: ("espn_member_id", "VARCHAR"),
+    Franchise.__table__: ("espn_team_id", "INTEGER"),
+    Player.__table__: ("espn_player_id", "INTEGER"),
+}
+
+
+def main():
+    """Add missing ESPN ID columns and their unique indexes."""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table, (column, ddl_type) in EXTERNAL_ID_COLUMNS.items():
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            if column not in existing:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column} {ddl_type}")
+                )
+                print(f"✅ Added {table.name}.{column}")
+            for index in table.indexes:
+                if index.unique and column in index.columns:
+                    index.create(conn, checkfirst=True)
+    print("✅ ESPN ID columns are in place; the next import links existing rows")
+
+
+if __name__ == "__main__":
+    main()
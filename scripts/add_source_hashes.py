@@ -0,0 +1,26 @@
+"""Script to add the source hash columns to an existing database."""
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+from app.models import FranchiseSeason, Game
+
+SOURCE_HASH_TABLES = (FranchiseSeason.__table__, Game.__table__)
+
+
+def main():
+    """Add missing source_hash columns."""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in SOURCE_HASH_TABLES:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            if "source_hash" not in existing:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN source_hash BIGINT")
+                )
+                print(f"✅ Added {table.name}.source_hash")
+    print("✅ Source hash columns are in place; the next import fills them in")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark CPU per request and bytes on the wire of response compression.
+
+Serves a season of game pages with lineups (the shape of /games/{game_id})
+through CompressionMiddleware, once per encoding, with the compressed body
+cache cold (every request compresses) and warm (every request is a hit).
+CPU time is measured in process, so it covers the middleware and JSON
+rendering but not the network.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from app.compression import ENCODINGS, CompressedBodyCache, CompressionMiddleware
+
+POSITIONS = ("QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "D/ST", "K")
+
+
+def score(rng: random.Random, of: int) -> dict[str, Any]:
+    value = round(rng.uniform(0, 40), 2)
+    return {
+        "value": value,
+        "percentile": round(rng.uniform(0, 100), 1),
+        "rank": rng.randint(1, of),
+        "of": of,
+    }
+
+
+def game(rng: random.Random, week: int, matchup: int, teams: int) -> dict[str, Any]:
+    """One game page with both franchises' scored lineups."""
+    return {
+        "id": week * 100 + matchup,
+        "season": {"id": 1, "year": 2024},
+        "week": week,
+        "game_type": "REGULAR",
+        "game_date": None,
+        "franchises": [
+            {
+                "id": side * teams + matchup,
+                "name": f"Franchise {side * teams + matchup}",
+                "score": score(rng, 2000),
+                "lineup": [
+                    {
+                        "player": {
+                            "id": rng.randint(1, 5000),
+                            "name": f"Player {rng.randint(1, 5000)}",
+                        },
+                        "position": position,
+                        "score": score(rng, 5000),
+                    }
+                    for position in POSITIONS
+                ],
+            }
+            for side in (0, 1)
+        ],
+        "margin": score(rng, 1000),
+    }
+
+
+def season_payload(weeks: int, teams: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Every game of a season."""
+    rng = random.Random(seed)
+    return [
+        game(rng, week, matchup, teams)
+        for week in range(1, weeks + 1)
+        for matchup in range(teams // 2)
+    ]
+
+
+async def request(app, encoding: str) -> int:
+    """Send one GET through ``app``; return the body bytes sent."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/games",
+        "headers": [(b"accept-encoding", encoding.encode())],
+    }
+    sent = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent
+
+
+def measure(payload: Any, encoding: str, cache_bytes: int, iterations: int):
+    """Return (CPU µs per request, bytes per response)."""
+    app = CompressionMiddleware(
+        lambda scope, receive, send: JSONResponse(payload)(scope, receive, send),
+        CompressedBodyCache(cache_bytes),
+    )
+
+    async def run() -> tuple[float, int]:
+        size = await request(app, encoding)  # warms the cache, if any
+        cpu = time.process_time()
+        for _ in range(iterations):
+            await request(app, encoding)
+        return (time.process_time() - cpu) / iterations * 1e6, size
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=17)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument(
+        "--iterations", type=int, default=50, help="Requests per encoding and cache"
+    )
+    args = parser.parse_args()
+
+    payload = season_payload(args.weeks, args.teams)
+    print(f"{'encoding':<10}{'bytes':>10}{'cold cpu µs':>14}{'warm cpu µs':>14}")
+    for encoding in ("identity", *ENCODINGS):
+        cold, size = measure(payload, encoding, 0, args.iterations)
+        warm, _ = measure(payload, encoding, 64 * 1024 * 1024, args.iterations)
+        print(f"{encoding:<10}{size:>10}{cold:>14.0f}{warm:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark /search latency from the prefix trie and from the database.
+
+Seeds many players inside a transaction that is rolled back at the end, then
+times building the trie, short queries answered from it, and longer queries
+answered by the database. Rebuilds run in the background in production, so
+the trie build time bounds how stale results can get after a commit rather
+than how long a request waits.
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Player
+from app.services.search import SearchIndex, search
+
+FIRST_NAMES = (
+    "Josh",
+    "Keenan",
+    "Allen",
+    "Puka",
+    "Bijan",
+    "Ja'Marr",
+    "Tyreek",
+    "CeeDee",
+)
+LAST_NAMES = ("Allen", "Robinson", "Nacua", "Chase", "Hill", "Lamb", "Jacobs", "Smith")
+SHORT_QUERIES = ("j", "jo", "kee", "puka", "all", "rob")
+LONG_QUERIES = ("josh al", "robinson", "nacua", "tyreek h", "jacobs")
+
+
+def seed(db: Session, players: int) -> None:
+    """Insert ``players`` players with made-up, mostly distinct names."""
+    db.execute(
+        insert(Player),
+        [
+            {
+                "name": f"{FIRST_NAMES[i % len(FIRST_NAMES)]} "
+                f"{LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]}{i}",
+                "position": "WR",
+            }
+            for i in range(players)
+        ],
+    )
+    db.flush()
+
+
+def measure(queries: tuple[str, ...], run: Callable[[str], object], iterations: int):
+    """Run every query ``iterations`` times; return (p50, p99) microseconds."""
+    for query in queries:
+        run(query)  # warm caches
+    timings = []
+    for _ in range(iterations):
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - start) * 1e6)
+    percentiles = statistics.quantiles(timings, n=100)
+    return percentiles[49], percentiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--players", type=int, default=40_000, help="Players to seed before timing"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=200, help="Calls per query and path"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.players)
+        index = SearchIndex()
+
+        start = time.perf_counter()
+        trie = index._build(db)
+        build = time.perf_counter() - start
+        index._install(trie, generation=0)
+
+        trie_p50, trie_p99 = measure(
+            SHORT_QUERIES, lambda q: index.lookup(db, q, 10), args.iterations
+        )
+        db_p50, db_p99 = measure(
+            LONG_QUERIES, lambda q: search(db, q, 10), args.iterations
+        )
+
+        print(f"trie build for {args.players} players: {build * 1000:.0f} ms")
+        print(f"{'path':<10}{'p50 µs':>12}{'p99 µs':>12}")
+        print(f"{'trie':<10}{trie_p50:>12.1f}{trie_p99:>12.1f}")
+        print(f"{'database':<10}{db_p50:>12.1f}{db_p99:>12.1f}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
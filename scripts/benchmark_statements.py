@@ -0,0 +1,136 @@
+"""Benchmark per-query Python overhead of ad-hoc queries vs prebuilt statements.
+
+Seeds a small league inside a transaction that is rolled back at the end,
+then runs each hot query both ways. Client CPU time excludes time spent
+waiting on the server, so it approximates the Python-side cost per query.
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Franchise, Game, League, Lineup, Player, Season
+from app.statements import STATEMENTS, player_history
+
+
+def seed(db: Session) -> dict[str, int]:
+    """Create one league with a season, two franchises and a scoring player."""
+    league = League(name="Benchmark League")
+    db.add(league)
+    db.flush()
+    season = Season(league_id=league.id, year=2024)
+    franchises = [Franchise(league_id=league.id, name=name) for name in ("A", "B")]
+    player = Player(name="Benchmark Player", position="QB")
+    db.add_all([season, *franchises, player])
+    db.flush()
+    game = Game(
+        season_id=season.id,
+        week=1,
+        franchise1_id=franchises[0].id,
+        franchise2_id=franchises[1].id,
+        game_type="REGULAR",
+    )
+    db.add(game)
+    db.flush()
+    db.add(
+        Lineup(
+            game_id=game.id,
+            franchise_id=franchises[0].id,
+            player_id=player.id,
+            score=20.0,
+        )
+    )
+    db.flush()
+    return {"league_id": league.id, "player_id": player.id, "year": season.year}
+
+
+def adhoc_queries(db: Session, ids: dict[str, int]) -> dict[str, Callable[[], object]]:
+    return {
+        "league": lambda: (
+            db.query(League).filter(League.name == "Benchmark League").first()
+        ),
+        "season": lambda: (
+            db.query(Season)
+            .filter(Season.league_id == ids["league_id"], Season.year == ids["year"])
+            .first()
+        ),
+        "franchise": lambda: (
+            db.query(Franchise).filter(Franchise.league_id == ids["league_id"]).all()
+        ),
+        "player history": lambda: (
+            db.query(
+                Franchise.id,
+                Franchise.name,
+                func.sum(Lineup.score).label("total_points"),
+                func.count(Lineup.id).label("games_played"),
+            )
+            .join(Lineup, Franchise.id == Lineup.franchise_id)
+            .filter(Lineup.player_id == ids["player_id"])
+            .group_by(Franchise.id, Franchise.name)
+            .all()
+        ),
+    }
+
+
+def prebuilt_queries(
+    db: Session, ids: dict[str, int]
+) -> dict[str, Callable[[], object]]:
+    return {
+        "league": lambda: STATEMENTS.first(
+            db, "league_by_name", {"name": "Benchmark League"}
+        ),
+        "season": lambda: STATEMENTS.first(
+            db,
+            "season_by_year",
+            {"league_id": ids["league_id"], "year": ids["year"]},
+        ),
+        "franchise": lambda: STATEMENTS.scalars(
+            db, "franchises_by_league", {"league_id": ids["league_id"]}
+        ),
+        "player history": lambda: player_history(db, ids["player_id"]),
+    }
+
+
+def measure(query: Callable[[], object], iterations: int) -> tuple[float, float]:
+    """Run ``query`` and return (CPU, wall) microseconds per call."""
+    for _ in range(min(iterations, 50)):
+        query()  # warm the compiled and prepared statement caches
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(iterations):
+        query()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return cpu / iterations * 1e6, wall / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--iterations", type=int, default=2000, help="Calls per query and style"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        ids = seed(db)
+        adhoc = adhoc_queries(db, ids)
+        prebuilt = prebuilt_queries(db, ids)
+
+        print(f"{'query':<16}{'ad-hoc cpu/wall µs':>22}{'prebuilt cpu/wall µs':>24}")
+        for name in adhoc:
+            before = measure(adhoc[name], args.iterations)
+            after = measure(prebuilt[name], args.iterations)
+            print(
+                f"{name:<16}{before[0]:>11.1f} /{before[1]:>8.1f}"
+                f"{after[0]:>13.1f} /{after[1]:>8.1f}"
+            )
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
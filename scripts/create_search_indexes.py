@@ -0,0 +1,23 @@
+"""Script to add the pg_trgm search indexes to an existing database."""
+
+import sys
+
+from app.database import Base, engine
+from app.trigram import create_trigram_indexes
+
+
+def main():
+    """Install pg_trgm and create any missing trigram indexes."""
+    with engine.begin() as conn:
+        if engine.dialect.name != "postgresql":
+            print("❌ Trigram indexes require PostgreSQL", file=sys.stderr)
+            sys.exit(1)
+        created = create_trigram_indexes(conn, Base.metadata)
+        if not created:
+            print("✅ No trigram indexes to create (or pg_trgm is unavailable)")
+        for name in created:
+            print(f"✅ Created {name}")
+
+
+if __name__ == "__main__":
+    main()
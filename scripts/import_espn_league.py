@@ -2,9 +2,17 @@
 
 import argparse
 import sys
+import time
 
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
+from app.profiling import profile
+from app.query_tracking import track_queries, warn_repeated
 from app.services.espn_importer import ESPNImporter
+from app.services.league_imports import (
+    import_leagues,
+    league_import_lock,
+    read_league_ids,
+)
 
 
 def main():
@@ -12,11 +20,23 @@ def main():
     parser = argparse.ArgumentParser(
         description="Import ESPN league data into database"
     )
-    parser.add_argument(
+    leagues = parser.add_mutually_exclusive_group(required=True)
+    leagues.add_argument(
         "--league-id",
         type=int,
-        required=True,
-        help="ESPN league ID",
+        nargs="+",
+        help="ESPN league ID(s)",
+    )
+    leagues.add_argument(
+        "--league-file",
+        type=argparse.FileType(),
+        help="File of ESPN league IDs, one per line",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Leagues imported concurrently when importing several (default: 4)",
     )
     parser.add_argument(
         "--scoring-period-id",
@@ -24,41 +44,178 @@ def main():
         default=None,
         help="Scoring period ID (optional)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Import every season, streaming the ESPN response",
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Import every season, committing each one; resumes after a failure",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="With --chunked, ignore checkpoints and import every season again",
+    )
+    parser.add_argument(
+        "--debug-queries",
+        action="store_true",
+        help="Print the number of SQL statements and any repeated ones",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Profile the import; write folded stacks for a flame graph to PATH",
+    )
     args = parser.parse_args()
 
-    db = SessionLocal()
-    try:
-        importer = ESPNImporter()
-        result = importer.import_league_first_season(
-            db, args.league_id, args.scoring_period_id
-        )
-
-        print(f"✅ Successfully imported league: {result['league'].name}")
-        print(f"   Season: {result['season'].year}")
-        print(f"   Franchises: {len(result['franchises'])}")
-        print(f"   Managers: {len(result['managers'])}")
-        print(f"   Franchise Seasons: {len(result['franchise_seasons'])}")
-
-        print("\nFranchises:")
-        for franchise in result["franchises"]:
-            print(f"  - {franchise.name} (ID: {franchise.id})")
-
-        print("\nManagers:")
-        for manager in result["managers"]:
-            print(f"  - {manager.name} (ID: {manager.id})")
-
-        print("\nFranchise Seasons:")
-        for fs in result["franchise_seasons"]:
-            franchise = fs.franchise
-            manager = fs.manager
-            print(f"  - {franchise.name} -> {manager.name}")
-
-    except Exception as e:
-        print(f"❌ Error importing league: {e}", file=sys.stderr)
-        db.rollback()
-        sys.exit(1)
-    finally:
-        db.close()
+    if args.profile:
+        with profile(all_threads=True) as result:
+            try:
+                run(args)
+            finally:
+                write_profile(result, args.profile)
+    else:
+        run(args)
+
+
+def run(args):
+    """Import the leagues selected by ``args``."""
+    if args.league_file:
+        with args.league_file:
+            league_ids = read_league_ids(args.league_file)
+    else:
+        league_ids = args.league_id
+    if len(league_ids) != 1:
+        sys.exit(run_many(league_ids, args))
+    args.league_id = league_ids[0]
+
+    # Keep imported objects loaded after commit so the summary below can
+    # print them without a refresh query per object
+    db = SessionLocal(expire_on_commit=False)
+    with track_queries() as query_log:
+        try:
+            with league_import_lock(engine, args.league_id) as acquired:
+                if not acquired:
+                    raise RuntimeError(
+                        f"League {args.league_id} is being imported by another run"
+                    )
+                run_import(db, args)
+        except Exception as e:
+            print(f"❌ Error importing league: {e}", file=sys.stderr)
+            db.rollback()
+            sys.exit(1)
+        finally:
+            db.close()
+            if args.debug_queries:
+                print(f"\nSQL statements: {query_log.count}")
+                for statement, count in warn_repeated(query_log, "import").items():
+                    print(f"  {count}x {statement}")
+
+
+def write_profile(result, path: str, top: int = 10):
+    """Write the folded stacks of ``result`` and print where the time went."""
+    with open(path, "w") as f:
+        f.write(result.folded())
+    samples = sum(result.phases().values()) or 1
+    print(f"\n🔬 Profile of {result.seconds:.2f}s written to {path}")
+    for phase, count in result.phases().items():
+        print(f"   {phase}: {count / samples:.0%}")
+    print("   Slowest SQL statements:")
+    for timing in result.sql()[:top]:
+        statement = " ".join(timing["statement"].split())[:100]
+        print(f"     {timing['seconds']:8.3f}s {timing['count']:6}x {statement}")
+
+
+def run_many(league_ids, args) -> int:
+    """Import several leagues concurrently and print a summary.
+
+    Returns:
+        The exit status: 1 if any league failed or was locked
+    """
+    if args.chunked:
+        mode = "chunked"
+    elif args.stream:
+        mode = "stream"
+    else:
+        mode = "first_season"
+    started = time.perf_counter()
+    results = import_leagues(
+        league_ids,
+        SessionLocal,
+        mode=mode,
+        workers=args.workers,
+        restart=args.restart,
+        scoring_period_id=args.scoring_period_id,
+    )
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        if result.status == "imported":
+            print(
+                f"✅ League {result.league_id}: {result.records} records in "
+                f"{result.seconds:.2f}s ({result.records_per_second:.1f}/s)"
+            )
+        elif result.status == "locked":
+            print(f"❌ League {result.league_id}: being imported by another run")
+        else:
+            print(
+                f"❌ League {result.league_id}: failed after "
+                f"{result.seconds:.2f}s: {result.error}"
+            )
+
+    imported = [result for result in results if result.status == "imported"]
+    records = sum(result.records for result in imported)
+    print(
+        f"\n{len(imported)}/{len(results)} leagues imported with "
+        f"{args.workers} workers in {elapsed:.2f}s"
+    )
+    print(f"   Records: {records} ({records / elapsed if elapsed else 0:.1f}/s)")
+    return 0 if len(imported) == len(results) else 1
+
+
+def run_import(db, args):
+    """Run the import selected by ``args`` and print a summary."""
+    importer = ESPNImporter()
+    if args.stream or args.chunked:
+        if args.chunked:
+            counts = importer.import_league_history_chunked(
+                db, args.league_id, restart=args.restart
+            )
+        else:
+            counts = importer.import_league_history_stream(
+                db, args.league_id, args.scoring_period_id
+            )
+        print(f"✅ Successfully imported league history: {args.league_id}")
+        for name, count in counts.items():
+            print(f"   {name.replace('_', ' ').title()}: {count}")
+        return
+
+    result = importer.import_league_first_season(
+        db, args.league_id, args.scoring_period_id
+    )
+
+    print(f"✅ Successfully imported league: {result['league'].name}")
+    print(f"   Season: {result['season'].year}")
+    print(f"   Franchises: {len(result['franchises'])}")
+    print(f"   Managers: {len(result['managers'])}")
+    print(f"   Franchise Seasons: {len(result['franchise_seasons'])}")
+
+    print("\nFranchises:")
+    for franchise in result["franchises"]:
+        print(f"  - {franchise.name} (ID: {franchise.id})")
+
+    print("\nManagers:")
+    for manager in result["managers"]:
+        print(f"  - {manager.name} (ID: {manager.id})")
+
+    # The franchises and managers are already in the session, so these
+    # many-to-one loads are identity-map lookups rather than queries
+    print("\nFranchise Seasons:")
+    for fs in result["franchise_seasons"]:
+        print(f"  - {fs.franchise.name} -> {fs.manager.name}")
 
 
 if __name__ == "__main__":
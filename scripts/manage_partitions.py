@@ -0,0 +1,79 @@
+"""Script to manage the season partitions of the game and lineup tables."""
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from app.database import Base, engine
+from app.models import Season
+from app.partitioning import (
+    PARTITIONED_TABLES,
+    create_season_partitions,
+    drop_season_partitions,
+    list_partitions,
+    migrate_to_partitioned,
+    reset_season_partitions,
+)
+
+
+def main():
+    """Migrate to, inspect and maintain season partitions."""
+    parser = argparse.ArgumentParser(
+        description="Manage season partitions of the game and lineup tables"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "migrate",
+        help="Convert plain game/lineup tables into partitioned ones, moving rows",
+    )
+    commands.add_parser("list", help="List partitions and their bounds")
+    commands.add_parser(
+        "create-all", help="Create partitions for every season that lacks them"
+    )
+    for name, help_text in (
+        ("create", "Create a season's partitions, moving its rows in"),
+        ("drop", "Drop a season's games and lineups by dropping its partitions"),
+        ("reset", "Swap a season's partitions for empty ones before a re-import"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("season_id", type=int, help="Season ID")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Partitioning requires PostgreSQL", file=sys.stderr)
+        sys.exit(1)
+
+    with engine.begin() as conn:
+        if args.command == "migrate":
+            counts = migrate_to_partitioned(conn, Base.metadata)
+            if not counts:
+                print("✅ Tables are already partitioned")
+            for table, count in counts.items():
+                print(f"✅ Moved {count} {table} rows into partitions")
+        elif args.command == "list":
+            for table in PARTITIONED_TABLES:
+                print(f"{table}:")
+                for partition, bound in list_partitions(conn, table).items():
+                    print(f"  - {partition}: {bound}")
+        elif args.command == "create-all":
+            for season_id in conn.execute(select(Season.id)).scalars().all():
+                if create_season_partitions(conn, season_id):
+                    print(f"✅ Created partitions for season {season_id}")
+        else:
+            action = {
+                "create": create_season_partitions,
+                "drop": drop_season_partitions,
+                "reset": reset_season_partitions,
+            }[args.command]
+            if not action(conn, args.season_id):
+                print(
+                    f"Nothing to {args.command} for season {args.season_id}",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            print(f"✅ {args.command.title()} done for season {args.season_id}")
+
+
+if __name__ == "__main__":
+    main()
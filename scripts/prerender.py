@@ -0,0 +1,47 @@
+"""Script to prerender league history as static, gzipped JSON pages."""
+
+import argparse
+import os
+import time
+
+from app.config import settings
+from app.services.prerender import prerender
+
+
+def main():
+    """Render every page of the given leagues, or of every league."""
+    parser = argparse.ArgumentParser(
+        description="Prerender league history as static, gzipped JSON pages"
+    )
+    parser.add_argument(
+        "--out",
+        default=settings.prerender_dir,
+        help="Directory of the page tree (default: PRERENDER_DIR)",
+    )
+    parser.add_argument(
+        "--league-id",
+        type=int,
+        nargs="+",
+        help="Database IDs of the leagues to render (default: every league)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes rendering leagues in parallel (default: one per CPU)",
+    )
+    args = parser.parse_args()
+    if not args.out:
+        parser.error("--out is required when PRERENDER_DIR is not set")
+
+    started = time.perf_counter()
+    counts = prerender(args.out, args.league_id, args.workers)
+    print(
+        f"✅ Rendered {counts['pages']} pages in {time.perf_counter() - started:.1f}s: "
+        f"{counts['written']} written, {counts['removed']} removed, "
+        f"{counts['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Script to recompute every manager's career aggregates."""
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import ManagerCareer
+from app.models.manager_career import rebuild_manager_careers
+
+
+def main():
+    """Rebuild the manager career and head-to-head tables."""
+    db = SessionLocal()
+    try:
+        rebuild_manager_careers(db)
+        db.commit()
+        count = db.scalar(select(func.count()).select_from(ManagerCareer))
+        print(f"✅ Rebuilt careers for {count} managers")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Script to recompute every franchise's and manager's streaks."""
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import Streak
+from app.models.streak import rebuild_streaks
+
+
+def main():
+    """Rebuild the streak table."""
+    db = SessionLocal()
+    try:
+        rebuild_streaks(db)
+        db.commit()
+        count = db.scalar(select(func.count()).select_from(Streak))
+        print(f"✅ Rebuilt {count} streaks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
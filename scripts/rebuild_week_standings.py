@@ -0,0 +1,27 @@
+"""Script to recompute the week-by-week standings of every season."""
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import WeekStanding
+from app.models.week_standing import rebuild_week_standings
+
+
+def main():
+    """Rebuild the week standing table."""
+    db = SessionLocal()
+    try:
+        rebuild_week_standings(db)
+        db.commit()
+        count = db.scalar(
+            select(func.count(WeekStanding.season_id.distinct())).select_from(
+                WeekStanding
+            )
+        )
+        print(f"✅ Rebuilt week-by-week standings for {count} seasons")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Tests for response compression and the compressed body cache."""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.compression import (
+    ENCODINGS,
+    CompressedBodyCache,
+    CompressionMiddleware,
+    choose_encoding,
+)
+from app.main import app
+
+PAYLOAD = {"games": [{"week": week, "score": 100.5 + week} for week in range(200)]}
+
+
+def make_client(cache_bytes: int = 1 << 20) -> tuple[TestClient, CompressedBodyCache]:
+    async def games(request):
+        return JSONResponse(PAYLOAD)
+
+    async def private(request):
+        return JSONResponse(PAYLOAD, headers={"Cache-Control": "no-store"})
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def stream(request):
+        async def chunks():
+            yield b"x" * 4096
+            yield b"y" * 4096
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    cache = CompressedBodyCache(cache_bytes)
+    inner = Starlette(
+        routes=[
+            Route("/games", games),
+            Route("/games", games, methods=["POST"]),
+            Route("/private", private),
+            Route("/small", small),
+            Route("/stream", stream),
+            Route("/text", lambda request: PlainTextResponse("z" * 4096)),
+        ]
+    )
+    return TestClient(CompressionMiddleware(inner, cache)), cache
+
+
+def get(client: TestClient, path: str, accept: str = "gzip", method: str = "GET"):
+    return client.request(method, path, headers={"Accept-Encoding": accept})
+
+
+class ChooseEncodingTest:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("gzip", "gzip"),
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("gzip;q=0, zstd;q=0", None),
+            ("identity", None),
+            ("*", "zstd"),
+            ("*;q=0.1, gzip;q=0", "zstd"),
+            ("GZIP ; q=0.9", "gzip"),
+            ("gzip;q=oops", None),
+            ("", None),
+        ],
+    )
+    def test_negotiation(self, header: str, expected: str | None):
+        assert choose_encoding(header, ["zstd", "br", "gzip"]) == expected
+
+    def test_only_offers_available_encodings(self):
+        assert choose_encoding("unknown, gzip;q=0.1") == "gzip"
+        assert "gzip" in ENCODINGS
+
+
+class CompressionMiddlewareTest:
+    def test_compresses_json(self):
+        client, _ = make_client()
+
+        response = get(client, "/games")
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(json.dumps(PAYLOAD))
+        # httpx decodes the body
+        assert response.json() == PAYLOAD
+
+    def test_identity_when_not_accepted(self):
+        client, _ = make_client()
+
+        response = get(client, "/games", accept="identity")
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == PAYLOAD
+
+    def test_small_bodies_are_not_compressed(self):
+        client, _ = make_client()
+
+        assert "content-encoding" not in get(client, "/small").headers
+
+    def test_streamed_bodies_pass_through(self):
+        client, _ = make_client()
+
+        response = get(client, "/stream")
+
+        assert "content-encoding" not in response.headers
+        assert response.content == b"x" * 4096 + b"y" * 4096
+
+    def test_text(self):
+        client, _ = make_client()
+
+        assert get(client, "/text").headers["content-encoding"] == "gzip"
+
+    def test_body_compressed_once(self):
+        client, cache = make_client()
+
+        first = get(client, "/games")
+        second = get(client, "/games")
+
+        assert len(cache) == 1
+        assert first.content == second.content
+
+    def test_uncacheable_responses_skip_the_cache(self):
+        client, cache = make_client()
+
+        assert get(client, "/private").headers["content-encoding"] == "gzip"
+        assert get(client, "/games", method="POST").headers["content-encoding"] == (
+            "gzip"
+        )
+        assert len(cache) == 0
+
+    def test_endpoint_is_compressed(self):
+        response = TestClient(app).get(
+            "/openapi.json", headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["info"]["title"] == "Fantasy League History API"
+
+
+class CompressedBodyCacheTest:
+    def test_hit_returns_stored_body(self):
+        cache = CompressedBodyCache(1 << 20)
+        body = json.dumps(PAYLOAD).encode()
+
+        compressed = cache.compress("gzip", body)
+
+        assert cache.compress("gzip", body) is compressed
+        assert gzip.decompress(compressed) == body
+
+    def test_evicts_least_recently_used(self):
+        bodies = [bytes([i]) * 10_000 for i in range(3)]
+        size = len(ENCODINGS["gzip"](bodies[0]))
+        cache = CompressedBodyCache(2 * size)
+
+        first = cache.compress("gzip", bodies[0])
+        second = cache.compress("gzip", bodies[1])
+        cache.compress("gzip", bodies[0])
+        cache.compress("gzip", bodies[2])
+
+        assert len(cache) == 2
+        assert cache.compress("gzip", bodies[0]) is first
+        # bodies[1] was evicted, so it is compressed again
+        assert cache.compress("gzip", bodies[1]) is not second
+
+    def test_disabled(self):
+        cache = CompressedBodyCache(0)
+
+        cache.compress("gzip", b"a" * 5000)
+
+        assert len(cache) == 0
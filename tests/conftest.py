@@ -1,13 +1,26 @@
 """Pytest configuration and fixtures."""
 
 import importlib
+import json
 import os
+import tempfile
+import threading
 import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
 
 import pytest
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
+# Without a PostgreSQL server the suite runs against a SQLite file, which
+# needs no server to wait for
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "fantasy_league_test.db"),
+)
+
 import app.config
 import app.database
 import app.models
@@ -17,6 +30,10 @@ from app.database import Base
 _test_db_url = None
 
 
+def is_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite")
+
+
 def get_test_db_url(database_url: str) -> str:
     """Get test database URL from main database URL."""
     base_url = database_url.rsplit("/", 1)[0]
@@ -94,6 +111,9 @@ def setup_database():
     database_url = os.getenv("DATABASE_URL", "")
     if not database_url:
         return
+    if is_sqlite(database_url):
+        recreate_schema(app.database.engine)
+        return
 
     # Wait for PostgreSQL server to be ready
     server_url = database_url.rsplit("/", 1)[0] + "/postgres"
@@ -146,6 +166,9 @@ def ensure_db_schema():
     database_url = os.getenv("DATABASE_URL", "")
     if not database_url:
         return
+    if is_sqlite(database_url):
+        recreate_schema(app.database.engine)
+        return
 
     test_db_url = get_test_db_url(database_url)
     test_engine = create_engine(test_db_url, pool_pre_ping=True)
@@ -166,10 +189,11 @@ def db_session():
     Uncommitted changes are rolled back after each test.
     """
     database_url = os.getenv("DATABASE_URL", "")
-    if not database_url:
+    if not database_url or is_sqlite(database_url):
         db = app.database.SessionLocal()
         try:
             yield db
+            db.rollback()
         finally:
             db.close()
         return
@@ -188,3 +212,75 @@ def db_session():
     finally:
         db.close()
         test_engine.dispose()
+
+
+class ESPNStubServer:
+    """Local HTTP server standing in for the ESPN API.
+
+    Responses are scripted with ``enqueue`` and served in order; once the
+    queue is empty every request gets ``default``.
+    """
+
+    def __init__(self):
+        self.responses: deque[tuple[int, Any, dict[str, str], float]] = deque()
+        self.default: tuple[int, Any, dict[str, str], float] = (200, [], {}, 0.0)
+        self.requests: list[str] = []
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    status, body, headers, delay = (
+                        stub.responses.popleft() if stub.responses else stub.default
+                    )
+                time.sleep(delay)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except ConnectionError:
+                    pass  # client gave up (timeout test)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+
+    def enqueue(
+        self,
+        status: int = 200,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+        delay: float = 0.0,
+    ) -> None:
+        self.responses.append(
+            (status, body if body is not None else [], headers or {}, delay)
+        )
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def espn_stub():
+    """Local stub of the ESPN API for client and importer tests."""
+    server = ESPNStubServer()
+    try:
+        yield server
+    finally:
+        server.close()
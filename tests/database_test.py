@@ -0,0 +1,272 @@
+"""Tests for read-replica routing."""
+
+import contextvars
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (
+    Base,
+    ReplicaPool,
+    RoutingSession,
+    create_sqlite_engine,
+    get_read_db,
+    reads_on_primary,
+    use_primary,
+)
+from app.main import app
+from app.models import Franchise, Game, League, Season
+from tests.conftest import create_test_database, get_test_db_url
+
+REPLICA_DB_NAME = "fantasy_league_test_replica"
+
+
+@pytest.fixture
+def engines():
+    """Primary and replica engines on two local databases.
+
+    Nothing replicates between them, so which database answered a query
+    shows where it was routed.
+    """
+    database_url = os.getenv("DATABASE_URL", "")
+    if not database_url.startswith("postgresql"):
+        pytest.skip("Replica routing tests need a PostgreSQL server")
+
+    create_test_database(database_url, REPLICA_DB_NAME)
+    primary_url = get_test_db_url(database_url)
+    primary = create_engine(primary_url)
+    replica = create_engine(f"{primary_url.rsplit('/', 1)[0]}/{REPLICA_DB_NAME}")
+    Base.metadata.drop_all(bind=replica)
+    Base.metadata.create_all(bind=replica)
+
+    with sessionmaker(bind=primary)() as db:
+        db.add(League(name="On Primary"))
+        db.commit()
+    with sessionmaker(bind=replica)() as db:
+        db.add(League(name="On Replica"))
+        db.commit()
+
+    try:
+        yield primary, replica
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+def make_session_factory(primary, replica_engines, **pool_kwargs):
+    return sessionmaker(
+        class_=RoutingSession,
+        primary=primary,
+        replicas=ReplicaPool(replica_engines, **pool_kwargs),
+    )
+
+
+def league_names(db) -> list[str]:
+    return [league.name for league in db.query(League).all()]
+
+
+class RoutingSessionTest:
+    def test_reads_go_to_replica(self, engines):
+        primary, replica = engines
+        with make_session_factory(primary, [replica])() as db:
+            assert league_names(db) == ["On Replica"]
+
+    def test_reads_use_primary_without_replicas(self, engines):
+        primary, _ = engines
+        with make_session_factory(primary, [])() as db:
+            assert league_names(db) == ["On Primary"]
+
+    def test_writes_go_to_primary(self, engines):
+        primary, replica = engines
+        with make_session_factory(primary, [replica])() as db:
+            db.add(League(name="New"))
+            db.commit()
+
+        with sessionmaker(bind=primary)() as db:
+            assert sorted(league_names(db)) == ["New", "On Primary"]
+        with sessionmaker(bind=replica)() as db:
+            assert league_names(db) == ["On Replica"]
+
+    def test_session_reads_its_own_writes(self, engines):
+        primary, replica = engines
+        with make_session_factory(primary, [replica])() as db:
+            db.add(League(name="New"))
+            db.flush()
+            assert sorted(league_names(db)) == ["New", "On Primary"]
+
+    def test_read_your_writes_window_after_commit(self, engines):
+        primary, replica = engines
+        factory = make_session_factory(primary, [replica], read_your_writes_seconds=60)
+        with factory() as db:
+            db.add(League(name="Imported"))
+            db.commit()
+
+        # A new session, e.g. the next request, still reads from the primary
+        with factory() as db:
+            assert "Imported" in league_names(db)
+
+    def test_use_primary_override(self, engines):
+        primary, replica = engines
+        with make_session_factory(primary, [replica])() as db:
+            with use_primary(db):
+                assert league_names(db) == ["On Primary"]
+            db.rollback()
+            assert league_names(db) == ["On Replica"]
+
+
+@pytest.fixture
+def sqlite_engines():
+    """Two independent in-memory engines standing in for replicas."""
+    first = create_sqlite_engine("sqlite://")
+    second = create_sqlite_engine("sqlite://")
+    try:
+        yield first, second
+    finally:
+        first.dispose()
+        second.dispose()
+
+
+def test_reads_on_primary(sqlite_engines):
+    primary, replica = sqlite_engines
+    factory = make_session_factory(primary, [replica])
+    binds = []
+
+    def read_bind():
+        with factory() as db:
+            binds.append(db.get_bind())
+
+    read_bind()
+    with reads_on_primary():
+        read_bind()
+        # Threads started with a copy of the context are pinned too
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(read_bind,)
+        )
+        thread.start()
+        thread.join()
+    read_bind()
+
+    assert binds == [replica, primary, primary, replica]
+
+
+class ReplicaPoolTest:
+    def test_round_robin(self, sqlite_engines):
+        first, second = sqlite_engines
+        pool = ReplicaPool([first, second])
+        assert [pool.choose() for _ in range(4)] == [first, second] * 2
+
+    def test_least_busy(self, sqlite_engines):
+        first, second = sqlite_engines
+        pool = ReplicaPool([first, second], strategy="least_busy")
+        with first.connect():
+            assert pool.choose() is second
+        with second.connect():
+            assert pool.choose() is first
+
+    def test_mark_write(self, sqlite_engines):
+        pool = ReplicaPool(list(sqlite_engines))
+        assert not pool.recently_written
+        pool.mark_write(60)
+        assert pool.recently_written
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError, match="Unknown replica strategy"):
+            ReplicaPool([], strategy="random")
+
+
+def test_read_endpoints_use_replicas(engines):
+    """Read-only endpoints are served through the routing session."""
+    primary, replica = engines
+    factory = make_session_factory(primary, [replica])
+
+    def override():
+        with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = override
+    try:
+        response = TestClient(app).get("/leagues")
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+
+    assert [league["name"] for league in response.json()] == ["On Replica"]
+
+
+class SqliteEngineTest:
+    def test_pragmas(self, tmp_path):
+        engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'league.db'}")
+        try:
+            with engine.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+                assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        finally:
+            engine.dispose()
+
+    def test_connection_per_thread(self, tmp_path):
+        engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'league.db'}")
+        connections = []
+
+        def connect():
+            with engine.connect() as conn:
+                connections.append(conn.connection.dbapi_connection)
+
+        try:
+            connect()
+            connect()
+            thread = threading.Thread(target=connect)
+            thread.start()
+            thread.join()
+        finally:
+            engine.dispose()
+
+        assert connections[0] is connections[1]
+        assert connections[2] is not connections[0]
+
+    def test_finished_threads_give_up_their_connection(self, tmp_path):
+        engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'league.db'}")
+
+        def connect():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        try:
+            with engine.connect() as held:
+                for _ in range(4 * engine.pool.size):
+                    thread = threading.Thread(target=connect)
+                    thread.start()
+                    thread.join()
+                # The connection this thread holds was not closed under it
+                assert held.execute(text("SELECT 1")).scalar() == 1
+        finally:
+            engine.dispose()
+
+    def test_partitioned_tables_get_ids(self):
+        """Game ids are generated although the table is keyed by season elsewhere."""
+        engine = create_sqlite_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        try:
+            with sessionmaker(bind=engine)() as db:
+                league = League(name="Local")
+                season = Season(league=league, year=2024)
+                home = Franchise(league=league, name="H")
+                away = Franchise(league=league, name="A")
+                games = [
+                    Game(
+                        season=season,
+                        week=week,
+                        game_type="REGULAR",
+                        franchise1=home,
+                        franchise2=away,
+                    )
+                    for week in (1, 2)
+                ]
+                db.add_all(games)
+                db.commit()
+                assert [game.id for game in games] == [1, 2]
+        finally:
+            engine.dispose()
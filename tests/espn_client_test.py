@@ -0,0 +1,141 @@
+"""Tests for ESPN client retry, backoff, rate limiting and circuit breaking."""
+
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services.espn_client import ESPNClient
+from app.services.rate_limit import (
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    backoff_delay,
+    parse_retry_after,
+)
+
+
+def make_client(stub, **kwargs) -> ESPNClient:
+    kwargs.setdefault("rate_limiter", TokenBucket(rate=1000))
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("timeout", 1.0)
+    return ESPNClient(swid="swid", espn_s2="s2", base_url=stub.base_url, **kwargs)
+
+
+class ESPNClientRetryTest:
+    """Tests for retries against a stub ESPN server."""
+
+    def test_retries_after_429(self, espn_stub):
+        """A 429 is retried after Retry-After and slows the token bucket."""
+        espn_stub.enqueue(429, {"error": "throttled"}, {"Retry-After": "0"})
+        espn_stub.enqueue(200, [{"seasonId": 2024}])
+        bucket = TokenBucket(rate=1000)
+        client = make_client(espn_stub, rate_limiter=bucket)
+
+        assert client.get_league_history(123) == [{"seasonId": 2024}]
+        assert len(espn_stub.requests) == 2
+        assert client.metrics.throttled == 1
+        assert client.metrics.retries == 1
+        assert bucket.rate < 1000
+
+    def test_retry_after_is_capped(self, espn_stub):
+        """A Retry-After beyond the backoff cap waits only the cap."""
+        espn_stub.enqueue(503, {"error": "busy"}, {"Retry-After": "3600"})
+        espn_stub.enqueue(200, [{"seasonId": 2024}])
+        client = make_client(espn_stub, backoff_max=0.05)
+
+        assert client.get_league_history(123) == [{"seasonId": 2024}]
+        assert client.metrics.backoff_seconds == 0.05
+
+    def test_retries_slow_response(self, espn_stub):
+        """A response slower than the timeout is retried."""
+        espn_stub.enqueue(200, [{"seasonId": 2023}], delay=0.5)
+        espn_stub.enqueue(200, [{"seasonId": 2024}])
+        client = make_client(espn_stub, timeout=0.1)
+
+        assert client.get_league_history(123) == [{"seasonId": 2024}]
+        assert client.metrics.retries == 1
+        assert client.metrics.failures == 1
+
+    def test_gives_up_after_max_retries(self, espn_stub):
+        """Persistent 5xx errors raise after max_retries."""
+        espn_stub.default = (503, {}, {}, 0.0)
+        client = make_client(espn_stub, max_retries=2)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_league_history(123)
+        assert len(espn_stub.requests) == 3
+
+    def test_client_error_not_retried(self, espn_stub):
+        """A 404 is raised immediately."""
+        espn_stub.enqueue(404, {"error": "not found"})
+        client = make_client(espn_stub)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_league_history(123)
+        assert len(espn_stub.requests) == 1
+        assert client.metrics.retries == 0
+
+    def test_circuit_opens_after_failures(self, espn_stub):
+        """Once the circuit opens, calls fail fast without hitting the server."""
+        espn_stub.default = (500, {}, {}, 0.0)
+        client = make_client(
+            espn_stub, circuit_breaker=CircuitBreaker(failure_threshold=2)
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_league_history(123)
+        assert len(espn_stub.requests) == 2
+        assert client.metrics.circuit_opened == 1
+
+        with pytest.raises(CircuitOpenError):
+            client.get_league_history(123)
+        assert len(espn_stub.requests) == 2
+
+
+class TokenBucketTest:
+    """Tests for the shared token bucket."""
+
+    def test_shared_bucket_limits_concurrent_clients(self, espn_stub):
+        """Clients sharing one bucket stay under its combined rate."""
+        bucket = TokenBucket(rate=20, capacity=1)
+        clients = [make_client(espn_stub, rate_limiter=bucket) for _ in range(3)]
+        threads = [
+            threading.Thread(target=client.get_league_history, args=(123,))
+            for client in clients
+            for _ in range(2)
+        ]
+
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(espn_stub.requests) == 6
+        # The first token is free; the other five wait 1/20s each
+        assert time.monotonic() - start >= 0.2
+
+    def test_reward_recovers_rate(self):
+        """Successes raise the rate back up to max_rate after a penalty."""
+        bucket = TokenBucket(rate=10, increase=5)
+        bucket.penalize()
+        assert bucket.rate == 5
+        bucket.reward()
+        bucket.reward()
+        assert bucket.rate == 10
+
+
+def test_backoff_delay_is_bounded():
+    """Jittered backoff never exceeds the exponential ceiling or the cap."""
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=4) <= min(4, 0.5 * 2**attempt)
+
+
+def test_parse_retry_after():
+    """Retry-After accepts seconds and HTTP dates."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,386 @@
+"""Tests for importing ESPN league data."""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    ImportCheckpoint,
+    League,
+    Manager,
+    Season,
+)
+from app.query_tracking import track_queries
+from app.services.espn_client import ESPNClient
+from app.services.espn_importer import ESPNImporter
+from app.services.rate_limit import TokenBucket
+
+
+def make_season(year: int) -> dict:
+    """Build an ESPN league history entry in ESPN's key order."""
+    return {
+        "members": [
+            {"id": "{A}", "displayName": "alice"},
+            {"id": "{B}", "displayName": "bob"},
+        ],
+        # ESPN sends the schedule before the teams it refers to
+        "schedule": [
+            {
+                "matchupPeriodId": 1,
+                "playoffTierType": "NONE",
+                "home": {"teamId": 1, "totalPoints": 110.5},
+                "away": {"teamId": 2, "totalPoints": 99.0},
+            },
+            {
+                "matchupPeriodId": 14,
+                "playoffTierType": "WINNERS_BRACKET",
+                "home": {"teamId": 2, "totalPoints": 120.0},
+                "away": {"teamId": 1, "totalPoints": 101.0},
+            },
+            {"matchupPeriodId": 15, "home": {"teamId": 1, "totalPoints": 90.0}},
+        ],
+        "seasonId": year,
+        "settings": {"name": "Stub League"},
+        "teams": [
+            {
+                "id": 1,
+                "abbrev": "AAA",
+                "owners": ["{A}"],
+                "record": {"overall": {"wins": 9, "losses": 5, "pointsFor": 1500.5}},
+                "rankCalculatedFinal": 2,
+            },
+            {
+                "id": 2,
+                "abbrev": "BBB",
+                "owners": ["{B}"],
+                "record": {"overall": {"wins": 5, "losses": 9, "pointsFor": 1400.0}},
+                "rankCalculatedFinal": 1,
+            },
+        ],
+    }
+
+
+@pytest.fixture
+def importer(espn_stub) -> ESPNImporter:
+    client = ESPNClient(
+        swid="swid",
+        espn_s2="s2",
+        base_url=espn_stub.base_url,
+        rate_limiter=TokenBucket(rate=1000),
+    )
+    return ESPNImporter(client)
+
+
+class ImportLeagueFirstSeasonTest:
+    """Tests for importing the first season of a league."""
+
+    def test_imports_first_season(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """Only the earliest season is imported, with its teams and managers."""
+        espn_stub.enqueue(200, [make_season(2024), make_season(2023)])
+
+        result = importer.import_league_first_season(db_session, 123)
+
+        assert result["league"].name == "Stub League"
+        assert result["season"].year == 2023
+        assert {f.name for f in result["franchises"]} == {"AAA", "BBB"}
+        assert {m.name for m in result["managers"]} == {"alice", "bob"}
+        assert len(result["franchise_seasons"]) == 2
+        assert db_session.query(Season).count() == 1
+
+
+class ImportLeagueHistoryStreamTest:
+    """Tests for the streaming league history importer."""
+
+    def test_imports_all_seasons(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """Every season, team and matchup is imported from the stream."""
+        espn_stub.enqueue(200, [make_season(2023), make_season(2024)])
+
+        counts = importer.import_league_history_stream(db_session, 123)
+
+        assert counts == {
+            "seasons": 2,
+            "managers": 2,
+            "franchises": 4,
+            "franchise_seasons": 4,
+            "games": 4,
+        }
+        assert "view=mMatchup" in espn_stub.requests[0]
+        assert db_session.query(League).count() == 1
+        assert db_session.query(Franchise).count() == 2
+        assert db_session.query(Manager).count() == 2
+        assert db_session.query(Game).count() == 4
+        assert (
+            db_session.query(Game).filter(Game.game_type == "PLAYOFF_WINNERS").count()
+            == 2
+        )
+
+        champion = (
+            db_session.query(FranchiseSeason)
+            .filter(FranchiseSeason.won_championship.is_(True))
+            .first()
+        )
+        assert champion.franchise.name == "BBB"
+        assert champion.regular_wins == 5
+        assert champion.points_for == 1400.0
+
+    def test_reimport_updates_in_place(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """Re-importing the same history does not duplicate rows."""
+        espn_stub.enqueue(200, [make_season(2024)])
+        importer.import_league_history_stream(db_session, 123)
+
+        season = make_season(2024)
+        season["schedule"][0]["home"]["totalPoints"] = 111.0
+        espn_stub.enqueue(200, [season])
+        importer.import_league_history_stream(db_session, 123)
+
+        assert db_session.query(Game).count() == 2
+        game = db_session.query(Game).filter(Game.week == 1).one()
+        assert game.franchise1_score == 111.0
+
+    def test_empty_history_raises(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """An empty history is an error, as for the first-season import."""
+        espn_stub.enqueue(200, [])
+
+        with pytest.raises(ValueError):
+            importer.import_league_history_stream(db_session, 123)
+
+
+def writes(statements: list[str]) -> list[str]:
+    return [
+        statement
+        for statement in statements
+        if statement.lstrip().startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+# Tables the importer writes; other writes come from tables derived from them
+IMPORTED = {
+    "league",
+    "season",
+    "manager",
+    "franchise",
+    "franchise_season",
+    "game",
+    "lineup",
+}
+
+
+def written_tables(statements: list[str]) -> list[str]:
+    tables = []
+    for statement in writes(statements):
+        words = statement.split()
+        tables.append(words[1] if words[0] == "UPDATE" else words[2])
+    return tables
+
+
+class RowHashTest:
+    """Tests for skipping unchanged rows on re-import."""
+
+    def test_resync_is_read_only(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        espn_stub.enqueue(200, [make_season(2023), make_season(2024)])
+        with track_queries() as first:
+            importer.import_league_history_stream(db_session, 123)
+
+        espn_stub.enqueue(200, [make_season(2023), make_season(2024)])
+        with track_queries() as resync:
+            counts = importer.import_league_history_stream(db_session, 123)
+
+        assert counts["games"] == 4
+        assert writes(first.statements)
+        assert writes(resync.statements) == []
+        assert resync.count < first.count
+
+    def test_only_changed_rows_are_written(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        espn_stub.enqueue(200, [make_season(2024)])
+        importer.import_league_history_stream(db_session, 123)
+
+        season = make_season(2024)
+        season["schedule"][1]["away"]["totalPoints"] = 102.5
+        espn_stub.enqueue(200, [season])
+        with track_queries() as log:
+            importer.import_league_history_stream(db_session, 123)
+
+        # Tables derived from the game (e.g. careers) are recomputed with it
+        assert [
+            table for table in written_tables(log.statements) if table in IMPORTED
+        ] == ["game"]
+        assert writes(log.statements)[0].startswith("UPDATE game")
+        game = db_session.query(Game).filter(Game.week == 14).one()
+        assert game.franchise2_score == 102.5
+
+
+def settings_only(*years: int) -> list[dict]:
+    """The league history as returned for the mSettings view alone."""
+    return [{"seasonId": year, "settings": {"name": "Stub League"}} for year in years]
+
+
+class ImportLeagueHistoryChunkedTest:
+    """Tests for the season-by-season league history importer."""
+
+    def test_commits_each_season(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """Every season is fetched on its own and checkpointed."""
+        espn_stub.enqueue(200, settings_only(2024, 2023))
+        espn_stub.enqueue(200, [make_season(2023)])
+        espn_stub.enqueue(200, [make_season(2024)])
+
+        counts = importer.import_league_history_chunked(db_session, 123)
+
+        assert counts == {
+            "seasons": 2,
+            "managers": 2,
+            "franchises": 4,
+            "franchise_seasons": 4,
+            "games": 4,
+            "skipped_seasons": 0,
+        }
+        assert "seasonId=2023" in espn_stub.requests[1]
+        assert "seasonId=2024" in espn_stub.requests[2]
+        assert {c.season_year for c in db_session.query(ImportCheckpoint)} == {
+            2023,
+            2024,
+        }
+        assert db_session.query(Game).count() == 4
+
+    def test_resumes_after_failure(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """A failed season keeps earlier ones; the rerun starts from it."""
+        espn_stub.enqueue(200, settings_only(2022, 2023, 2024))
+        espn_stub.enqueue(200, [make_season(2022)])
+        espn_stub.enqueue(200, [{"seasonId": 2023}])
+
+        with pytest.raises(ValueError):
+            importer.import_league_history_chunked(db_session, 123)
+
+        assert [s.year for s in db_session.query(Season)] == [2022]
+        assert db_session.query(Game).count() == 2
+
+        espn_stub.requests.clear()
+        espn_stub.enqueue(200, settings_only(2022, 2023, 2024))
+        espn_stub.enqueue(200, [make_season(2023)])
+        espn_stub.enqueue(200, [make_season(2024)])
+
+        counts = importer.import_league_history_chunked(db_session, 123)
+
+        assert counts["seasons"] == 2
+        assert counts["skipped_seasons"] == 1
+        assert len(espn_stub.requests) == 3
+        assert not any("seasonId=2022" in path for path in espn_stub.requests)
+        assert db_session.query(Season).count() == 3
+        assert db_session.query(Game).count() == 6
+
+    def test_latest_season_is_always_reimported(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """The latest season may be in progress, so its checkpoint is ignored."""
+        espn_stub.enqueue(200, settings_only(2023, 2024))
+        espn_stub.enqueue(200, [make_season(2023)])
+        espn_stub.enqueue(200, [make_season(2024)])
+        importer.import_league_history_chunked(db_session, 123)
+
+        season = make_season(2024)
+        season["schedule"][0]["home"]["totalPoints"] = 111.0
+        espn_stub.enqueue(200, settings_only(2023, 2024))
+        espn_stub.enqueue(200, [season])
+        counts = importer.import_league_history_chunked(db_session, 123)
+
+        assert counts["skipped_seasons"] == 1
+        game = (
+            db_session.query(Game)
+            .join(Season, Game.season_id == Season.id)
+            .filter(Season.year == 2024, Game.week == 1)
+            .one()
+        )
+        assert game.franchise1_score == 111.0
+
+    def test_restart_ignores_checkpoints(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        espn_stub.enqueue(200, settings_only(2023, 2024))
+        espn_stub.enqueue(200, [make_season(2023)])
+        espn_stub.enqueue(200, [make_season(2024)])
+        importer.import_league_history_chunked(db_session, 123)
+
+        espn_stub.enqueue(200, settings_only(2023, 2024))
+        espn_stub.enqueue(200, [make_season(2023)])
+        espn_stub.enqueue(200, [make_season(2024)])
+        counts = importer.import_league_history_chunked(db_session, 123, restart=True)
+
+        assert counts["skipped_seasons"] == 0
+        assert db_session.query(Game).count() == 4
+
+
+class ExternalIdTest:
+    """Tests for matching imported records by ESPN ID."""
+
+    def test_renames_follow_espn_ids(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """A changed display name or abbreviation updates the existing row."""
+        espn_stub.enqueue(200, [make_season(2023)])
+        importer.import_league_history_stream(db_session, 123)
+
+        season = make_season(2024)
+        season["members"][0]["displayName"] = "alice2"
+        season["teams"][0]["abbrev"] = "AAA2"
+        espn_stub.enqueue(200, [season])
+        importer.import_league_history_stream(db_session, 123)
+
+        assert {m.name for m in db_session.query(Manager)} == {"alice2", "bob"}
+        assert {f.name for f in db_session.query(Franchise)} == {"AAA2", "BBB"}
+        alice = db_session.query(Manager).filter_by(espn_member_id="{A}").one()
+        assert len(alice.franchise_seasons) == 2
+
+    def test_known_managers_are_not_fetched(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """A manager seen again under the same name costs no query or write."""
+        espn_stub.enqueue(200, [make_season(2023)])
+        importer.import_league_history_stream(db_session, 123)
+        alice = db_session.query(Manager).filter_by(espn_member_id="{A}").one()
+        member = {"id": "{A}", "displayName": "alice"}
+
+        with track_queries() as log:
+            assert importer._get_or_create_manager(db_session, member) == alice.id
+        assert log.count == 0
+
+        renamed = {"id": "{A}", "displayName": "alice2"}
+        assert importer._get_or_create_manager(db_session, renamed) == alice.id
+        db_session.flush()
+        assert alice.name == "alice2"
+
+    def test_links_rows_imported_without_ids(
+        self, db_session: Session, espn_stub, importer: ESPNImporter
+    ):
+        """Rows from before ESPN IDs were recorded are linked, not duplicated."""
+        league = League(name="Stub League", settings={"name": "Stub League"})
+        db_session.add_all([league, Manager(name="alice")])
+        db_session.flush()
+        db_session.add(Franchise(league_id=league.id, name="AAA"))
+        db_session.commit()
+
+        espn_stub.enqueue(200, [make_season(2023)])
+        importer.import_league_history_stream(db_session, 123)
+
+        assert db_session.query(Manager).count() == 2
+        assert db_session.query(Franchise).count() == 2
+        alice = db_session.query(Manager).filter_by(name="alice").one()
+        assert alice.espn_member_id == "{A}"
+        franchise = db_session.query(Franchise).filter_by(name="AAA").one()
+        assert franchise.espn_team_id == 1
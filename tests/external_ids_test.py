@@ -0,0 +1,94 @@
+"""Tests for ESPN ID resolution and upserts."""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Franchise, League, Manager
+from app.query_tracking import track_queries
+from app.services.external_ids import ExternalIdCache, upsert
+
+
+@pytest.fixture
+def league(db_session: Session) -> League:
+    league = League(name="External ID League")
+    db_session.add(league)
+    db_session.flush()
+    db_session.add_all(
+        [
+            Manager(name="alice", espn_member_id="{A}"),
+            Manager(name="legacy"),
+            Franchise(league_id=league.id, name="AAA", espn_team_id=1),
+            Franchise(league_id=league.id, name="OLD"),
+        ]
+    )
+    db_session.commit()
+    return league
+
+
+class ExternalIdCacheTest:
+    def test_loads_maps_once(self, db_session: Session, league: League):
+        ids = ExternalIdCache()
+        league_id = league.id
+
+        with track_queries() as log:
+            ids.load(db_session)
+            ids.load_league(db_session, league_id)
+            ids.load(db_session)
+            ids.load_league(db_session, league_id)
+        assert log.count == 2
+
+        alice = db_session.query(Manager).filter_by(name="alice").one()
+        assert ids.managers == {"{A}": alice.id}
+        assert ids.manager_names == {alice.id: "alice"}
+        assert "legacy" in ids.unlinked_managers
+        assert list(ids.franchises) == [(league.id, 1)]
+        assert list(ids.unlinked_franchises) == [(league.id, "OLD")]
+
+    def test_unique_ids(self, db_session: Session, league: League):
+        db_session.add(Manager(name="alice again", espn_member_id="{A}"))
+
+        with pytest.raises(IntegrityError):
+            db_session.flush()
+
+    def test_team_ids_are_unique_per_league(self, db_session: Session, league):
+        other = League(name="Other League")
+        db_session.add(other)
+        db_session.flush()
+
+        # The same ESPN team ID is fine in another league
+        db_session.add(Franchise(league_id=other.id, name="AAA", espn_team_id=1))
+        db_session.flush()
+        db_session.add(Franchise(league_id=league.id, name="DUP", espn_team_id=1))
+        with pytest.raises(IntegrityError):
+            db_session.flush()
+
+
+class UpsertTest:
+    def test_inserts_then_updates(self, db_session: Session, league: League):
+        values = {"name": "bob", "espn_member_id": "{B}"}
+        bob = upsert(db_session, Manager, values, ["espn_member_id"], ["name"])
+        renamed = upsert(
+            db_session,
+            Manager,
+            {**values, "name": "robert"},
+            ["espn_member_id"],
+            ["name"],
+        )
+        db_session.commit()
+
+        assert renamed is bob
+        assert bob.name == "robert"
+        assert db_session.query(Manager).filter_by(espn_member_id="{B}").count() == 1
+
+    def test_composite_key(self, db_session: Session, league: League):
+        franchise = upsert(
+            db_session,
+            Franchise,
+            {"league_id": league.id, "name": "AAA2", "espn_team_id": 1},
+            ["league_id", "espn_team_id"],
+            ["name"],
+        )
+
+        assert franchise.name == "AAA2"
+        assert db_session.query(Franchise).count() == 2
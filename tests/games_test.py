@@ -0,0 +1,271 @@
+"""Tests for game pages and the score percentile index."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Franchise, Game, League, Lineup, Player, Season
+from app.query_tracking import track_queries
+from app.services import league_snapshot
+from app.services.league_snapshot import (
+    open_league_snapshot,
+    write_league_snapshot,
+)
+from app.services.score_index import SCORE_INDEX, ScoreIndex, SortedScores
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    SCORE_INDEX.invalidate()
+    yield
+    SCORE_INDEX.invalidate()
+
+
+@pytest.fixture
+def league(db_session: Session) -> League:
+    """Four weeks of A vs B; week 4 has lineups."""
+    league = League(name="Score League")
+    db_session.add(league)
+    db_session.flush()
+    season = Season(league_id=league.id, year=2024)
+    home = Franchise(league_id=league.id, name="A")
+    away = Franchise(league_id=league.id, name="B")
+    qb, rb = (
+        Player(name="Quarter Back", position="QB"),
+        Player(name="Run", position="RB"),
+    )
+    db_session.add_all([season, home, away, qb, rb])
+    db_session.flush()
+
+    for week, home_score, away_score in (
+        (1, 100.0, 90.0),
+        (2, 80.0, 120.0),
+        (3, 110.0, 105.0),
+        (4, 150.0, 70.0),
+    ):
+        db_session.add(
+            Game(
+                season_id=season.id,
+                week=week,
+                game_type="REGULAR",
+                franchise1_id=home.id,
+                franchise2_id=away.id,
+                franchise1_score=home_score,
+                franchise2_score=away_score,
+            )
+        )
+    db_session.flush()
+    game = db_session.scalars(select(Game).where(Game.week == 4)).one()
+    db_session.add_all(
+        [
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchise.id,
+                player_id=player.id,
+                position=player.position,
+                score=score,
+            )
+            for franchise, player, score in (
+                (home, qb, 30.0),
+                (home, rb, 25.0),
+                (away, qb, 10.0),
+            )
+        ]
+    )
+    db_session.commit()
+    return league
+
+
+def game_id(db: Session, week: int) -> int:
+    return db.scalars(select(Game.id).where(Game.week == week)).one()
+
+
+class SortedScoresTest:
+    def test_percentile_and_rank(self):
+        scores = SortedScores([70.0, 80.0, 90.0, 100.0])
+
+        assert scores.percentile(100.0) == 87.5
+        assert scores.percentile(60.0) == 0.0
+        assert scores.percentile(200.0) == 100.0
+        assert scores.rank(100.0) == 1
+        assert scores.rank(85.0) == 3
+
+    def test_ties_share_a_rank(self):
+        scores = SortedScores([90.0, 100.0, 100.0])
+
+        assert scores.rank(100.0) == 1
+        assert scores.rank(90.0) == 3
+        assert scores.percentile(100.0) == 66.7
+
+    def test_empty(self):
+        scores = SortedScores()
+
+        assert scores.percentile(10.0) is None
+        assert scores.describe(None) == {
+            "value": None,
+            "percentile": None,
+            "rank": None,
+            "of": 0,
+        }
+
+
+class ScoreIndexTest:
+    def test_built_once(self, db_session: Session, league: League):
+        index = ScoreIndex(ttl_seconds=60)
+        index.league(db_session, league.id)
+
+        with track_queries() as log:
+            scores = index.league(db_session, league.id)
+
+        assert log.count == 0
+        assert len(scores.franchise_scores) == 8
+        assert len(scores.margins) == 4
+        assert len(scores.player_scores["QB"]) == 2
+
+    def test_commit_invalidates(self, db_session: Session, league: League):
+        assert len(SCORE_INDEX.league(db_session, league.id).franchise_scores) == 8
+
+        game = db_session.scalars(select(Game)).first()
+        db_session.add(
+            Game(
+                season_id=game.season_id,
+                week=5,
+                game_type="REGULAR",
+                franchise1_id=game.franchise1_id,
+                franchise2_id=game.franchise2_id,
+                franchise1_score=1.0,
+                franchise2_score=2.0,
+            )
+        )
+        db_session.commit()
+
+        assert len(SCORE_INDEX.league(db_session, league.id).franchise_scores) == 10
+
+    def test_built_from_snapshot(
+        self, db_session: Session, league: League, tmp_path, monkeypatch
+    ):
+        from_database = ScoreIndex(ttl_seconds=60).league(db_session, league.id)
+        monkeypatch.setattr(league_snapshot.settings, "snapshot_dir", str(tmp_path))
+        write_league_snapshot(db_session, league.id)
+        index = ScoreIndex(ttl_seconds=60)
+
+        with track_queries() as log:
+            scores = index.league(db_session, league.id)
+
+        assert log.count == 0
+        for field in ("franchise_scores", "margins"):
+            assert getattr(scores, field).describe(100.0) == getattr(
+                from_database, field
+            ).describe(100.0)
+        assert scores.player_score("QB", 30.0) == {
+            "value": 30.0,
+            "percentile": 75.0,
+            "rank": 1,
+            "of": 2,
+        }
+
+        game = db_session.scalars(select(Game)).first()
+        db_session.add(
+            Game(
+                season_id=game.season_id,
+                week=5,
+                game_type="REGULAR",
+                franchise1_id=game.franchise1_id,
+                franchise2_id=game.franchise2_id,
+            )
+        )
+        db_session.commit()
+        write_league_snapshot(db_session, league.id)
+
+        # A new snapshot is picked up at once; the unscored game is skipped
+        assert index.league(db_session, league.id) is not scores
+        assert len(index.league(db_session, league.id).franchise_scores) == 8
+
+    def test_concurrent_misses_build_once(
+        self, db_session: Session, league: League, monkeypatch
+    ):
+        league_id = league.id
+        index = ScoreIndex(ttl_seconds=60)
+        build = ScoreIndex._build
+        builds = []
+
+        def slow_build(db, league_id):
+            builds.append(league_id)
+            time.sleep(0.05)
+            return build(db, league_id)
+
+        monkeypatch.setattr(index, "_build", slow_build)
+
+        def lookup():
+            with SessionLocal() as db:
+                return index.league(db, league_id)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: lookup(), range(8)))
+
+        assert builds == [league_id]
+        assert all(result is results[0] for result in results)
+
+    def test_snapshot_replaced_during_build(
+        self, db_session: Session, league: League, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(league_snapshot.settings, "snapshot_dir", str(tmp_path))
+        write_league_snapshot(db_session, league.id)
+        index = ScoreIndex(ttl_seconds=60)
+        build = ScoreIndex._build_from_snapshot
+
+        def build_while_reimporting(snapshot):
+            # A re-import replaces the file after the build picked its snapshot
+            write_league_snapshot(db_session, league.id)
+            assert open_league_snapshot(league.id) is not snapshot
+            return build(snapshot)
+
+        monkeypatch.setattr(index, "_build_from_snapshot", build_while_reimporting)
+
+        assert len(index.league(db_session, league.id).franchise_scores) == 8
+
+
+class GameEndpointTest:
+    def test_game(self, db_session: Session, league: League):
+        response = client.get(f"/games/{game_id(db_session, 4)}")
+
+        assert response.status_code == 200
+        body = response.json()
+        home, away = body["franchises"]
+        assert home["name"] == "A"
+        assert home["score"] == {"value": 150.0, "percentile": 93.8, "rank": 1, "of": 8}
+        assert away["score"]["rank"] == 8
+        assert body["margin"] == {"value": 80.0, "percentile": 87.5, "rank": 1, "of": 4}
+        assert [
+            (row["player"]["name"], row["score"]["rank"]) for row in home["lineup"]
+        ] == [("Quarter Back", 1), ("Run", 1)]
+        assert away["lineup"][0]["score"]["percentile"] == 25.0
+
+    def test_season_week(self, db_session: Session, league: League):
+        season_id = db_session.scalars(select(Season.id)).one()
+        response = client.get(f"/seasons/{season_id}/games", params={"week": 2})
+
+        assert response.status_code == 200
+        [game] = response.json()
+        assert game["week"] == 2
+        assert game["franchises"][1]["score"]["rank"] == 2
+        assert "lineup" not in game["franchises"][0]
+
+    def test_season(self, db_session: Session, league: League):
+        season_id = db_session.scalars(select(Season.id)).one()
+
+        games = client.get(f"/seasons/{season_id}/games").json()
+
+        assert [game["week"] for game in games] == [1, 2, 3, 4]
+
+    def test_unknown(self, db_session: Session):
+        assert client.get("/games/999999").status_code == 404
+        assert client.get("/seasons/999999/games").status_code == 404
@@ -0,0 +1,77 @@
+"""Tests for incremental JSON parsing."""
+
+import json
+import tracemalloc
+
+import pytest
+
+from app.services.json_stream import iter_items
+
+DOCUMENT = [
+    {
+        "members": [{"id": "{A}", "displayName": 'a "quoted" ] name'}],
+        "seasonId": 2023,
+        "settings": {"name": "Léague", "nested": {"list": [1, 2, {"x": "}"}]}},
+        "teams": [{"id": 1, "abbrev": "AAA"}, {"id": 2, "abbrev": "B[B"}],
+    },
+    {"seasonId": 2024, "teams": [], "draftDetail": {"picks": [[1, 2], [3]]}},
+]
+PREFIXES = {"item.seasonId", "item.teams.item", "item.members.item"}
+
+
+def expected_items() -> list:
+    items = []
+    for index, season in enumerate(DOCUMENT):
+        items.extend((index, "item.members.item", m) for m in season.get("members", []))
+        items.append((index, "item.seasonId", season["seasonId"]))
+        items.extend((index, "item.teams.item", t) for t in season["teams"])
+    return items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 1 << 20])
+def test_iter_items_any_chunking(chunk_size: int):
+    """Items are found regardless of where chunk boundaries fall."""
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    chunks = [raw[i : i + chunk_size] for i in range(0, len(raw), chunk_size)]
+
+    assert list(iter_items(chunks, PREFIXES)) == expected_items()
+
+
+def test_iter_items_object_root():
+    """A root object yields items with no root index."""
+    chunks = [b'{"a": 12', b'34, "b": [true, null]}']
+
+    assert list(iter_items(chunks, {"a", "b.item"})) == [
+        (None, "a", 1234),
+        (None, "b.item", True),
+        (None, "b.item", None),
+    ]
+
+
+def test_iter_items_truncated_document():
+    """A truncated document is an error, not a silent partial result."""
+    with pytest.raises(ValueError):
+        list(iter_items([b'[{"teams": [{"id": 1}'], {"item.teams.item"}))
+
+
+def test_iter_items_memory_tracks_one_record():
+    """Peak memory stays far below the size of the whole payload."""
+    team = json.dumps({"id": 1, "abbrev": "AAA", "roster": list(range(200))})
+    n_teams = 1000
+
+    def chunks():
+        yield b'[{"seasonId": 2024, "teams": ['
+        for i in range(n_teams):
+            yield (("," if i else "") + team).encode()
+        yield b"]}]"
+
+    payload_size = sum(len(chunk) for chunk in chunks())
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_items(chunks(), {"item.teams.item"}))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == n_teams
+    assert peak < payload_size / 4
@@ -0,0 +1,193 @@
+"""Tests for importing many leagues concurrently."""
+
+from functools import partial
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import League, ManagerCareer, ManagerOpponentRecord, Season, Streak
+from app.models.manager_career import rebuild_manager_careers
+from app.models.streak import rebuild_streaks
+from app.services.espn_client import ESPNClient
+from app.services.league_imports import (
+    import_leagues,
+    league_import_lock,
+    read_league_ids,
+)
+
+
+def league_history(name: str, year: int = 2024) -> list[dict]:
+    return [
+        {
+            "seasonId": year,
+            "settings": {"name": name},
+            "members": [{"id": "{A}", "displayName": "alice"}],
+            "teams": [{"id": 1, "abbrev": "AAA", "owners": ["{A}"]}],
+        }
+    ]
+
+
+def shared_managers_history(name: str) -> list[dict]:
+    """A season whose two managers also play in every other such league."""
+    return [
+        {
+            "seasonId": 2024,
+            "settings": {"name": name},
+            "members": [
+                {"id": "{A}", "displayName": "alice"},
+                {"id": "{B}", "displayName": "bob"},
+            ],
+            "schedule": [
+                {
+                    "matchupPeriodId": week,
+                    "playoffTierType": "NONE",
+                    "home": {"teamId": 1, "totalPoints": 100.0 + week},
+                    "away": {"teamId": 2, "totalPoints": 100.0},
+                }
+                for week in (1, 2, 3)
+            ],
+            "teams": [
+                {"id": 1, "abbrev": "AAA", "owners": ["{A}"]},
+                {"id": 2, "abbrev": "BBB", "owners": ["{B}"]},
+            ],
+        }
+    ]
+
+
+def derived_rows(db: Session) -> dict[str, list[tuple]]:
+    db.expire_all()
+    return {
+        "careers": sorted(
+            (c.manager_id, c.seasons, c.regular_wins, c.regular_losses)
+            for c in db.query(ManagerCareer)
+        ),
+        "opponents": sorted(
+            (r.manager_id, r.opponent_id, r.games, r.wins)
+            for r in db.query(ManagerOpponentRecord)
+        ),
+        "streaks": sorted(
+            (s.scope, s.subject_id, s.span, s.kind, s.length, s.season_id or 0)
+            for s in db.query(Streak)
+        ),
+    }
+
+
+@pytest.fixture
+def sessions(db_session: Session):
+    return sessionmaker(bind=db_session.get_bind(), autoflush=False)
+
+
+@pytest.fixture
+def client_factory(espn_stub):
+    return partial(ESPNClient, swid="swid", espn_s2="s2", base_url=espn_stub.base_url)
+
+
+def test_read_league_ids():
+    lines = ["123\n", "\n", "# tracked leagues\n", " 456  # work league\n"]
+
+    assert read_league_ids(lines) == [123, 456]
+
+
+class ImportLeaguesTest:
+    def test_imports_each_league(
+        self, db_session: Session, espn_stub, sessions, client_factory
+    ):
+        espn_stub.enqueue(200, league_history("First"))
+        espn_stub.enqueue(200, league_history("Second"))
+
+        results = import_leagues(
+            [1, 2, 1],
+            sessions,
+            mode="first_season",
+            workers=1,
+            client_factory=client_factory,
+        )
+
+        assert [(r.league_id, r.status) for r in results] == [
+            (1, "imported"),
+            (2, "imported"),
+        ]
+        assert results[0].counts == {
+            "seasons": 1,
+            "managers": 1,
+            "franchises": 1,
+            "franchise_seasons": 1,
+        }
+        assert results[0].records == 4
+        assert results[0].seconds > 0
+        assert {league.name for league in db_session.query(League)} == {
+            "First",
+            "Second",
+        }
+
+    def test_scoring_period(self, espn_stub, sessions, client_factory):
+        espn_stub.enqueue(200, league_history("First"))
+        espn_stub.enqueue(200, league_history("Second"))
+
+        results = import_leagues(
+            [1, 2],
+            sessions,
+            mode="stream",
+            scoring_period_id=7,
+            client_factory=client_factory,
+        )
+
+        assert [r.status for r in results] == ["imported", "imported"]
+        assert len(espn_stub.requests) == 2
+        assert all("scoringPeriodId=7" in path for path in espn_stub.requests)
+
+    def test_failed_league_does_not_stop_the_others(
+        self, db_session: Session, espn_stub, sessions, client_factory
+    ):
+        espn_stub.enqueue(404, {"error": "not found"})
+        espn_stub.enqueue(200, league_history("Second"))
+
+        results = import_leagues(
+            [1, 2], sessions, mode="stream", workers=1, client_factory=client_factory
+        )
+
+        assert [r.status for r in results] == ["failed", "imported"]
+        assert "404" in results[0].error
+        assert db_session.query(Season).count() == 1
+
+    def test_locked_league_is_skipped(
+        self, db_session: Session, espn_stub, sessions, client_factory
+    ):
+        with league_import_lock(db_session.get_bind(), 1) as acquired:
+            assert acquired
+            with league_import_lock(db_session.get_bind(), 1) as again:
+                assert not again
+            results = import_leagues(
+                [1], sessions, mode="stream", client_factory=client_factory
+            )
+
+        assert results[0].status == "locked"
+        assert espn_stub.requests == []
+
+        # Released on exit
+        with league_import_lock(db_session.get_bind(), 1) as acquired:
+            assert acquired
+
+    def test_concurrent_leagues_share_managers(
+        self, db_session: Session, espn_stub, sessions, client_factory
+    ):
+        espn_stub.enqueue(200, shared_managers_history("First"))
+        espn_stub.enqueue(200, shared_managers_history("Second"))
+
+        results = import_leagues(
+            [1, 2], sessions, mode="stream", workers=2, client_factory=client_factory
+        )
+
+        assert [r.status for r in results] == ["imported", "imported"]
+        imported = derived_rows(db_session)
+        # One career per manager, covering both leagues
+        assert [seasons for _, seasons, *_ in imported["careers"]] == [2, 2]
+        assert imported["opponents"] and imported["streaks"]
+        rebuild_manager_careers(db_session)
+        rebuild_streaks(db_session)
+        db_session.commit()
+        assert derived_rows(db_session) == imported
+
+    def test_unknown_mode(self, sessions):
+        with pytest.raises(ValueError):
+            import_leagues([1], sessions, mode="everything")
@@ -0,0 +1,110 @@
+"""Tests for the league overview endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import query_tracking
+from app.main import app
+from app.models import Franchise, FranchiseSeason, League, Manager, Season
+from app.query_tracking import track_queries
+from app.services.league_overview import load_league_overview
+
+client = TestClient(app)
+
+
+def make_league(db: Session, n_seasons: int, n_franchises: int = 4) -> League:
+    """A league where franchise ``year % n_franchises`` wins each season."""
+    league = League(name=f"Overview League {n_seasons}")
+    db.add(league)
+    db.flush()
+    franchises = [
+        Franchise(league_id=league.id, name=f"T{i}") for i in range(n_franchises)
+    ]
+    managers = [
+        Manager(name=f"League {league.id} Manager {i}") for i in range(n_franchises)
+    ]
+    db.add_all([*franchises, *managers])
+    db.flush()
+    for year in range(2020, 2020 + n_seasons):
+        season = Season(league_id=league.id, year=year)
+        db.add(season)
+        db.flush()
+        for i, (franchise, manager) in enumerate(
+            zip(franchises, managers, strict=True)
+        ):
+            champion = i == year % n_franchises
+            db.add(
+                FranchiseSeason(
+                    franchise_id=franchise.id,
+                    season_id=season.id,
+                    manager_id=manager.id,
+                    regular_wins=10 if champion else 5,
+                    points_for=100.0,
+                    final_standing=1 if champion else i + 2,
+                    won_championship=champion,
+                )
+            )
+    db.commit()
+    return league
+
+
+def test_overview(db_session: Session):
+    league = make_league(db_session, n_seasons=3)
+
+    response = client.get(f"/leagues/{league.id}/overview")
+
+    assert response.status_code == 200
+    overview = response.json()
+    assert overview["league"]["name"] == league.name
+    assert [s["year"] for s in overview["seasons"]] == [2020, 2021, 2022]
+    assert [s["champion"]["franchise_name"] for s in overview["seasons"]] == [
+        "T0",
+        "T1",
+        "T2",
+    ]
+    assert len(overview["franchises"]) == 4
+    t0_seasons = overview["franchises"][0]["seasons"]
+    assert [s["year"] for s in t0_seasons] == [2020, 2021, 2022]
+    assert t0_seasons[0]["manager"]["name"].endswith("Manager 0")
+    assert overview["summary"]["season_count"] == 3
+    assert overview["summary"]["manager_count"] == 4
+    assert overview["summary"]["total_points"] == 1200.0
+    assert sorted(overview["summary"]["championships_by_manager"].values()) == [
+        1,
+        1,
+        1,
+    ]
+
+
+def test_overview_not_found():
+    response = client.get("/leagues/999999/overview")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("n_seasons", [1, 8])
+def test_overview_query_count_is_constant(db_session: Session, n_seasons: int):
+    """League, seasons, franchises and franchise-seasons: four statements."""
+    league_id = make_league(db_session, n_seasons).id
+    db_session.expire_all()
+
+    with track_queries() as log:
+        overview = load_league_overview(db_session, league_id)
+
+    assert overview is not None
+    assert len(overview["seasons"]) == n_seasons
+    assert log.count == 4
+
+
+def test_overview_endpoint_query_count(monkeypatch, db_session: Session):
+    monkeypatch.setattr(query_tracking.settings, "debug_query_count", True)
+    small = make_league(db_session, n_seasons=1)
+    large = make_league(db_session, n_seasons=6)
+
+    counts = [
+        client.get(f"/leagues/{league.id}/overview").headers["X-Query-Count"]
+        for league in (small, large)
+    ]
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,206 @@
+"""Tests for memory-mapped league snapshots."""
+
+import math
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    League,
+    Lineup,
+    Manager,
+    Player,
+    Season,
+)
+from app.services import league_snapshot
+from app.services.espn_client import ESPNClient
+from app.services.espn_importer import ESPNImporter
+from app.services.league_snapshot import (
+    LeagueSnapshot,
+    open_league_snapshot,
+    snapshot_path,
+    write_league_snapshot,
+)
+from app.services.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def league(db_session: Session) -> League:
+    """A league with one season, two franchises, a game and three lineups."""
+    league = League(name="Snapshot League")
+    db_session.add(league)
+    db_session.flush()
+    season = Season(league_id=league.id, year=2024)
+    franchises = [Franchise(league_id=league.id, name=n) for n in ("Alpha", "Beta")]
+    manager = Manager(name="Snapshot Manager")
+    players = [
+        Player(name="Josh Allen", position="QB"),
+        Player(name="Bijan Robinson", position="RB"),
+    ]
+    db_session.add_all([season, *franchises, manager, *players])
+    db_session.flush()
+    db_session.add(
+        FranchiseSeason(
+            franchise_id=franchises[0].id,
+            season_id=season.id,
+            manager_id=manager.id,
+            regular_wins=9,
+            points_for=1500.5,
+            won_championship=True,
+        )
+    )
+    game = Game(
+        season_id=season.id,
+        week=1,
+        game_type="REGULAR",
+        franchise1_id=franchises[0].id,
+        franchise2_id=franchises[1].id,
+        franchise1_score=120.5,
+    )
+    db_session.add(game)
+    db_session.flush()
+    db_session.add_all(
+        [
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchises[0].id,
+                player_id=players[0].id,
+                score=30.5,
+                position="QB",
+            ),
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchises[0].id,
+                player_id=players[1].id,
+                score=None,
+                position="BENCH",
+            ),
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchises[1].id,
+                player_id=players[1].id,
+                score=12.0,
+            ),
+        ]
+    )
+    db_session.commit()
+    return league
+
+
+class LeagueSnapshotTest:
+    def test_round_trip(self, db_session: Session, league: League, tmp_path):
+        path = write_league_snapshot(db_session, league.id, tmp_path / "s.snap")
+
+        with LeagueSnapshot.open(path) as snapshot:
+            assert snapshot.league_id == league.id
+            assert snapshot.league_name == "Snapshot League"
+            assert len(snapshot.games) == 1
+            assert len(snapshot.lineups) == 3
+
+            games = snapshot.games
+            assert games["week"][0] == 1
+            assert snapshot.strings[games["game_type"][0]] == "REGULAR"
+            assert games["franchise1_score"][0] == 120.5
+            assert math.isnan(games["franchise2_score"][0])
+
+            # Lineups are ordered by game, then ID
+            lineups = snapshot.lineups
+            assert lineups["score"].tolist() == pytest.approx(
+                [30.5, math.nan, 12.0], nan_ok=True
+            )
+            positions = [snapshot.strings[i] for i in lineups["position"]]
+            assert positions == ["QB", "BENCH", None]
+
+            names = [snapshot.strings[i] for i in snapshot.franchises["name"]]
+            assert sorted(names) == ["Alpha", "Beta"]
+            assert snapshot.franchise_seasons["won_championship"].tolist() == [1]
+            # Missing integers are stored as -1
+            assert snapshot.franchise_seasons["final_standing"].tolist() == [-1]
+
+    def test_columns_are_views_over_the_file(
+        self, db_session: Session, league: League, tmp_path
+    ):
+        path = write_league_snapshot(db_session, league.id, tmp_path / "s.snap")
+
+        with LeagueSnapshot.open(path) as snapshot:
+            scores = snapshot.lineups["score"]
+            assert isinstance(scores, memoryview)
+            assert scores.readonly
+            assert scores.format == "d"
+
+    def test_strings_are_interned(self, db_session: Session, league: League, tmp_path):
+        path = write_league_snapshot(db_session, league.id, tmp_path / "s.snap")
+
+        with LeagueSnapshot.open(path) as snapshot:
+            # "Bijan Robinson" appears once however many lineups reference him
+            all_strings = [snapshot.strings[i] for i in range(len(snapshot.strings))]
+            assert len(all_strings) == len(set(all_strings))
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not.snap"
+        path.write_bytes(b"not a snapshot at all")
+
+        with pytest.raises(ValueError, match="not a league snapshot"):
+            LeagueSnapshot.open(path)
+
+    def test_unknown_league(self, db_session: Session, tmp_path):
+        with pytest.raises(ValueError, match="not found"):
+            write_league_snapshot(db_session, 999999, tmp_path / "s.snap")
+
+
+def test_open_league_snapshot_reopens_after_rewrite(
+    db_session: Session, league: League, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(league_snapshot.settings, "snapshot_dir", str(tmp_path))
+    assert open_league_snapshot(league.id) is None
+
+    write_league_snapshot(db_session, league.id)
+    first = open_league_snapshot(league.id)
+    assert first is open_league_snapshot(league.id)
+
+    db_session.add(
+        Lineup(
+            game_id=db_session.query(Game.id).scalar(),
+            franchise_id=db_session.query(Franchise.id).filter_by(name="Beta").scalar(),
+            player_id=db_session.query(Player.id).filter_by(name="Josh Allen").scalar(),
+            score=1.0,
+        )
+    )
+    db_session.commit()
+    write_league_snapshot(db_session, league.id)
+
+    second = open_league_snapshot(league.id)
+    assert second is not first
+    assert len(second.lineups) == 4
+    # Whoever still holds the superseded snapshot can keep reading it
+    assert len(first.lineups["score"].tolist()) == 3
+    assert first not in [s for _, s in league_snapshot._open_snapshots.values()]
+
+
+def test_import_refreshes_snapshot(
+    db_session: Session, espn_stub, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(league_snapshot.settings, "snapshot_dir", str(tmp_path))
+    espn_stub.enqueue(
+        200,
+        [
+            {
+                "seasonId": 2024,
+                "settings": {"name": "Imported"},
+                "members": [{"id": "{1}", "displayName": "m1"}],
+                "teams": [{"id": 1, "abbrev": "T1", "owners": ["{1}"]}],
+            }
+        ],
+    )
+    importer = ESPNImporter(
+        ESPNClient(base_url=espn_stub.base_url, rate_limiter=TokenBucket(rate=1000))
+    )
+
+    result = importer.import_league_first_season(db_session, 123)
+
+    with LeagueSnapshot.open(snapshot_path(result["league"].id)) as snapshot:
+        assert snapshot.league_name == "Imported"
+        assert len(snapshot.franchise_seasons) == 1
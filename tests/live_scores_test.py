@@ -0,0 +1,240 @@
+"""Tests for live score polling and the server-sent event stream."""
+
+import asyncio
+import json
+from datetime import date
+from functools import partial
+
+import pytest
+
+import app.main
+from app.services.espn_client import ESPNClient
+from app.services.live_scores import (
+    KEEPALIVE_FRAME,
+    LiveScores,
+    changed_matchups,
+    current_season_year,
+    sse_frame,
+    summarize_scoreboard,
+)
+
+
+def matchup(matchup_id: int, home: float, away: float, period: int = 5) -> dict:
+    return {
+        "id": matchup_id,
+        "matchupPeriodId": period,
+        "home": {"teamId": 1 + 2 * matchup_id, "totalPointsLive": home},
+        "away": {"teamId": 2 + 2 * matchup_id, "totalPointsLive": away},
+        "winner": "UNDECIDED",
+    }
+
+
+def scoreboard(*matchups: dict, period: int = 5) -> dict:
+    return {"status": {"currentMatchupPeriod": period}, "schedule": list(matchups)}
+
+
+def parse(frame: bytes) -> tuple[str, dict]:
+    fields = dict(
+        line.split(": ", 1) for line in frame.decode().strip().splitlines() if line
+    )
+    return fields["event"], json.loads(fields["data"])
+
+
+def make_hub(stub, **kwargs) -> LiveScores:
+    kwargs.setdefault("poll_seconds", 60)
+    return LiveScores(
+        partial(ESPNClient, base_url=stub.base_url, timeout=1.0, max_retries=0),
+        season_id=2024,
+        **kwargs,
+    )
+
+
+async def next_event(subscription) -> tuple[str, dict]:
+    return parse(await asyncio.wait_for(subscription.queue.get(), 5))
+
+
+async def wait_until(condition) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition not met")
+
+
+class ScoreboardTest:
+    def test_summarize_keeps_current_period(self):
+        matchups = summarize_scoreboard(
+            scoreboard(
+                matchup(1, 10.5, 20.0),
+                matchup(2, 99.0, 98.0, period=4),
+                {"id": 3, "matchupPeriodId": 5, "home": {"teamId": 9}},
+            )
+        )
+
+        assert list(matchups) == [1]
+        assert matchups[1]["home"] == {"team_id": 3, "points": 10.5}
+        assert matchups[1]["week"] == 5
+
+    def test_changed_matchups(self):
+        old = summarize_scoreboard(scoreboard(matchup(1, 10, 20), matchup(2, 0, 0)))
+        new = summarize_scoreboard(scoreboard(matchup(1, 10, 20), matchup(2, 6, 0)))
+
+        assert [m["id"] for m in changed_matchups(old, new)] == [2]
+
+    def test_sse_frame(self):
+        assert (
+            sse_frame("scores", {"a": 1}, 7)
+            == b'id: 7\nevent: scores\ndata: {"a":1}\n\n'
+        )
+
+    def test_current_season_year(self):
+        assert current_season_year(date(2024, 12, 29)) == 2024
+        assert current_season_year(date(2025, 1, 5)) == 2024
+        assert current_season_year(date(2025, 9, 7)) == 2025
+
+
+class LiveScoresTest:
+    async def test_fans_out_changes_from_one_poller(self, espn_stub):
+        espn_stub.default = (
+            200,
+            scoreboard(matchup(1, 10, 20), matchup(2, 30, 40)),
+            {},
+            0.0,
+        )
+        hub = make_hub(espn_stub)
+        subscriptions = [hub.subscribe(123) for _ in range(25)]
+
+        for subscription in subscriptions:
+            event, data = await next_event(subscription)
+            assert event == "snapshot"
+            assert len(data["matchups"]) == 2
+
+        espn_stub.default = (
+            200,
+            scoreboard(matchup(1, 10, 20), matchup(2, 36, 40)),
+            {},
+            0.0,
+        )
+        await asyncio.to_thread(hub.poller(123).poll)
+
+        for subscription in subscriptions:
+            event, data = await next_event(subscription)
+            assert event == "scores"
+            assert [m["home"]["points"] for m in data["matchups"]] == [36]
+        # One request per poll, however many subscribers
+        assert len(espn_stub.requests) == 2
+        assert espn_stub.requests[0].startswith(
+            "/games/ffl/seasons/2024/segments/0/leagues/123?"
+        )
+
+        for subscription in subscriptions:
+            subscription.close()
+        hub.close()
+
+    async def test_unchanged_poll_sends_nothing(self, espn_stub):
+        espn_stub.default = (200, scoreboard(matchup(1, 10, 20)), {}, 0.0)
+        hub = make_hub(espn_stub)
+        subscription = hub.subscribe(123)
+        await next_event(subscription)
+
+        await asyncio.to_thread(hub.poller(123).poll)
+
+        assert subscription.queue.empty()
+        subscription.close()
+
+    async def test_late_subscriber_gets_snapshot(self, espn_stub):
+        espn_stub.default = (200, scoreboard(matchup(1, 10, 20)), {}, 0.0)
+        hub = make_hub(espn_stub)
+        first = hub.subscribe(123)
+        await next_event(first)
+
+        late = hub.subscribe(123)
+
+        event, data = await next_event(late)
+        assert event == "snapshot"
+        assert [m["id"] for m in data["matchups"]] == [1]
+        assert len(espn_stub.requests) == 1
+        first.close()
+        late.close()
+
+    async def test_slow_subscriber_skips_to_snapshot(self, espn_stub):
+        espn_stub.default = (200, scoreboard(matchup(1, 0, 0)), {}, 0.0)
+        hub = make_hub(espn_stub, queue_size=1)
+        subscription = hub.subscribe(123)
+        await wait_until(lambda: not subscription.queue.empty())
+
+        for points in (5, 9):
+            espn_stub.default = (200, scoreboard(matchup(1, points, 0)), {}, 0.0)
+            await asyncio.to_thread(hub.poller(123).poll)
+        await asyncio.sleep(0.05)
+
+        event, data = await next_event(subscription)
+        assert event == "snapshot"
+        assert data["matchups"][0]["home"]["points"] == 9
+        assert subscription.queue.empty()
+        subscription.close()
+
+    async def test_last_unsubscribe_stops_poller(self, espn_stub):
+        espn_stub.default = (200, scoreboard(matchup(1, 10, 20)), {}, 0.0)
+        hub = make_hub(espn_stub, poll_seconds=0.01)
+        first, second = hub.subscribe(123), hub.subscribe(123)
+        poller = hub.poller(123)
+
+        first.close()
+        assert hub.poller(123) is poller
+        second.close()
+
+        assert hub.poller(123) is None
+        await asyncio.to_thread(poller.join, 5)
+        requests = len(espn_stub.requests)
+        await asyncio.sleep(0.05)
+        assert len(espn_stub.requests) == requests
+
+    async def test_failed_poll_keeps_polling(self, espn_stub):
+        espn_stub.enqueue(500, {})
+        espn_stub.default = (200, scoreboard(matchup(1, 10, 20)), {}, 0.0)
+        hub = make_hub(espn_stub, poll_seconds=0.01)
+        subscription = hub.subscribe(123)
+
+        event, _ = await next_event(subscription)
+
+        assert event == "snapshot"
+        subscription.close()
+
+
+class LiveEndpointTest:
+    @pytest.fixture
+    def hub(self, espn_stub, monkeypatch):
+        espn_stub.default = (200, scoreboard(matchup(1, 10, 20)), {}, 0.0)
+        hub = make_hub(espn_stub)
+        monkeypatch.setattr(app.main, "LIVE_SCORES", hub)
+        yield hub
+        hub.close()
+
+    async def test_streams_events(self, hub):
+        response = await app.main.get_live_scores(123)
+
+        assert response.media_type == "text/event-stream"
+        assert response.headers["cache-control"] == "no-cache"
+        events = response.body_iterator
+        event, data = parse(await anext(events))
+        assert event == "snapshot"
+        assert data["matchups"][0]["away"]["points"] == 20
+
+        await events.aclose()
+        assert hub.poller(123) is None
+
+    async def test_keepalive(self, hub, monkeypatch):
+        # Wait for the first poll, so the stream starts with its snapshot
+        # rather than a keepalive sent while the poll is in flight
+        first = hub.subscribe(123)
+        await next_event(first)
+        monkeypatch.setattr(app.main.settings, "live_keepalive_seconds", 0.01)
+        response = await app.main.get_live_scores(123)
+        events = response.body_iterator
+
+        event, _ = parse(await anext(events))
+        assert event == "snapshot"
+        assert await anext(events) == KEEPALIVE_FRAME
+        await events.aclose()
+        first.close()
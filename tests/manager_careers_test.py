@@ -0,0 +1,245 @@
+"""Tests for manager career aggregates and their endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    League,
+    Manager,
+    ManagerCareer,
+    ManagerOpponentRecord,
+    Season,
+)
+from app.models.manager_career import rebuild_manager_careers
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def league(db_session: Session) -> League:
+    """Two seasons; Ann runs franchise A then B, Bob runs B then A."""
+    league = League(name="Career League")
+    db_session.add(league)
+    db_session.flush()
+    franchise_a = Franchise(league_id=league.id, name="A")
+    franchise_b = Franchise(league_id=league.id, name="B")
+    ann, bob = Manager(name="Ann"), Manager(name="Bob")
+    db_session.add_all([franchise_a, franchise_b, ann, bob])
+    db_session.flush()
+
+    for year, ann_franchise, bob_franchise in (
+        (2022, franchise_a, franchise_b),
+        (2023, franchise_b, franchise_a),
+    ):
+        season = Season(league_id=league.id, year=year)
+        db_session.add(season)
+        db_session.flush()
+        db_session.add_all(
+            [
+                FranchiseSeason(
+                    franchise_id=ann_franchise.id,
+                    season_id=season.id,
+                    manager_id=ann.id,
+                    regular_wins=8,
+                    regular_losses=5,
+                    playoff_winners_wins=2,
+                    points_for=1500.0,
+                    points_against=1400.0,
+                    final_standing=1,
+                    prize_money=200.0,
+                    won_championship=True,
+                ),
+                FranchiseSeason(
+                    franchise_id=bob_franchise.id,
+                    season_id=season.id,
+                    manager_id=bob.id,
+                    regular_wins=5,
+                    regular_losses=8,
+                    playoff_winners_losses=1,
+                    points_for=1400.0,
+                    points_against=1500.0,
+                    final_standing=4,
+                ),
+            ]
+        )
+        # Ann wins week 1 as franchise 1, Bob wins week 2 as franchise 1
+        db_session.add_all(
+            [
+                Game(
+                    season_id=season.id,
+                    week=1,
+                    game_type="REGULAR",
+                    franchise1_id=ann_franchise.id,
+                    franchise2_id=bob_franchise.id,
+                    franchise1_score=110.0,
+                    franchise2_score=100.0,
+                ),
+                Game(
+                    season_id=season.id,
+                    week=2,
+                    game_type="REGULAR",
+                    franchise1_id=bob_franchise.id,
+                    franchise2_id=ann_franchise.id,
+                    franchise1_score=95.0,
+                    franchise2_score=90.0,
+                ),
+            ]
+        )
+    db_session.commit()
+    return league
+
+
+def manager_id(db: Session, name: str) -> int:
+    return db.scalars(select(Manager.id).where(Manager.name == name)).one()
+
+
+def career(db: Session, name: str) -> ManagerCareer:
+    db.expire_all()
+    return db.get(ManagerCareer, manager_id(db, name))
+
+
+def record(db: Session, name: str, opponent: str) -> ManagerOpponentRecord:
+    db.expire_all()
+    return db.get(
+        ManagerOpponentRecord, (manager_id(db, name), manager_id(db, opponent))
+    )
+
+
+class ManagerCareerAggregateTest:
+    def test_totals_span_franchises(self, db_session: Session, league: League):
+        ann = career(db_session, "Ann")
+
+        assert ann.seasons == 2
+        assert ann.franchises == 2
+        assert (ann.first_year, ann.last_year) == (2022, 2023)
+        assert (ann.regular_wins, ann.regular_losses) == (16, 10)
+        assert ann.playoff_wins == 4
+        assert ann.championships == 2
+        assert ann.best_finish == 1
+        assert ann.earnings == 400.0
+
+    def test_head_to_head(self, db_session: Session, league: League):
+        ann_vs_bob = record(db_session, "Ann", "Bob")
+        bob_vs_ann = record(db_session, "Bob", "Ann")
+
+        assert (ann_vs_bob.games, ann_vs_bob.wins, ann_vs_bob.losses) == (4, 2, 2)
+        assert ann_vs_bob.points_for == 400.0
+        assert ann_vs_bob.points_against == bob_vs_ann.points_for == 390.0
+
+    def test_game_update_refreshes_both_managers(
+        self, db_session: Session, league: League
+    ):
+        game = db_session.scalars(select(Game).where(Game.week == 2)).first()
+        game.franchise2_score = 120.0
+        db_session.commit()
+
+        assert record(db_session, "Ann", "Bob").wins == 3
+        assert record(db_session, "Bob", "Ann").losses == 3
+
+    def test_manager_change_moves_the_season(self, db_session: Session, league: League):
+        carl = Manager(name="Carl")
+        db_session.add(carl)
+        db_session.flush()
+        fs = db_session.scalars(
+            select(FranchiseSeason)
+            .join(Manager)
+            .where(Manager.name == "Bob")
+            .order_by(FranchiseSeason.season_id)
+        ).first()
+        fs.manager_id = carl.id
+        db_session.commit()
+
+        assert career(db_session, "Bob").seasons == 1
+        assert career(db_session, "Carl").seasons == 1
+        # Ann's opponents changed too, though none of her rows did
+        assert record(db_session, "Ann", "Carl").games == 2
+        assert record(db_session, "Ann", "Bob").games == 2
+
+    def test_unchanged_rows_are_not_refreshed(
+        self, db_session: Session, league: League
+    ):
+        db_session.execute(ManagerCareer.__table__.update().values(championships=99))
+        db_session.commit()
+
+        game = db_session.scalars(select(Game)).first()
+        game.franchise1_score = game.franchise1_score
+        db_session.commit()
+
+        assert career(db_session, "Ann").championships == 99
+
+    def test_rollback_discards_pending_changes(
+        self, db_session: Session, league: League
+    ):
+        fs = db_session.scalars(select(FranchiseSeason)).first()
+        fs.regular_wins = 0
+        db_session.flush()
+        db_session.rollback()
+
+        assert "derived_changes" not in db_session.info
+
+    def test_rebuild(self, db_session: Session, league: League):
+        db_session.execute(ManagerCareer.__table__.delete())
+        db_session.execute(ManagerOpponentRecord.__table__.delete())
+        db_session.commit()
+
+        rebuild_manager_careers(db_session)
+        db_session.commit()
+
+        assert career(db_session, "Ann").championships == 2
+        assert record(db_session, "Bob", "Ann").games == 4
+
+
+class ManagerEndpointTest:
+    def test_career(self, db_session: Session, league: League):
+        response = client.get(f"/managers/{manager_id(db_session, 'Ann')}/career")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["manager"]["name"] == "Ann"
+        assert body["career"]["championships"] == 2
+        assert body["career"]["wins"] == 20
+        assert body["opponents"] == [
+            {
+                "manager_id": manager_id(db_session, "Bob"),
+                "manager_name": "Bob",
+                "games": 4,
+                "wins": 2,
+                "losses": 2,
+                "ties": 0,
+                "win_pct": 0.5,
+                "points_for": 400.0,
+                "points_against": 390.0,
+            }
+        ]
+
+    def test_career_without_seasons(self, db_session: Session):
+        manager = Manager(name="Rookie")
+        db_session.add(manager)
+        db_session.commit()
+
+        response = client.get(f"/managers/{manager.id}/career")
+
+        assert response.status_code == 200
+        assert response.json()["career"]["seasons"] == 0
+
+    def test_unknown_manager(self, db_session: Session):
+        assert client.get("/managers/999999/career").status_code == 404
+
+    def test_leaderboard(self, db_session: Session, league: League):
+        response = client.get("/managers", params={"sort": "earnings"})
+
+        assert response.status_code == 200
+        assert [row["manager"]["name"] for row in response.json()] == ["Ann", "Bob"]
+        assert response.json()[0]["rank"] == 1
+
+        response = client.get("/managers", params={"sort": "points_for", "limit": 1})
+        assert [row["manager"]["name"] for row in response.json()] == ["Ann"]
+
+    def test_leaderboard_rejects_unknown_sort(self, db_session: Session):
+        assert client.get("/managers", params={"sort": "vibes"}).status_code == 400
@@ -0,0 +1,96 @@
+"""Tests for the metrics registry and the /metrics endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import QueuePool
+
+from app.database import engine
+from app.instrumentation import DB_QUERY_DURATION
+from app.main import app
+from app.metrics import Registry
+
+client = TestClient(app)
+
+
+class RegistryTest:
+    """Tests for Prometheus text rendering."""
+
+    def test_counter_and_gauge(self):
+        """Counters get a _total suffix; gauges can be computed on scrape."""
+        registry = Registry()
+        counter = registry.counter("jobs", "Jobs run", ["kind"])
+        counter.labels("import").inc()
+        counter.labels("import").inc(2)
+        gauge = registry.gauge("depth", "Queue depth")
+        gauge.set_function(lambda: 7)
+
+        text = registry.render()
+
+        assert "# TYPE jobs counter" in text
+        assert 'jobs_total{kind="import"} 3' in text
+        assert "depth 7" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Histogram buckets are cumulative and end with +Inf."""
+        registry = Registry()
+        histogram = registry.histogram("latency", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        text = registry.render()
+
+        assert 'latency_bucket{le="0.1"} 2' in text
+        assert 'latency_bucket{le="1"} 3' in text
+        assert 'latency_bucket{le="+Inf"} 4' in text
+        assert "latency_count 4" in text
+        assert "latency_sum 3.65" in text
+
+    def test_label_values_are_escaped(self):
+        """Quotes and backslashes in label values are escaped."""
+        registry = Registry()
+        registry.counter("odd", "Odd labels", ["value"]).labels('a"b\\c').inc()
+
+        assert 'odd_total{value="a\\"b\\\\c"} 1' in registry.render()
+
+    def test_reregistering_returns_same_metric(self):
+        """Registering a name twice (e.g. on reload) returns the original."""
+        registry = Registry()
+        first = registry.counter("reloaded", "Reloaded")
+
+        assert registry.counter("reloaded", "Reloaded") is first
+
+
+def test_metrics_endpoint_reports_requests_and_queries():
+    """Route latency, SQL timing and pool size appear on /metrics."""
+    client.get("/health")
+    client.get("/leagues/1/seasons")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in text
+    assert (
+        'http_responses_total{method="GET",route="/leagues/{league_id}/seasons",status="200"}'
+        in text
+    )
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in text
+    if isinstance(engine.pool, QueuePool):
+        assert 'db_pool_connections{engine="primary",state="size"}' in text
+    assert "http_requests_in_flight 1" in text
+
+
+def test_failed_statements_leave_no_timing_state():
+    """A statement that raises does not leave its start time on the connection."""
+    with engine.connect() as conn:
+        with pytest.raises(DBAPIError):
+            conn.exec_driver_sql("SELECT * FROM no_such_table")
+        conn.rollback()
+        before = DB_QUERY_DURATION.labels("SELECT").count
+
+        conn.exec_driver_sql("SELECT 1")
+
+        assert "query_start_time" not in conn.info
+        assert DB_QUERY_DURATION.labels("SELECT").count == before + 1
@@ -0,0 +1,217 @@
+"""Tests for season partitioning of the game and lineup tables."""
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Franchise, Game, League, Lineup, Player, Season
+from app.partitioning import (
+    create_season_partitions,
+    drop_season_partitions,
+    list_partitions,
+    migrate_to_partitioned,
+    partition_name,
+    reset_season_partitions,
+)
+
+
+@pytest.fixture
+def league(db_session: Session):
+    if db_session.get_bind().dialect.name != "postgresql":
+        pytest.skip("Partitioning is PostgreSQL only")
+    league = League(name="Partitioned League")
+    db_session.add(league)
+    db_session.flush()
+    db_session.add_all([Franchise(league_id=league.id, name=n) for n in ("A", "B")])
+    db_session.add(Player(name="Saquon Barkley", position="RB"))
+    db_session.commit()
+    return league
+
+
+def add_season(db: Session, league: League, year: int, n_games: int = 2) -> Season:
+    """Add a season with games and one lineup row per game, then commit."""
+    franchise_a, franchise_b = league.franchises
+    player = db.scalars(select(Player)).one()
+    season = Season(league_id=league.id, year=year)
+    db.add(season)
+    db.flush()
+    for week in range(1, n_games + 1):
+        game = Game(
+            season_id=season.id,
+            week=week,
+            game_type="REGULAR",
+            franchise1_id=franchise_a.id,
+            franchise2_id=franchise_b.id,
+        )
+        db.add(game)
+        db.flush()
+        db.add(
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchise_a.id,
+                player_id=player.id,
+                score=10.0,
+            )
+        )
+    db.commit()
+    return season
+
+
+def rows_by_partition(db: Session, table: str) -> dict[str, int]:
+    rows = db.execute(
+        text(f"SELECT tableoid::regclass::text, count(*) FROM {table} GROUP BY 1")
+    )
+    return dict(rows.all())
+
+
+class SeasonPartitionTest:
+    def test_new_season_gets_partitions(self, db_session: Session, league: League):
+        season = add_season(db_session, league, 2024)
+
+        for table in ("game", "lineup"):
+            assert partition_name(table, season.id) in list_partitions(
+                db_session.connection(), table
+            )
+            # Rows written before the partitions existed were moved in
+            assert rows_by_partition(db_session, table) == {
+                partition_name(table, season.id): 2
+            }
+
+    def test_lineup_season_is_filled_from_game(
+        self, db_session: Session, league: League
+    ):
+        season = add_season(db_session, league, 2024)
+
+        lineups = db_session.scalars(select(Lineup)).all()
+        assert {lineup.season_id for lineup in lineups} == {season.id}
+        assert lineups[0].game.season_id == season.id
+
+    def test_season_filter_prunes_partitions(self, db_session: Session, league: League):
+        seasons = [add_season(db_session, league, year) for year in (2023, 2024)]
+
+        plan = "\n".join(
+            db_session.execute(
+                text("EXPLAIN SELECT * FROM lineup WHERE season_id = :season_id"),
+                {"season_id": seasons[1].id},
+            ).scalars()
+        )
+        assert partition_name("lineup", seasons[1].id) in plan
+        assert partition_name("lineup", seasons[0].id) not in plan
+        assert "lineup_default" not in plan
+
+    def test_drop_season_partitions(self, db_session: Session, league: League):
+        kept, dropped = (add_season(db_session, league, y) for y in (2023, 2024))
+
+        assert drop_season_partitions(db_session.connection(), dropped.id)
+        db_session.commit()
+
+        assert {game.season_id for game in db_session.scalars(select(Game))} == {
+            kept.id
+        }
+        assert partition_name("game", dropped.id) not in list_partitions(
+            db_session.connection(), "game"
+        )
+
+    def test_deleting_a_season_drops_its_partitions(
+        self, db_session: Session, league: League
+    ):
+        season = add_season(db_session, league, 2024)
+        season_id = season.id
+        db_session.expire_all()
+
+        db_session.delete(season)
+        db_session.commit()
+
+        assert db_session.scalars(select(Lineup)).all() == []
+        assert partition_name("lineup", season_id) not in list_partitions(
+            db_session.connection(), "lineup"
+        )
+
+    def test_reset_swaps_in_empty_partitions(self, db_session: Session, league: League):
+        season = add_season(db_session, league, 2024)
+
+        assert reset_season_partitions(db_session.connection(), season.id)
+        db_session.commit()
+
+        assert db_session.scalars(select(Game)).all() == []
+        assert partition_name("game", season.id) in list_partitions(
+            db_session.connection(), "game"
+        )
+
+    def test_create_is_idempotent(self, db_session: Session, league: League):
+        season = add_season(db_session, league, 2024)
+
+        assert not create_season_partitions(db_session.connection(), season.id)
+
+
+def test_migrate_to_partitioned(db_session: Session, league: League):
+    """Plain tables from before partitioning are converted with their rows."""
+    engine = db_session.get_bind()
+    season = Season(league_id=league.id, year=2022)
+    db_session.add(season)
+    db_session.commit()
+    season_id = season.id
+    franchise_a, franchise_b = (f.id for f in league.franchises)
+    player_id = db_session.scalars(select(Player.id)).one()
+    db_session.close()
+
+    with engine.begin() as conn:
+        Lineup.__table__.drop(conn)
+        Game.__table__.drop(conn)
+        conn.execute(
+            text(
+                "CREATE TABLE game (id SERIAL PRIMARY KEY,"
+                " season_id INTEGER NOT NULL REFERENCES season (id),"
+                " week INTEGER NOT NULL, game_type VARCHAR NOT NULL,"
+                " franchise1_id INTEGER NOT NULL, franchise2_id INTEGER NOT NULL,"
+                " franchise1_score FLOAT, franchise2_score FLOAT, game_date DATE)"
+            )
+        )
+        conn.execute(text("CREATE INDEX ix_game_id ON game (id)"))
+        conn.execute(
+            text(
+                "CREATE TABLE lineup (id SERIAL PRIMARY KEY,"
+                " game_id INTEGER NOT NULL REFERENCES game (id),"
+                " franchise_id INTEGER NOT NULL, player_id INTEGER NOT NULL,"
+                " score FLOAT, position VARCHAR,"
+                " CONSTRAINT unique_game_franchise_player"
+                " UNIQUE (game_id, franchise_id, player_id))"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO game (season_id, week, game_type, franchise1_id,"
+                " franchise2_id) VALUES (:s, 1, 'REGULAR', :a, :b),"
+                " (:s, 2, 'REGULAR', :a, :b)"
+            ),
+            {"s": season_id, "a": franchise_a, "b": franchise_b},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO lineup (game_id, franchise_id, player_id, score)"
+                " SELECT id, :a, :p, 12.5 FROM game"
+            ),
+            {"a": franchise_a, "p": player_id},
+        )
+
+    with engine.begin() as conn:
+        counts = migrate_to_partitioned(conn, Base.metadata)
+        assert counts == {"game": 2, "lineup": 2}
+        assert partition_name("lineup", season_id) in list_partitions(conn, "lineup")
+        assert migrate_to_partitioned(conn, Base.metadata) == {}
+
+    with Session(engine) as db:
+        lineups = db.scalars(select(Lineup)).all()
+        assert {lineup.season_id for lineup in lineups} == {season_id}
+        # New rows continue after the copied IDs
+        game = Game(
+            season_id=season_id,
+            week=3,
+            game_type="REGULAR",
+            franchise1_id=franchise_a,
+            franchise2_id=franchise_b,
+        )
+        db.add(game)
+        db.flush()
+        assert game.id == 3
@@ -0,0 +1,180 @@
+"""Tests for prerendering league history to static pages."""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import Base, ReadSessionLocal, ReplicaPool, create_sqlite_engine
+from app.main import app
+from app.models import Franchise, FranchiseSeason, Game, League, Manager, Season
+from app.services import prerender as prerender_module
+from app.services.espn_client import ESPNClient
+from app.services.espn_importer import ESPNImporter
+from app.services.prerender import page_path, prerender, write_page
+from app.services.rate_limit import TokenBucket
+
+client = TestClient(app)
+
+
+def make_league(db: Session, name: str) -> League:
+    """Two franchises with managers, playing two weeks of one season."""
+    league = League(name=name)
+    db.add(league)
+    db.flush()
+    season = Season(league_id=league.id, year=2023)
+    franchises = [Franchise(league_id=league.id, name=f"{name} {i}") for i in (1, 2)]
+    managers = [Manager(name=f"{name} Manager {i}") for i in (1, 2)]
+    db.add_all([season, *franchises, *managers])
+    db.flush()
+    db.add_all(
+        [
+            FranchiseSeason(
+                franchise_id=franchise.id, season_id=season.id, manager_id=manager.id
+            )
+            for franchise, manager in zip(franchises, managers, strict=True)
+        ]
+    )
+    for week in (1, 2):
+        db.add(
+            Game(
+                season_id=season.id,
+                week=week,
+                game_type="REGULAR",
+                franchise1_id=franchises[0].id,
+                franchise2_id=franchises[1].id,
+                franchise1_score=100.0 + week,
+                franchise2_score=90.0,
+            )
+        )
+    db.commit()
+    return league
+
+
+def read_page(directory, route: str):
+    return json.loads(gzip.decompress(page_path(directory, route).read_bytes()))
+
+
+class PrerenderTest:
+    def test_pages_match_the_api(self, db_session: Session, tmp_path):
+        league = make_league(db_session, "Static")
+        game_id = db_session.scalars(select(Game.id)).first()
+        season_id = db_session.scalars(select(Season.id)).one()
+        manager_id = db_session.scalars(select(Manager.id)).first()
+
+        counts = prerender(tmp_path)
+
+        for route in (
+            "/leagues",
+            f"/leagues/{league.id}/overview",
+            f"/seasons/{season_id}/standings/timeline",
+            f"/games/{game_id}",
+            f"/managers/{manager_id}/career",
+        ):
+            assert read_page(tmp_path, route) == client.get(route).json()
+        assert page_path(tmp_path, "/leagues").name == "index.json.gz"
+        # 3 league, 3 season, 2 game, 2 franchise, 4 manager and 3 global pages
+        assert counts["pages"] == counts["written"] == 17
+        assert counts["failed"] == 0
+
+    def test_unchanged_pages_are_not_rewritten(self, db_session: Session, tmp_path):
+        make_league(db_session, "Static")
+        prerender(tmp_path)
+
+        counts = prerender(tmp_path)
+
+        assert counts["written"] == 0
+
+    def test_only_given_leagues_are_rendered(self, db_session: Session, tmp_path):
+        first = make_league(db_session, "First")
+        second = make_league(db_session, "Second")
+
+        prerender(tmp_path, [second.id])
+
+        assert not page_path(tmp_path, f"/leagues/{first.id}/overview").exists()
+        overview = read_page(tmp_path, f"/leagues/{second.id}/overview")
+        assert overview["league"]["name"] == "Second"
+        assert len(read_page(tmp_path, "/leagues")) == 2
+
+    def test_deleted_pages_are_removed(self, db_session: Session, tmp_path):
+        league = make_league(db_session, "Static")
+        game = db_session.scalars(select(Game)).first()
+        stale = f"/games/{game.id}"
+        prerender(tmp_path)
+        db_session.delete(game)
+        db_session.commit()
+        # The deleted game is no longer listed, so render its route directly
+        counts = prerender_module.render_routes(tmp_path, [stale])
+
+        assert counts["removed"] == 1
+        assert not page_path(tmp_path, stale).exists()
+        assert page_path(tmp_path, f"/leagues/{league.id}/overview").exists()
+
+    def test_process_pool(self, db_session: Session, tmp_path):
+        leagues = [make_league(db_session, f"Pooled {i}") for i in range(3)]
+
+        counts = prerender(tmp_path, workers=2)
+
+        assert counts["failed"] == 0
+        for league in leagues:
+            assert page_path(tmp_path, f"/leagues/{league.id}/seasons").exists()
+
+    def test_reads_from_the_primary(self, db_session: Session, tmp_path, monkeypatch):
+        league = make_league(db_session, "Fresh")
+        # A replica that has not caught up with the import at all
+        replica = create_sqlite_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        Base.metadata.create_all(bind=replica)
+        monkeypatch.setitem(ReadSessionLocal.kw, "replicas", ReplicaPool([replica]))
+        try:
+            counts = prerender(tmp_path / "pages", [league.id])
+        finally:
+            replica.dispose()
+
+        assert counts["failed"] == 0
+        overview = read_page(tmp_path / "pages", f"/leagues/{league.id}/overview")
+        assert overview["league"]["name"] == "Fresh"
+
+    def test_requires_directory(self, monkeypatch):
+        monkeypatch.setattr(prerender_module.settings, "prerender_dir", "")
+
+        with pytest.raises(ValueError, match="PRERENDER_DIR"):
+            prerender()
+
+    def test_write_page_is_deterministic(self, tmp_path):
+        path = tmp_path / "a" / "index.json.gz"
+
+        assert write_page(path, b"[1]")
+        first = path.read_bytes()
+        assert not write_page(path, b"[1]")
+        assert path.read_bytes() == first
+        assert write_page(path, b"[2]")
+
+
+def test_import_rerenders_league(db_session: Session, espn_stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(prerender_module.settings, "prerender_dir", str(tmp_path))
+    espn_stub.enqueue(
+        200,
+        [
+            {
+                "seasonId": 2024,
+                "settings": {"name": "Imported"},
+                "members": [{"id": "{1}", "displayName": "m1"}],
+                "teams": [{"id": 1, "abbrev": "T1", "owners": ["{1}"]}],
+            }
+        ],
+    )
+    importer = ESPNImporter(
+        ESPNClient(base_url=espn_stub.base_url, rate_limiter=TokenBucket(rate=1000))
+    )
+
+    importer.import_league_history_stream(db_session, 1)
+
+    league_id = db_session.scalars(select(League.id)).one()
+    overview = read_page(tmp_path, f"/leagues/{league_id}/overview")
+    assert overview["league"]["name"] == "Imported"
+    assert [league["name"] for league in read_page(tmp_path, "/leagues")] == [
+        "Imported"
+    ]
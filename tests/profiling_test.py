@@ -0,0 +1,180 @@
+"""Tests for request and importer profiling."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app import profiling
+from app.main import app
+from app.metrics import REGISTRY
+from app.profiling import Profile, profile
+from tests.league_overview_test import make_league
+
+client = TestClient(app)
+TOKEN = "let-me-profile"
+
+
+@pytest.fixture
+def profile_token(monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profile_token", TOKEN)
+    monkeypatch.setattr(profiling.settings, "profile_interval_seconds", 0.001)
+
+
+def busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def other_busy(seconds: float) -> None:
+    busy(seconds)
+
+
+class ProfileTest:
+    def test_samples_the_calling_thread(self):
+        with profile(interval=0.001) as result:
+            busy(0.05)
+
+        assert result.seconds >= 0.05
+        assert any(
+            line.split(";")[-1].startswith("tests.profiling_test.busy")
+            for line in result.folded().splitlines()
+        )
+        assert all(
+            line.rsplit(" ", 1)[1].isdigit() for line in result.folded().splitlines()
+        )
+
+    async def test_event_loop_samples_only_the_profiled_task(self):
+        async def other_request():
+            other_busy(0.05)
+
+        with profile(interval=0.001) as result:
+            busy(0.02)
+            # Runs on the same thread while the profiled task waits
+            await asyncio.create_task(other_request())
+
+        stacks = result.folded()
+        assert "tests.profiling_test.busy" in stacks
+        assert "other_busy" not in stacks
+
+    def test_times_sql(self, db_session: Session):
+        db_session.execute(text("SELECT 1"))
+        with profile(interval=0.001) as result:
+            for _ in range(3):
+                db_session.execute(text("SELECT 2"))
+        db_session.execute(text("SELECT 3"))
+
+        [timing] = result.sql()
+        assert timing["statement"] == "SELECT 2"
+        assert timing["count"] == 3
+        assert timing["seconds"] > 0
+
+    def test_failed_statements_are_not_timed(self, db_session: Session):
+        with profile(interval=0.001) as result:
+            with pytest.raises(DBAPIError):
+                db_session.execute(text("SELECT * FROM no_such_table"))
+            db_session.rollback()
+            db_session.execute(text("SELECT 2"))
+
+        assert [timing["statement"] for timing in result.sql()] == ["SELECT 2"]
+        assert "profile_start_time" not in db_session.connection().info
+
+    def test_other_threads_are_not_sampled(self):
+        done = threading.Event()
+        other = threading.Thread(target=lambda: (busy(0.05), done.set()))
+
+        with profile(interval=0.001) as result:
+            other.start()
+            done.wait()
+        other.join()
+
+        assert "busy" not in result.folded()
+
+    def test_all_threads(self):
+        done = threading.Event()
+        other = threading.Thread(target=lambda: (busy(0.05), done.set()))
+
+        with profile(interval=0.001, all_threads=True) as result:
+            other.start()
+            done.wait()
+        other.join()
+
+        assert "tests.profiling_test.busy" in result.folded()
+
+    def test_idle_threads_are_not_sampled(self):
+        stop = threading.Event()
+        idle = threading.Thread(target=stop.wait)
+        idle.start()
+
+        with profile(interval=0.001, all_threads=True) as result:
+            time.sleep(0.02)
+        stop.set()
+        idle.join()
+
+        assert "threading.Event.wait" not in result.folded()
+
+    def test_phases(self):
+        result = Profile(0.001)
+        result.stacks.update(
+            {
+                ("app.main.game", "sqlalchemy.orm.loading.instances"): 2,
+                (
+                    "sqlalchemy.orm.query.Query.all",
+                    "sqlalchemy.engine.default.DefaultDialect.do_execute",
+                ): 3,
+                ("fastapi.routing.serialize_response", "pydantic.main.dump"): 1,
+                ("app.main.root",): 1,
+            }
+        )
+
+        assert result.phases() == {"sql": 3, "orm": 2, "serialization": 1, "other": 1}
+
+
+class ProfilingMiddlewareTest:
+    def test_disabled_without_a_token(self, monkeypatch):
+        monkeypatch.setattr(profiling.settings, "profile_token", "")
+
+        response = client.get("/", params={"profile": ""})
+
+        assert response.json()["message"] == "Fantasy League History API"
+
+    def test_wrong_token(self, profile_token):
+        response = client.get("/", headers={"X-Profile-Token": "guess"})
+
+        assert response.json()["message"] == "Fantasy League History API"
+
+    def test_header(self, profile_token, db_session: Session):
+        league = make_league(db_session, 3)
+        route = f"/leagues/{league.id}/overview"
+
+        response = client.get(route, headers={"X-Profile-Token": TOKEN})
+
+        report = response.json()
+        assert response.headers["cache-control"] == "no-store"
+        assert report["path"] == route
+        assert report["status"] == 200
+        assert report["sql"]
+        assert report["samples"] == sum(report["phases"].values())
+        assert report["folded"].count("\n") == len(report["folded"].splitlines())
+
+    def test_query_parameter_and_error_status(self, profile_token):
+        response = client.get("/leagues/999999/overview", params={"profile": TOKEN})
+
+        assert response.status_code == 200
+        assert response.json()["status"] == 404
+
+    def test_profiled_requests_are_not_coalesced(self, profile_token, db_session):
+        league = make_league(db_session, 1)
+
+        client.get(f"/leagues/{league.id}/overview", params={"profile": TOKEN})
+
+        assert (
+            'single_flight_requests_total{name="league_overview",outcome="profiled"}'
+            in REGISTRY.render()
+        )
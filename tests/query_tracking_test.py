@@ -0,0 +1,125 @@
+"""Tests for per-request query counting and N+1 detection."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import query_tracking
+from app.main import app
+from app.models import Franchise, FranchiseSeason, League, Manager, Season
+from app.query_tracking import assert_max_queries, track_queries
+from app.services.espn_client import ESPNClient
+from app.services.espn_importer import ESPNImporter
+from app.services.rate_limit import TokenBucket
+
+client = TestClient(app)
+
+# Maximum statements each endpoint may run, whatever the data size
+ENDPOINT_QUERY_BUDGETS = {
+    "/leagues": 1,
+    "/leagues/1/franchises": 1,
+    "/leagues/1/seasons": 1,
+}
+
+# Statements app.partitioning runs to give a new season its own partitions
+PARTITION_STATEMENTS_PER_SEASON = 15
+# Statements app.models.manager_career runs per commit to refresh the
+# changed managers' careers, however many managers changed
+CAREER_REFRESH_STATEMENTS = 5
+
+
+@pytest.fixture
+def debug_query_count(monkeypatch):
+    monkeypatch.setattr(query_tracking.settings, "debug_query_count", True)
+
+
+@pytest.fixture
+def league_with_seasons(db_session: Session) -> League:
+    """A league with three franchise-seasons, each with its own manager."""
+    league = League(name="Budget League")
+    db_session.add(league)
+    db_session.flush()
+    season = Season(league_id=league.id, year=2024)
+    db_session.add(season)
+    db_session.flush()
+    for i in range(3):
+        franchise = Franchise(league_id=league.id, name=f"Team {i}")
+        manager = Manager(name=f"Manager {i}")
+        db_session.add_all([franchise, manager])
+        db_session.flush()
+        db_session.add(
+            FranchiseSeason(
+                franchise_id=franchise.id, season_id=season.id, manager_id=manager.id
+            )
+        )
+    db_session.commit()
+    return league
+
+
+@pytest.mark.parametrize("path,budget", ENDPOINT_QUERY_BUDGETS.items())
+def test_endpoint_query_budget(debug_query_count, path: str, budget: int):
+    """Each endpoint reports its statement count and stays within budget."""
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) <= budget
+    assert response.headers["X-Query-Repeated"] == "0"
+
+
+def test_no_header_when_disabled():
+    """Counting is off unless debug_query_count is set."""
+    response = client.get("/leagues")
+
+    assert "X-Query-Count" not in response.headers
+
+
+def test_lazy_loads_in_a_loop_are_flagged(
+    db_session: Session, league_with_seasons: League
+):
+    """Loading a relationship per row repeats one statement per row."""
+    db_session.expire_all()
+    with track_queries() as log:
+        names = [fs.manager.name for fs in db_session.query(FranchiseSeason).all()]
+
+    assert len(names) == 3
+    assert log.count == 4
+    [(statement, count)] = log.repeated().items()
+    assert "FROM manager" in statement
+    assert count == 3
+
+
+def test_assert_max_queries_reports_statements(db_session: Session):
+    """Exceeding the budget fails with the offending statements."""
+    with pytest.raises(AssertionError, match="FROM league"):
+        with assert_max_queries(0):
+            db_session.query(League).all()
+
+
+def test_importer_query_budget(db_session: Session, espn_stub):
+    """The first-season import stays within its per-team statement budget."""
+    members = [{"id": f"{{{i}}}", "displayName": f"m{i}"} for i in range(4)]
+    teams = [{"id": i, "abbrev": f"T{i}", "owners": [f"{{{i}}}"]} for i in range(4)]
+    espn_stub.enqueue(
+        200,
+        [
+            {
+                "seasonId": 2024,
+                "settings": {"name": "Budget"},
+                "members": members,
+                "teams": teams,
+            }
+        ],
+    )
+    importer = ESPNImporter(
+        ESPNClient(base_url=espn_stub.base_url, rate_limiter=TokenBucket(rate=1000))
+    )
+
+    # League and season lookups/inserts and loading the ESPN ID maps of
+    # managers and franchises, then an upsert each for the manager and
+    # franchise and a lookup and insert for the franchise-season of every
+    # team, plus the fixed costs of refreshing manager careers on commit and
+    # partitioning the new season after it
+    with assert_max_queries(
+        6 + 4 * len(teams) + CAREER_REFRESH_STATEMENTS + PARTITION_STATEMENTS_PER_SEASON
+    ):
+        importer.import_league_first_season(db_session, 123)
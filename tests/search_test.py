@@ -0,0 +1,180 @@
+"""Tests for name search."""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Franchise, League, Manager, Player
+from app.query_tracking import track_queries
+from app.services import search as search_module
+from app.services.search import (
+    PrefixTrie,
+    SearchIndex,
+    SearchResult,
+    _search_statement,
+    search,
+)
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(search_module, "SEARCH_INDEX", SearchIndex())
+
+
+@pytest.fixture
+def names(db_session: Session):
+    league = League(name="Search League")
+    db_session.add(league)
+    db_session.flush()
+    db_session.add_all(
+        [
+            Player(name="Josh Allen", position="QB"),
+            Player(name="Josh Jacobs", position="RB"),
+            Player(name="Keenan Allen", position="WR"),
+            Player(name="Allen Robinson", position="WR"),
+            Manager(name="Joshua Smith"),
+            Franchise(league_id=league.id, name="Josh's Juggernauts"),
+        ]
+    )
+    db_session.commit()
+
+
+def names_of(results: list[SearchResult]) -> list[str]:
+    return [result.name for result in results]
+
+
+def wait_for(lookup) -> list[SearchResult]:
+    """Poll ``lookup`` until a background refresh makes it return matches."""
+    deadline = time.monotonic() + 5
+    while not (results := lookup()):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return results
+
+
+class PrefixTrieTest:
+    def test_matches_any_word(self):
+        trie = PrefixTrie()
+        for i, name in enumerate(("Josh Allen", "Keenan Allen", "Allen Robinson")):
+            trie.add(SearchResult("player", i, name))
+        trie.finish()
+
+        # Names starting with the prefix first, then shorter names
+        assert names_of(trie.search("all")) == [
+            "Allen Robinson",
+            "Josh Allen",
+            "Keenan Allen",
+        ]
+        assert trie.search("z") == []
+
+    def test_keeps_best_distinct_matches(self):
+        trie = PrefixTrie(limit=2)
+        for i, name in enumerate(("Aa Aa", "Ab", "Abc", "Abcd")):
+            trie.add(SearchResult("player", i, name))
+        trie.finish()
+
+        assert names_of(trie.search("a")) == ["Ab", "Abc"]
+        assert names_of(trie.search("aa")) == ["Aa Aa"]
+
+
+class SearchTest:
+    def test_short_prefix_uses_the_trie(self, db_session: Session, names):
+        search(db_session, "jo")
+
+        with track_queries() as log:
+            results = search(db_session, "JOSH")
+
+        assert log.count == 0
+        assert names_of(results) == [
+            "Josh Allen",
+            "Josh Jacobs",
+            "Joshua Smith",
+            "Josh's Juggernauts",
+        ]
+        assert {result.kind for result in results} == {
+            "player",
+            "manager",
+            "franchise",
+        }
+
+    def test_long_query_goes_to_the_database(self, db_session: Session, names):
+        with track_queries() as log:
+            results = search(db_session, "allen")
+
+        assert log.count >= 1
+        assert names_of(results) == ["Allen Robinson", "Josh Allen", "Keenan Allen"]
+        assert names_of(search(db_session, "josh al")) == ["Josh Allen"]
+
+    def test_like_wildcards_are_literal(self, db_session: Session, names):
+        assert search(db_session, "%%%%%") == []
+        assert names_of(search(db_session, "josh'")) == ["Josh's Juggernauts"]
+
+    def test_commit_refreshes_the_trie(self, db_session: Session, names):
+        assert search(db_session, "puka") == []
+
+        db_session.add(Player(name="Puka Nacua", position="WR"))
+        db_session.commit()
+
+        # The stale trie answers while its replacement is built
+        assert search(db_session, "puka") == []
+        results = wait_for(lambda: search(db_session, "puka"))
+        assert names_of(results) == ["Puka Nacua"]
+
+    def test_stale_trie_is_rebuilt_in_the_background(self, db_session: Session, names):
+        index = SearchIndex(ttl_seconds=0)
+        assert names_of(index.lookup(db_session, "puka", 10)) == []
+        db_session.add(Player(name="Puka Nacua", position="WR"))
+        db_session.commit()
+
+        assert names_of(index.lookup(db_session, "puka", 10)) == []
+        results = wait_for(lambda: index.lookup(db_session, "puka", 10))
+        assert names_of(results) == ["Puka Nacua"]
+
+    def test_invalidate_keeps_serving_the_trie(self, db_session: Session, names):
+        index = SearchIndex()
+        index.lookup(db_session, "jo", 10)
+        index.invalidate()
+
+        with track_queries() as log:
+            results = index.lookup(db_session, "josh", 10)
+
+        assert log.count == 0
+        assert "Josh Allen" in names_of(results)
+
+    def test_trigram_statement(self):
+        sql = str(
+            _search_statement("alen", 5, trigram=True).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+
+        assert "similarity(player.name" in sql
+        assert "player.name %% " in sql or "player.name % " in sql
+
+
+def test_search_endpoint(db_session: Session, names):
+    response = client.get("/search", params={"q": "keen"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "query": "keen",
+        "results": [
+            {
+                "type": "player",
+                "id": response.json()["results"][0]["id"],
+                "name": "Keenan Allen",
+                "position": "WR",
+            }
+        ],
+    }
+
+
+def test_search_endpoint_requires_query():
+    assert client.get("/search").status_code == 422
+    assert client.get("/search", params={"q": ""}).status_code == 422
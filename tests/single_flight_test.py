@@ -0,0 +1,183 @@
+"""Tests for request coalescing, including a load test of an endpoint."""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy.orm import Session
+
+import app.main
+from app.main import app as fastapi_app
+from app.metrics import REGISTRY
+from app.models import League
+from app.query_tracking import track_queries
+from app.single_flight import SINGLE_FLIGHT, SingleFlight, data_version
+from tests.league_overview_test import make_league
+
+
+class SingleFlightTest:
+    async def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            time.sleep(0.05)
+            return value * 2
+
+        results = await asyncio.gather(
+            *(flight.run("double", 21, compute, 21) for _ in range(20))
+        )
+
+        assert results == [42] * 20
+        assert calls == [21]
+        assert flight.in_flight() == 0
+
+    async def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+
+        results = await asyncio.gather(
+            flight.run("double", 1, lambda: 2),
+            flight.run("double", 2, lambda: 4),
+            flight.run("triple", 1, lambda: 3),
+        )
+
+        assert results == [2, 4, 3]
+
+    async def test_finished_calls_are_not_reused(self):
+        flight = SingleFlight()
+        calls = []
+
+        for _ in range(2):
+            await flight.run("count", None, calls.append, 1)
+
+        assert calls == [1, 1]
+
+    async def test_exception_reaches_every_caller(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(flight.run("fail", None, fail) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert [type(result) for result in results] == [ValueError] * 3
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            return "done"
+
+        first = asyncio.create_task(flight.run("slow", None, compute))
+        second = asyncio.create_task(flight.run("slow", None, compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_computation_outlives_cancelled_request(
+        self, db_session: Session, monkeypatch
+    ):
+        league = make_league(db_session, n_seasons=1)
+        load = app.main.load_league_overview
+        release = threading.Event()
+
+        def slow(db, league_id):
+            release.wait(5)
+            return load(db, league_id)
+
+        monkeypatch.setattr(app.main, "load_league_overview", slow)
+        first = asyncio.create_task(app.main.get_league_overview(league.id))
+        second = asyncio.create_task(app.main.get_league_overview(league.id))
+        await asyncio.sleep(0.01)
+        # The request that started the computation goes away
+        first.cancel()
+        release.set()
+
+        assert (await second)["league"]["name"] == league.name
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    def test_commit_changes_data_version(self, db_session: Session):
+        before = data_version()
+        db_session.add(League(name="Versioned"))
+        db_session.commit()
+
+        assert data_version() != before
+
+    def test_read_only_commit_keeps_data_version(self, db_session: Session):
+        before = data_version()
+        db_session.commit()
+
+        assert data_version() == before
+
+
+class CoalescingLoadTest:
+    """Identical concurrent requests cost the database the same as one."""
+
+    @pytest.fixture
+    def slow_overview(self, monkeypatch):
+        load = app.main.load_league_overview
+
+        def slow(db, league_id):
+            # Keep the computation in flight while the other requests arrive
+            time.sleep(0.2)
+            return load(db, league_id)
+
+        monkeypatch.setattr(app.main, "load_league_overview", slow)
+
+    async def burst(self, league: League, concurrency: int) -> tuple[int, list]:
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            with track_queries() as log:
+                responses = await asyncio.gather(
+                    *(
+                        client.get(f"/leagues/{league.id}/overview")
+                        for _ in range(concurrency)
+                    )
+                )
+        return log.count, responses
+
+    async def test_queries_stay_flat(self, db_session: Session, slow_overview):
+        league = make_league(db_session, n_seasons=3)
+        # Opening the first connection runs statements of its own
+        await self.burst(league, 1)
+
+        counts = {}
+        for concurrency in (1, 10, 50):
+            counts[concurrency], responses = await self.burst(league, concurrency)
+            assert {response.status_code for response in responses} == {200}
+            assert len({response.content for response in responses}) == 1
+
+        assert counts[10] == counts[1]
+        assert counts[50] == counts[1]
+        assert SINGLE_FLIGHT.in_flight() == 0
+        assert (
+            'single_flight_requests_total{name="league_overview",outcome="coalesced"}'
+            in REGISTRY.render()
+        )
+
+    async def test_not_found_is_shared(self, db_session: Session, slow_overview):
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.get("/leagues/999999/overview") for _ in range(5))
+            )
+
+        assert {response.status_code for response in responses} == {404}
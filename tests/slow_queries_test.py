@@ -0,0 +1,174 @@
+"""Tests for the slow-query log."""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import instrumentation, main
+from app.database import engine
+from app.main import app
+from app.slow_queries import (
+    SLOW_QUERY_LOG,
+    SlowQuery,
+    SlowQueryLog,
+    explain,
+    explainable,
+    summarize,
+)
+from tests.league_overview_test import make_league
+
+client = TestClient(app)
+TOKEN = "let-me-in"
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    """Every statement counts as slow; none is explained unless a test asks."""
+    monkeypatch.setattr(instrumentation.settings, "slow_query_seconds", 1e-9)
+    monkeypatch.setattr(SLOW_QUERY_LOG, "explain_rate", 0.0)
+    SLOW_QUERY_LOG.clear()
+    yield SLOW_QUERY_LOG
+    SLOW_QUERY_LOG.join()
+    SLOW_QUERY_LOG.clear()
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(main.settings, "admin_token", TOKEN)
+
+
+class SlowQueryLogTest:
+    def test_records_slow_statements(self, slow_log, db_session: Session):
+        db_session.execute(text("SELECT :x + 1"), {"x": 7})
+
+        [record] = [r for r in slow_log.records() if r.statement == "SELECT ? + 1"]
+        assert record.parameters == "(7,)"
+        assert record.seconds > 0
+        assert record.route is None
+        assert record.plan is None
+
+    def test_threshold(self, slow_log, monkeypatch, db_session: Session):
+        for seconds in (60.0, 0.0):
+            monkeypatch.setattr(instrumentation.settings, "slow_query_seconds", seconds)
+
+            db_session.execute(text("SELECT 1"))
+
+        assert len(slow_log) == 0
+
+    def test_ring_buffer_is_bounded(self):
+        log = SlowQueryLog(size=2, explain_rate=0.0)
+        for i in range(3):
+            log.record(engine, f"SELECT {i}", (), 1.0, None)
+
+        assert [record.statement for record in log.records()] == [
+            "SELECT 2",
+            "SELECT 1",
+        ]
+        assert [record.statement for record in log.records(limit=1)] == ["SELECT 2"]
+
+    def test_sampled_selects_are_explained(self, slow_log, db_session: Session):
+        slow_log.explain_rate = 1.0
+
+        db_session.execute(text("SELECT name FROM league WHERE id = :id"), {"id": 1})
+        slow_log.join()
+
+        [record] = [r for r in slow_log.records() if "FROM league" in r.statement]
+        assert "USING INTEGER PRIMARY KEY" in record.plan
+        assert not record.analyzed
+        # The EXPLAIN itself is not logged
+        assert not any(r.statement.startswith("EXPLAIN") for r in slow_log.records())
+
+    def test_writes_are_not_explained(self, slow_log):
+        slow_log.explain_rate = 1.0
+
+        record = slow_log.record(engine, "DELETE FROM league WHERE id = ?", (1,), 1, "")
+        slow_log.join()
+
+        assert record.plan is None
+
+    @pytest.mark.parametrize(
+        ("statement", "expected"),
+        [
+            ("SELECT name FROM league", True),
+            ("\n  with t AS (SELECT 1) SELECT * FROM t", True),
+            ("SELECT * FROM season WHERE id = 1 FOR UPDATE", False),
+            ("SELECT * FROM season FOR SHARE", False),
+            ("WITH gone AS (DELETE FROM game RETURNING id) SELECT * FROM gone", False),
+            ("INSERT INTO league (name) VALUES ('x')", False),
+            ("UPDATE league SET name = 'x'", False),
+            ("SELECT updated_at FROM import_checkpoint", True),
+            ("SELECT pg_try_advisory_lock(%(key)s)", False),
+            ("SELECT pg_advisory_unlock(%(key)s)", False),
+            ("SELECT pg_advisory_xact_lock(%(key)s)", False),
+            ("SELECT NEXTVAL('league_id_seq')", False),
+            ("SELECT setval('league_id_seq', 10)", False),
+            ("SELECT * FROM pg_locks", True),
+        ],
+    )
+    def test_explainable(self, statement: str, expected: bool):
+        assert explainable(statement) is expected
+
+    def test_summarize(self):
+        records = [
+            SlowQuery("SELECT a", "()", 1.0, "GET /a", plan="new"),
+            SlowQuery("SELECT b", "()", 3.0, None),
+            SlowQuery("SELECT a", "()", 2.5, "GET /b", plan="old"),
+        ]
+
+        summary = summarize(records)
+
+        assert [group["statement"] for group in summary] == ["SELECT a", "SELECT b"]
+        assert summary[0]["count"] == 2
+        assert summary[0]["total_seconds"] == 3.5
+        assert summary[0]["max_seconds"] == 2.5
+        assert summary[0]["routes"] == ["GET /a", "GET /b"]
+        assert summary[0]["plan"] == "new"
+        assert summary[1]["routes"] == []
+
+    def test_explain_analyze_on_postgresql(self, db_session: Session):
+        if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+            pytest.skip("EXPLAIN ANALYZE needs a PostgreSQL server")
+        bind = db_session.get_bind()
+
+        plan, analyzed = explain(
+            bind, "SELECT name FROM league WHERE id = %(id)s", {"id": 1}
+        )
+
+        assert analyzed
+        assert "actual time" in plan
+
+
+class SlowQueriesEndpointTest:
+    def test_requires_admin_token(self, monkeypatch):
+        monkeypatch.setattr(main.settings, "admin_token", "")
+        assert client.get("/admin/slow-queries").status_code == 403
+
+        monkeypatch.setattr(main.settings, "admin_token", TOKEN)
+        response = client.get("/admin/slow-queries", headers={"X-Admin-Token": "no"})
+        assert response.status_code == 403
+
+    def test_lists_statements_by_route(
+        self, slow_log, admin_token, db_session: Session
+    ):
+        league = make_league(db_session, 2)
+        slow_log.clear()
+        client.get(f"/leagues/{league.id}/overview")
+
+        response = client.get(
+            "/admin/slow-queries", headers={"X-Admin-Token": TOKEN}, params={"limit": 2}
+        )
+
+        report = response.json()
+        assert response.headers["cache-control"] == "no-store"
+        assert report["threshold_seconds"] == 1e-9
+        assert len(report["queries"]) == 2
+        assert {query["route"] for query in report["queries"]} == {
+            "GET /leagues/{league_id}/overview"
+        }
+        assert len(report["statements"]) >= 1
+        assert report["statements"][0]["routes"] == [
+            "GET /leagues/{league_id}/overview"
+        ]
@@ -0,0 +1,132 @@
+"""Tests for week-by-week standings and their endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Franchise, Game, League, Season, WeekStanding
+from app.models.week_standing import rebuild_week_standings
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def season(db_session: Session) -> Season:
+    """Three franchises each with a bye; week 4 is a playoff game."""
+    league = League(name="Standings League")
+    db_session.add(league)
+    db_session.flush()
+    season = Season(league_id=league.id, year=2024)
+    franchises = {name: Franchise(league_id=league.id, name=name) for name in "ABC"}
+    db_session.add_all([season, *franchises.values()])
+    db_session.flush()
+
+    for week, game_type, (home, home_score), (away, away_score) in (
+        (1, "REGULAR", ("A", 110.0), ("B", 100.0)),
+        (2, "REGULAR", ("C", 120.0), ("A", 90.0)),
+        (3, "REGULAR", ("B", 105.0), ("C", 95.0)),
+        (4, "PLAYOFF_WINNERS", ("A", 150.0), ("C", 80.0)),
+    ):
+        db_session.add(
+            Game(
+                season_id=season.id,
+                week=week,
+                game_type=game_type,
+                franchise1_id=franchises[home].id,
+                franchise2_id=franchises[away].id,
+                franchise1_score=home_score,
+                franchise2_score=away_score,
+            )
+        )
+    db_session.commit()
+    return season
+
+
+def ranks(body: dict) -> list[tuple[int, str]]:
+    return [(row["rank"], row["franchise"]["name"]) for row in body["standings"]]
+
+
+class WeekStandingTest:
+    def test_byes_carry_totals_forward(self, db_session: Session, season: Season):
+        rows = db_session.scalars(
+            select(WeekStanding)
+            .join(Franchise)
+            .where(WeekStanding.season_id == season.id, Franchise.name == "A")
+            .order_by(WeekStanding.week)
+        ).all()
+
+        assert [row.week for row in rows] == [1, 2, 3]
+        assert [(row.wins, row.losses) for row in rows] == [(1, 0), (1, 1), (1, 1)]
+        assert [row.points_for for row in rows] == [110.0, 200.0, 200.0]
+
+    def test_game_update_refreshes_the_season(
+        self, db_session: Session, season: Season
+    ):
+        game = db_session.scalars(select(Game).where(Game.week == 3)).one()
+        game.franchise2_score = 125.0
+        db_session.commit()
+
+        body = client.get(f"/seasons/{season.id}/standings").json()
+        assert ranks(body) == [(1, "C"), (2, "A"), (3, "B")]
+
+    def test_rebuild(self, db_session: Session, season: Season):
+        db_session.execute(WeekStanding.__table__.delete())
+        db_session.commit()
+
+        rebuild_week_standings(db_session)
+        db_session.commit()
+
+        assert db_session.query(WeekStanding).count() == 9
+
+
+class StandingsEndpointTest:
+    def test_as_of_week(self, season: Season):
+        response = client.get(f"/seasons/{season.id}/standings", params={"week": 2})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["week"] == 2
+        assert ranks(body) == [(1, "A"), (2, "C"), (3, "B")]
+        assert body["standings"][0]["points_for"] == 200.0
+
+    def test_latest_week(self, season: Season):
+        body = client.get(f"/seasons/{season.id}/standings").json()
+
+        # Playoff games do not count
+        assert body["week"] == 3
+        assert ranks(body) == [(1, "C"), (2, "B"), (3, "A")]
+
+    def test_week_past_the_regular_season(self, season: Season):
+        body = client.get(f"/seasons/{season.id}/standings", params={"week": 10}).json()
+
+        assert body["week"] == 3
+
+    def test_timeline(self, season: Season):
+        response = client.get(f"/seasons/{season.id}/standings/timeline")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["weeks"] == [1, 2, 3]
+        assert [
+            (entry["franchise"]["name"], entry["ranks"]) for entry in body["franchises"]
+        ] == [("C", [3, 2, 1]), ("B", [2, 3, 2]), ("A", [1, 1, 3])]
+        assert body["franchises"][0]["wins"] == [0, 1, 1]
+
+    def test_season_without_games(self, db_session: Session):
+        league = League(name="Empty League")
+        db_session.add(league)
+        db_session.flush()
+        season = Season(league_id=league.id, year=2024)
+        db_session.add(season)
+        db_session.commit()
+
+        body = client.get(f"/seasons/{season.id}/standings").json()
+
+        assert body["week"] is None
+        assert body["standings"] == []
+
+    def test_unknown_season(self, db_session: Session):
+        assert client.get("/seasons/999999/standings").status_code == 404
+        assert client.get("/seasons/999999/standings/timeline").status_code == 404
@@ -0,0 +1,108 @@
+"""Tests for the prebuilt statement registry."""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models import Franchise, Game, League, Lineup, Player, Season
+from app.statements import STATEMENTS, StatementRegistry, player_history
+
+
+@pytest.fixture
+def history(db_session: Session):
+    """A player who scored for two franchises across two seasons."""
+    league = League(name="Statement League")
+    db_session.add(league)
+    db_session.flush()
+    seasons = [Season(league_id=league.id, year=year) for year in (2023, 2024)]
+    franchises = [Franchise(league_id=league.id, name=name) for name in ("A", "B")]
+    player = Player(name="Justin Jefferson", position="WR")
+    db_session.add_all([*seasons, *franchises, player])
+    db_session.flush()
+
+    for season, franchise, score in (
+        (seasons[0], franchises[0], 20.0),
+        (seasons[1], franchises[0], 10.0),
+        (seasons[1], franchises[1], 5.0),
+    ):
+        game = Game(
+            season_id=season.id,
+            week=1 + len(season.games),
+            franchise1_id=franchises[0].id,
+            franchise2_id=franchises[1].id,
+            game_type="REGULAR",
+        )
+        db_session.add(game)
+        db_session.flush()
+        db_session.add(
+            Lineup(
+                game_id=game.id,
+                franchise_id=franchise.id,
+                player_id=player.id,
+                score=score,
+            )
+        )
+    db_session.flush()
+    return league, seasons, franchises, player
+
+
+class StatementRegistryTest:
+    def test_lookups_bind_parameters(self, db_session: Session, history):
+        league, seasons, franchises, _ = history
+        assert (
+            STATEMENTS.first(db_session, "league_by_name", {"name": league.name})
+            is league
+        )
+        assert (
+            STATEMENTS.first(
+                db_session, "season_by_year", {"league_id": league.id, "year": 2024}
+            )
+            is seasons[1]
+        )
+        assert (
+            STATEMENTS.scalars(
+                db_session, "franchises_by_league", {"league_id": league.id}
+            )
+            == franchises
+        )
+        assert (
+            STATEMENTS.first(db_session, "league_by_name", {"name": "Nobody"}) is None
+        )
+
+    def test_duplicate_name(self):
+        registry = StatementRegistry()
+        registry.register("leagues", select(League))
+        with pytest.raises(ValueError, match="already registered"):
+            registry.register("leagues", select(League))
+
+
+class PlayerHistoryTest:
+    def test_all_seasons(self, db_session: Session, history):
+        *_, player = history
+        rows = player_history(db_session, player.id)
+        assert sorted((r.name, r.total_points, r.games_played) for r in rows) == [
+            ("A", 30.0, 2),
+            ("B", 5.0, 1),
+        ]
+
+    def test_one_season(self, db_session: Session, history):
+        _, seasons, _, player = history
+        rows = player_history(db_session, player.id, seasons[0].id)
+        assert [(r.name, r.total_points) for r in rows] == [("A", 20.0)]
+
+    def test_binds_new_values(self, db_session: Session, history):
+        _, seasons, _, player = history
+        # Same prebuilt statement, different bound season
+        for season, expected in ((seasons[0], 20.0), (seasons[1], 15.0)):
+            rows = player_history(db_session, player.id, season.id)
+            assert sum(r.total_points for r in rows) == expected
+
+
+def test_prepare_threshold_from_settings():
+    if engine.dialect.name != "postgresql":
+        pytest.skip("Server-side prepared statements are PostgreSQL only")
+    with engine.connect() as conn:
+        raw = conn.connection.dbapi_connection
+        assert raw.prepare_threshold == settings.database_prepare_threshold
@@ -0,0 +1,172 @@
+"""Tests for win/loss streaks and their endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import (
+    Franchise,
+    FranchiseSeason,
+    Game,
+    League,
+    Manager,
+    Season,
+    Streak,
+)
+from app.models.streak import rebuild_streaks
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def league(db_session: Session) -> League:
+    """Ann's A plays Bob's B every week; A goes W W L, then L W W W."""
+    league = League(name="Streak League")
+    db_session.add(league)
+    db_session.flush()
+    franchise_a = Franchise(league_id=league.id, name="A")
+    franchise_b = Franchise(league_id=league.id, name="B")
+    ann, bob = Manager(name="Ann"), Manager(name="Bob")
+    db_session.add_all([franchise_a, franchise_b, ann, bob])
+    db_session.flush()
+
+    for year, results in ((2022, "WWL"), (2023, "LWWW")):
+        season = Season(league_id=league.id, year=year)
+        db_session.add(season)
+        db_session.flush()
+        db_session.add_all(
+            [
+                FranchiseSeason(
+                    franchise_id=franchise.id,
+                    season_id=season.id,
+                    manager_id=manager.id,
+                )
+                for franchise, manager in ((franchise_a, ann), (franchise_b, bob))
+            ]
+        )
+        for week, result in enumerate(results, start=1):
+            db_session.add(
+                Game(
+                    season_id=season.id,
+                    week=week,
+                    game_type="REGULAR",
+                    franchise1_id=franchise_a.id,
+                    franchise2_id=franchise_b.id,
+                    franchise1_score=110.0 if result == "W" else 90.0,
+                    franchise2_score=100.0,
+                )
+            )
+    db_session.commit()
+    return league
+
+
+def subject_id(db: Session, model, name: str) -> int:
+    return db.scalars(select(model.id).where(model.name == name)).one()
+
+
+def streaks(client_response) -> dict:
+    assert client_response.status_code == 200
+    return client_response.json()
+
+
+class StreakTest:
+    def test_career_streaks_span_seasons(self, db_session: Session, league: League):
+        a = subject_id(db_session, Franchise, "A")
+        body = streaks(client.get(f"/franchises/{a}/streaks"))
+
+        career = body["longest"]["career"]
+        assert career["win"]["length"] == 3
+        assert career["win"]["active"] is True
+        assert career["loss"]["length"] == 2
+        assert career["loss"]["start"] == {"year": 2022, "week": 3}
+        assert career["loss"]["end"] == {"year": 2023, "week": 1}
+        assert body["current"]["kind"] == "win"
+        assert body["current"]["length"] == 3
+
+    def test_season_streaks_restart_each_season(
+        self, db_session: Session, league: League
+    ):
+        a = subject_id(db_session, Franchise, "A")
+        season = streaks(client.get(f"/franchises/{a}/streaks"))["longest"]["season"]
+
+        assert season["win"]["length"] == 3
+        # The two losses straddle the seasons
+        assert season["loss"] is None
+
+    def test_manager_streaks(self, db_session: Session, league: League):
+        bob = subject_id(db_session, Manager, "Bob")
+        body = streaks(client.get(f"/managers/{bob}/streaks"))
+
+        assert body["manager"]["name"] == "Bob"
+        assert body["current"]["kind"] == "loss"
+        assert body["longest"]["career"]["loss"]["length"] == 3
+
+    def test_new_week_extends_the_active_streak(
+        self, db_session: Session, league: League
+    ):
+        game = db_session.scalars(select(Game).order_by(Game.id.desc())).first()
+        db_session.add(
+            Game(
+                season_id=game.season_id,
+                week=5,
+                game_type="REGULAR",
+                franchise1_id=game.franchise1_id,
+                franchise2_id=game.franchise2_id,
+                franchise1_score=120.0,
+                franchise2_score=100.0,
+            )
+        )
+        db_session.commit()
+
+        a = subject_id(db_session, Franchise, "A")
+        assert streaks(client.get(f"/franchises/{a}/streaks"))["current"]["length"] == 4
+
+    def test_tie_ends_the_streak(self, db_session: Session, league: League):
+        game = db_session.scalars(select(Game).order_by(Game.id.desc())).first()
+        game.franchise1_score = 100.0
+        db_session.commit()
+
+        a = subject_id(db_session, Franchise, "A")
+        body = streaks(client.get(f"/franchises/{a}/streaks"))
+        assert body["current"] is None
+        assert body["longest"]["career"]["win"]["length"] == 2
+
+    def test_rebuild(self, db_session: Session, league: League):
+        db_session.execute(Streak.__table__.delete())
+        db_session.commit()
+
+        rebuild_streaks(db_session)
+        db_session.commit()
+
+        # The current career and season streak of both franchises and managers
+        assert db_session.query(Streak).filter(Streak.active.is_(True)).count() == 8
+
+
+class StreakEndpointTest:
+    def test_records(self, league: League):
+        response = client.get("/streaks", params={"kind": "loss"})
+
+        assert response.status_code == 200
+        rows = response.json()
+        assert [(row["franchise"]["name"], row["length"]) for row in rows] == [
+            ("B", 3),
+            ("A", 2),
+            ("B", 2),
+        ]
+        assert rows[0]["rank"] == 1
+
+    def test_active_records(self, league: League):
+        rows = client.get(
+            "/streaks", params={"scope": "manager", "active": True}
+        ).json()
+
+        assert [(row["manager"]["name"], row["length"]) for row in rows] == [("Ann", 3)]
+
+    def test_rejects_unknown_kind(self, db_session: Session):
+        assert client.get("/streaks", params={"kind": "draw"}).status_code == 400
+
+    def test_unknown_subject(self, db_session: Session):
+        assert client.get("/franchises/999999/streaks").status_code == 404
+        assert client.get("/managers/999999/streaks").status_code == 404